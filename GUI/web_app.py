@@ -1,5 +1,6 @@
-from flask import Flask, render_template, redirect, url_for, request, flash, session, jsonify
+from flask import Flask, render_template, redirect, url_for, request, flash, session, jsonify, Response, stream_with_context
 from functools import wraps
+import io
 import os
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -24,12 +25,15 @@ from purchases.savings import SavingsGoals
 #import from loan service
 from loan.loan_service import LoanService
 from loan.models import LoanStatus
+from loan.quotes import quote, quote_schedule, quote_grid
+from loan.amortization import MAX_TERM_MONTHS
 
 # import penny chatbot
 from chatbot.penny_chatbot import PennyChatbot
 
 # Import database connection helper
 from database.db_helper import get_db_connection, close_db_connection
+from database.schema import ensure_schema
 
 app = Flask(__name__, static_folder='static', template_folder='templates')
 app.secret_key = 'your_secret_key_here'  # Change this to a random secret key
@@ -37,6 +41,7 @@ app.secret_key = 'your_secret_key_here'  # Change this to a random secret key
 # Initialize database and services
 print("Initializing database...")
 init_db()
+ensure_schema()  # Service tables are created once here, not per request
 
 # Use the same database path that your Flask app expects
 db_path = 'C:\\Users\\Taizya Yambayamba\\Desktop\\Programming works\\Penny\\database\\penny.db'
@@ -198,7 +203,7 @@ def dashboard():
     try:
         # Get user's accounts and total balance
         user_accounts = account_service.get_accounts_by_user(user_id)
-        total_balance = sum(account['balance'] for account in user_accounts)
+        total_balance = account_service.get_user_totals(user_id)['total_balance']
     except Exception as e:
         print(f"Error fetching accounts for dashboard: {e}")
         user_accounts = []
@@ -244,32 +249,14 @@ def accounts():
         
         print("🔍 Step 2: Calculating total balance...")
         start_time = time.time()
-        total_balance = sum(account['balance'] for account in user_accounts)
+        total_balance = account_service.get_user_totals(user_id)['total_balance']
         print(f"✅ Step 2 completed in {time.time() - start_time:.2f}s - Total: {total_balance}")
         
-        print("🔍 Step 3: Getting transaction history...")
+        print("🔍 Step 3: Getting recent transactions...")
         start_time = time.time()
-        recent_transactions = []
-        for account in user_accounts:
-            print(f"🔍 Getting transactions for account {account['account_id']}")
-            transactions = account_service.get_transaction_history(account['account_id'])
-            print(f"✅ Found {len(transactions)} transactions for account {account['account_id']}")
-            for transaction in transactions:
-                recent_transactions.append({
-                    'account_id': account['account_id'],
-                    'account_type': account['account_type'],
-                    'transaction_type': transaction[0],
-                    'amount': transaction[1],
-                    'timestamp': transaction[2]
-                })
+        recent_transactions = account_service.get_recent_transactions(user_id, limit=5)
         print(f"✅ Step 3 completed in {time.time() - start_time:.2f}s - Total transactions: {len(recent_transactions)}")
         
-        print("🔍 Step 4: Sorting transactions...")
-        start_time = time.time()
-        recent_transactions.sort(key=lambda x: x['timestamp'], reverse=True)
-        recent_transactions = recent_transactions[:5]
-        print(f"✅ Step 4 completed in {time.time() - start_time:.2f}s")
-        
     except Exception as e:
         print(f"❌ Error in accounts route: {e}")
         import traceback
@@ -394,10 +381,41 @@ def get_transactions(account_id):
         if account['user_id'] != user_id:
             return jsonify({'error': 'Unauthorized'}), 403
         
-        transactions = account_service.get_transaction_history(account_id)
-        return jsonify(transactions)
+        limit = max(1, min(int(request.args.get('limit', 50)), 500))
+        page = account_service.get_transaction_page(account_id, limit, request.args.get('before'))
+        return jsonify(page)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+
+@app.route('/accounts/statement/<account_id>')
+@login_required
+def export_statement(account_id):
+    """Stream the account's statement as CSV or NDJSON without buffering it in memory"""
+    user_id = session.get('user_id')
+    fmt = request.args.get('format', 'csv')
+
+    try:
+        account = account_service._get_account(account_id)
+        if account['user_id'] != user_id:
+            return jsonify({'error': 'Unauthorized'}), 403
+
+        chunks = account_service.export_statement(
+            account_id, fmt, request.args.get('start'), request.args.get('end')
+        )
+    except AccountNotFoundError as e:
+        return jsonify({'error': str(e)}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=statement_{account_id[:8]}.{fmt}'}
+    )
     
 
 @app.route('/loans')
@@ -415,6 +433,7 @@ def loans():
         total_borrowed = sum(loan.principal for loan in user_loans if loan.status != LoanStatus.REJECTED.value)
         total_owed = sum(loan.balance_remaining for loan in user_loans if loan.status == LoanStatus.APPROVED.value)
         total_repaid = sum(loan.total_repayment for loan in user_loans)
+        loan_summaries = loan_service.get_loan_summaries(user_loans)
         
     except Exception as e:
         print(f"Error fetching loans: {e}")
@@ -422,6 +441,7 @@ def loans():
         total_borrowed = 0
         total_owed = 0
         total_repaid = 0
+        loan_summaries = {}
         flash('Error loading loans. Please try again.')
     
     return render_template('loans.html', 
@@ -430,6 +450,7 @@ def loans():
                          total_borrowed=total_borrowed,
                          total_owed=total_owed,
                          total_repaid=total_repaid,
+                         loan_summaries=loan_summaries,
                          LoanStatus=LoanStatus)
 
 @app.route('/loans/apply', methods=['POST'])
@@ -483,35 +504,15 @@ def make_repayment():
             flash('Please enter a valid repayment amount.')
             return redirect(url_for('loans'))
         
-        loan_service = LoanService()
+        # Ownership, status and the remaining balance are all checked by the repayment itself
+        loan = LoanService().make_repayment(loan_id, amount, user_id)
         
-        # Verify the loan belongs to the user and is approved
-        loan = loan_service.find_loan(loan_id)
-        if not loan or loan.user_id != user_id:
-            flash('Invalid loan or unauthorized action.')
-            return redirect(url_for('loans'))
-        
-        if loan.status != 'approved':
-            flash('You can only make repayments on approved loans.')
-            return redirect(url_for('loans'))
-        
-        if amount > loan.balance_remaining:
-            flash(f'Repayment amount cannot exceed the remaining balance of ZMW {loan.balance_remaining:.2f}')
-            return redirect(url_for('loans'))
-        
-        # Make the repayment
-        success = loan_service.make_repayment(loan_id, amount)
-        
-        if success:
+        if loan:
             flash(f'Repayment of ZMW {amount:.2f} processed successfully!')
-            
-            # Check if loan is fully paid
-            updated_loan = loan_service.find_loan(loan_id)
-            if updated_loan and updated_loan.balance_remaining <= 0:
+            if loan.status == 'completed':
                 flash('Congratulations! You have fully paid off this loan. 🎉')
-                
         else:
-            flash('Error processing repayment. Please try again.')
+            flash('Repayment refused: it must be on one of your approved loans and no more than its remaining balance.')
             
     except ValueError:
         flash('Please enter valid numeric values.')
@@ -538,28 +539,51 @@ def calculate_loan():
         # Validate inputs
         if principal <= 0 or interest_rate <= 0 or term_months <= 0:
             return jsonify({'error': 'Please enter valid values'}), 400
+        if term_months > MAX_TERM_MONTHS:
+            return jsonify({'error': f'Loan term must be at most {MAX_TERM_MONTHS} months'}), 400
         
-        # Calculate monthly payment
-        monthly_rate = interest_rate / 100 / 12
-        if monthly_rate == 0:
-            monthly_payment = principal / term_months
-        else:
-            monthly_payment = principal * monthly_rate * (1 + monthly_rate) ** term_months / ((1 + monthly_rate) ** term_months - 1)
+        # Served from the process-wide quote cache; typing revisits the same inputs constantly
+        result = quote(principal, interest_rate, term_months)
+        result['schedule'] = quote_schedule(principal, interest_rate, term_months)
+        return jsonify(result)
         
-        total_payment = monthly_payment * term_months
-        total_interest = total_payment - principal
+    except (ValueError, TypeError):
+        return jsonify({'error': 'Invalid input values'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/loans/calculator/grid', methods=['POST'])
+@login_required
+def calculate_loan_grid():
+    """Price one principal across several rates and terms for the comparison table"""
+    try:
+        data = request.get_json(silent=True) or {}
+        principal = float(data.get('calc_principal', 0))
+        rates = [float(rate) for rate in data.get('rates', [])]
+        terms = [int(term) for term in data.get('terms', [])]
+        
+        if principal <= 0 or not rates or not terms or min(rates) <= 0 or min(terms) <= 0:
+            return jsonify({'error': 'Please enter valid values'}), 400
+        if max(terms) > MAX_TERM_MONTHS:
+            return jsonify({'error': f'Loan term must be at most {MAX_TERM_MONTHS} months'}), 400
         
         return jsonify({
-            'monthly_payment': round(monthly_payment, 2),
-            'total_payment': round(total_payment, 2),
-            'total_interest': round(total_interest, 2)
+            'principal': principal,
+            'rates': rates,
+            'terms': terms,
+            'quotes': quote_grid(principal, rates, terms)
         })
         
-    except (ValueError, TypeError):
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except TypeError:
         return jsonify({'error': 'Invalid input values'}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
         
+# Months of history in the plans page budget trend
+TREND_MONTHS = 24
+
 @app.route('/plans')
 @login_required
 def plans():
@@ -582,19 +606,28 @@ def plans():
         savings = SavingsGoals(user_id)
         print(f"✅ SavingsGoals initialized in {time.time() - start_time:.2f}s")
         
-        print("🔍 Getting budgets...")
-        start_time = time.time()
-        budgets = budget_planner.get_budgets(user_id, current_month, current_year)
-        print(f"✅ Budgets retrieved in {time.time() - start_time:.2f}s: {len(budgets)} items")
-        
         print("🔍 Getting budget summary...")
         start_time = time.time()
+        # One query gives the overall budget, each category's limit and its real spend
         budget_summary = budget_planner.get_budget_summary(user_id, current_month, current_year)
-        print(f"✅ Budget summary retrieved in {time.time() - start_time:.2f}s")
+        budgets = [
+            dict(category, month=current_month, year=current_year)
+            for category in (budget_summary['categories'] if budget_summary else [])
+            if category['amount'] is not None
+        ]
+        print(f"✅ Budget summary retrieved in {time.time() - start_time:.2f}s: {len(budgets)} budgets")
+        
+        # 24 months ending this month, from one grouped query
+        today = datetime.now().date()
+        first_month = today.year * 12 + today.month - 1 - (TREND_MONTHS - 1)
+        budget_trend = budget_planner.trend(
+            user_id, f"{first_month // 12:04d}-{first_month % 12 + 1:02d}", today
+        )
+        trend_max = max(budget_trend['overall']['budgeted'] + budget_trend['overall']['spent']) or 1
         
         print("🔍 Getting savings goals...")
         start_time = time.time()
-        savings_goals = savings.get_goals()
+        savings_goals = savings.get_projections()
         print(f"✅ Savings goals retrieved in {time.time() - start_time:.2f}s: {len(savings_goals)} goals")
         
     except Exception as e:
@@ -603,6 +636,8 @@ def plans():
         traceback.print_exc()
         budgets = []
         budget_summary = None
+        budget_trend = None
+        trend_max = 1
         savings_goals = []
         flash('Error loading plans. Please try again.')
     
@@ -611,6 +646,8 @@ def plans():
                          current_user={'username': session.get('full_name', session.get('username', 'User'))},
                          budgets=budgets,
                          budget_summary=budget_summary,
+                         budget_trend=budget_trend,
+                         trend_max=trend_max,
                          savings_goals=savings_goals,
                          current_month=current_month,
                          current_year=current_year)
@@ -663,10 +700,11 @@ def add_savings_goal():
     user_id = session.get('user_id')
     goal_name = request.form.get('goal_name')
     target_amount = float(request.form.get('target_amount', 0))
+    target_date = request.form.get('target_date') or None
     
     try:
         purchase_service = PurchaseService(user_id)
-        purchase_service.add_savings_goal(goal_name, target_amount)
+        purchase_service.add_savings_goal(goal_name, target_amount, target_date)
         flash(f'Savings goal "{goal_name}" added with target of ZMW {target_amount:.2f}')
     except Exception as e:
         flash(f'Error adding savings goal: {str(e)}')
@@ -677,18 +715,57 @@ def add_savings_goal():
 @login_required
 def update_savings():
     user_id = session.get('user_id')
-    goal_name = request.form.get('goal_name')
-    amount = float(request.form.get('amount', 0))
     
     try:
+        goal_id = int(request.form.get('goal_id', 0))
+        amount = float(request.form.get('amount', 0))
         purchase_service = PurchaseService(user_id)
-        purchase_service.update_savings_progress(goal_name, amount)
-        flash(f'Updated savings for "{goal_name}" by ZMW {amount:.2f}')
+        saved = purchase_service.contribute_to_savings_goal(goal_id, amount)
+        flash(f'Added ZMW {amount:.2f} to your savings goal (ZMW {saved:.2f} saved so far)')
     except Exception as e:
         flash(f'Error updating savings: {str(e)}')
     
     return redirect(url_for('plans'))
 
+@app.route('/plans/add_expense', methods=['POST'])
+@login_required
+def add_expense():
+    user_id = session.get('user_id')
+    data = request.get_json(silent=True) or {}
+    
+    try:
+        PurchaseService(user_id).record_purchase(
+            data.get('description', ''), float(data.get('amount', 0)), data.get('date'), data.get('category')
+        )
+        return jsonify({'status': 'ok'})
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/plans/import_purchases', methods=['POST'])
+@login_required
+def import_purchases():
+    user_id = session.get('user_id')
+    upload = request.files.get('purchases_file')
+    
+    if not upload or not upload.filename:
+        flash('Please choose a CSV or NDJSON file to import.')
+        return redirect(url_for('plans'))
+    
+    fmt = 'ndjson' if upload.filename.lower().endswith(('.ndjson', '.jsonl')) else 'csv'
+    try:
+        # Decoded line by line straight from the upload, so large statements are never held in memory
+        lines = io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline='')
+        count = PurchaseService(user_id).import_purchases(lines, fmt)
+        flash(f'Imported {count} purchases.')
+    except (ValueError, KeyError) as e:
+        flash(f'Import failed, nothing was saved: {str(e)}')
+    except Exception as e:
+        flash(f'Error importing purchases: {str(e)}')
+    
+    return redirect(url_for('plans'))
+
 @app.route('/plans/delete_savings_goal', methods=['POST'])
 @login_required
 def delete_savings_goal():
@@ -697,7 +774,7 @@ def delete_savings_goal():
     
     try:
         purchase_service = PurchaseService(user_id)
-        purchase_service.delete_savings_goal(goal_name)
+        purchase_service.delete_savings_goal_by_id(int(request.form.get('goal_id', 0)))
         flash(f'Savings goal "{goal_name}" deleted')
     except Exception as e:
         flash(f'Error deleting savings goal: {str(e)}')
@@ -713,7 +790,7 @@ def penny():
     try:
         account_service = AccountService()
         user_accounts = account_service.get_accounts_by_user(user_id)
-        total_balance = sum(account['balance'] for account in user_accounts) if user_accounts else 0
+        total_balance = account_service.get_user_totals(user_id)['total_balance']
         
         purchase_service = PurchaseService(user_id)
         savings_goals = purchase_service.get_savings_goals()
@@ -26,7 +26,8 @@ def launch_account_cli(user_id=None):
         print("5. Check Balance")
         print("6. View Transaction History")
         print("7. Update Account")
-        print("8. Back to Main Menu")
+        print("8. Export Statement")
+        print("9. Back to Main Menu")
 
         choice = input("Select an option: ")
 
@@ -112,6 +113,21 @@ def launch_account_cli(user_id=None):
                 print(f"   Active: {'Yes' if acc['active'] else 'No'}")
 
             elif choice == "8":
+                acc_id = input("Enter account ID: ")
+                fmt = input("Format (csv/ndjson) [csv]: ").strip().lower() or "csv"
+                start = input("From date (YYYY-MM-DD, blank for all): ").strip() or None
+                end = input("Before date (YYYY-MM-DD, blank for all): ").strip() or None
+                path = input(f"Save to [statement_{acc_id[:8]}.{fmt}]: ").strip() or f"statement_{acc_id[:8]}.{fmt}"
+
+                # Validate the account and format before creating the file; chunks are then
+                # written as they are read, so large histories never sit in memory
+                chunks = service.export_statement(acc_id, fmt, start, end)
+                with open(path, "w", newline="") as f:
+                    for chunk in chunks:
+                        f.write(chunk)
+                print(f"✅ Statement saved to {path}")
+
+            elif choice == "9":
                 print("🔙 Returning to main menu...")
                 break
 
@@ -1,193 +1,409 @@
 # account/account_service.py
 # this module provides account management services
 import uuid
-from datetime import datetime
+import csv
+import io
+import json
+from datetime import date, datetime
 import os
 from .exceptions import AccountNotFoundError, InsufficientFundsError, InactiveAccountError
-from database.db_helper import get_db_connection
+from .ledger import CASH_ACCOUNT, post_entry, post_entries, verify_ledger
+from .ledger import balance_at as ledger_balance_at
+from database.db_helper import pooled_connection, immediate_transaction, select_in_chunks
+from database.schema import ensure_schema
+from database.money import to_ngwee, from_ngwee
+
+INSERT_TRANSACTION = '''
+    INSERT INTO transactions (transaction_id, account_id, amount, transaction_type, timestamp, seq)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+STATEMENT_FORMATS = ("csv", "ndjson")
+STATEMENT_COLUMNS = ("transaction_id", "timestamp", "transaction_type", "amount")
 
 class AccountService:
     def __init__(self):
-        pass
-
-    def _create_tables(self):
-        """Create tables if they don't exist"""
-        conn = None
-        try:
-            conn = get_db_connection()
-            cursor = conn.cursor()
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS accounts (
-                    account_id TEXT PRIMARY KEY,
-                    user_id TEXT NOT NULL,
-                    account_type TEXT NOT NULL,
-                    balance REAL NOT NULL DEFAULT 0,
-                    active INTEGER NOT NULL DEFAULT 1
-                )
-            ''')
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS transactions (
-                    transaction_id TEXT PRIMARY KEY,
-                    account_id TEXT NOT NULL,
-                    amount REAL NOT NULL,
-                    transaction_type TEXT NOT NULL,
-                    timestamp TEXT DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            conn.commit()
-        finally:
-            if conn:
-                conn.close()
+        ensure_schema()
 
     def create_account(self, user_id: str, account_type: str):
         if account_type not in ["Savings", "Checking"]:
             raise ValueError("Invalid account type.")
 
-        # Ensure tables exist
-        self._create_tables()
-
         # Convert user_id to string to ensure consistency
         user_id = str(user_id)
         
         account_id = str(uuid.uuid4())
         
-        conn = None
-        try:
-            conn = get_db_connection()
+        with immediate_transaction() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT INTO accounts (account_id, user_id, account_type, balance, active)
                 VALUES (?, ?, ?, ?, ?)
-            ''', (account_id, user_id, account_type, 0.0, 1))
-            conn.commit()
-        finally:
-            if conn:
-                conn.close()
+            ''', (account_id, user_id, account_type, 0, 1))
+            cursor.execute('''
+                INSERT INTO user_balance_summary (user_id, total_balance, account_count, updated_at)
+                VALUES (?, 0, 1, ?)
+                ON CONFLICT(user_id) DO UPDATE SET
+                    account_count = account_count + 1,
+                    updated_at = excluded.updated_at
+            ''', (user_id, datetime.now().isoformat()))
 
         return {"account_id": account_id, "account_type": account_type, "balance": 0.0}
 
     def deposit(self, user_id: str, account_id: str, amount: float):
         # Convert user_id to string for consistent comparison
         user_id = str(user_id)
-        
-        account = self._get_active_account(account_id)
-
-        if account["user_id"] != user_id:
-            raise PermissionError("Unauthorized: This account doesn't belong to the logged-in user.")
-
-        new_balance = account["balance"] + amount
+        account_id = str(account_id)
+        amount = self._positive_ngwee(amount)
 
-        conn = None
-        try:
-            conn = get_db_connection()
+        # Ownership/active checks and the credit happen in one guarded statement
+        with immediate_transaction() as conn:
             cursor = conn.cursor()
             cursor.execute('''
-                UPDATE accounts SET balance = ? WHERE account_id = ?
-            ''', (new_balance, account_id))
-            self._record_transaction(cursor, account_id, amount, "deposit")
-            conn.commit()
-        finally:
-            if conn:
-                conn.close()
-
-        return new_balance
+                UPDATE accounts SET balance = balance + ?
+                WHERE account_id = ? AND user_id = ? AND active = 1
+            ''', (amount, account_id, user_id))
+            if cursor.rowcount == 0:
+                self._raise_update_failure(
+                    cursor, account_id, user_id,
+                    "Unauthorized: This account doesn't belong to the logged-in user."
+                )
+            self._adjust_user_total(cursor, user_id, amount)
+            seq = post_entry(cursor, "deposit", [(account_id, amount), (CASH_ACCOUNT, -amount)])
+            self._record_transaction(cursor, account_id, amount, "deposit", seq)
+            return self._read_balance(cursor, account_id)
 
     def withdraw(self, user_id: str, account_id: str, amount: float):
         # Convert user_id to string for consistent comparison
         user_id = str(user_id)
-        
-        account = self._get_active_account(account_id)
-
-        if account["user_id"] != user_id:
-            raise PermissionError("Unauthorized: This account doesn't belong to the logged-in user.")
-
-        if account["balance"] < amount:
-            raise InsufficientFundsError("Insufficient funds.")
-
-        new_balance = account["balance"] - amount
+        account_id = str(account_id)
+        amount = self._positive_ngwee(amount)
 
-        conn = None
-        try:
-            conn = get_db_connection()
+        with immediate_transaction() as conn:
             cursor = conn.cursor()
             cursor.execute('''
-                UPDATE accounts SET balance = ? WHERE account_id = ?
-            ''', (new_balance, account_id))
-            self._record_transaction(cursor, account_id, amount, "withdraw")
-            conn.commit()
-        finally:
-            if conn:
-                conn.close()
-
-        return new_balance
+                UPDATE accounts SET balance = balance - ?
+                WHERE account_id = ? AND user_id = ? AND active = 1 AND balance >= ?
+            ''', (amount, account_id, user_id, amount))
+            if cursor.rowcount == 0:
+                self._raise_update_failure(
+                    cursor, account_id, user_id,
+                    "Unauthorized: This account doesn't belong to the logged-in user.",
+                    "Insufficient funds."
+                )
+            self._adjust_user_total(cursor, user_id, -amount)
+            seq = post_entry(cursor, "withdraw", [(account_id, -amount), (CASH_ACCOUNT, amount)])
+            self._record_transaction(cursor, account_id, amount, "withdraw", seq)
+            return self._read_balance(cursor, account_id)
 
     def transfer_funds(self, user_id: str, from_id: str, to_id: str, amount: float):
         # Convert user_id to string for consistent comparison  
         user_id = str(user_id)
-        
-        from_acc = self._get_active_account(from_id)
-        to_acc = self._get_active_account(to_id)
-
-        if from_acc["user_id"] != user_id:
-            raise PermissionError("Unauthorized: You can only transfer from your own accounts.")
-
-        if from_acc["balance"] < amount:
-            raise InsufficientFundsError("Insufficient funds for transfer.")
+        from_id = str(from_id)
+        to_id = str(to_id)
+        amount = self._positive_ngwee(amount)
 
-        new_from_balance = from_acc["balance"] - amount
-        new_to_balance = to_acc["balance"] + amount
-
-        conn = None
-        try:
-            conn = get_db_connection()
+        # Debit and credit commit together or not at all
+        with immediate_transaction() as conn:
             cursor = conn.cursor()
-            cursor.execute('UPDATE accounts SET balance = ? WHERE account_id = ?', (new_from_balance, from_id))
-            cursor.execute('UPDATE accounts SET balance = ? WHERE account_id = ?', (new_to_balance, to_id))
-
-            self._record_transaction(cursor, from_id, amount, "transfer_out")
-            self._record_transaction(cursor, to_id, amount, "transfer_in")
-            conn.commit()
-        finally:
-            if conn:
-                conn.close()
+            cursor.execute('''
+                UPDATE accounts SET balance = balance - ?
+                WHERE account_id = ? AND user_id = ? AND active = 1 AND balance >= ?
+            ''', (amount, from_id, user_id, amount))
+            if cursor.rowcount == 0:
+                self._raise_update_failure(
+                    cursor, from_id, user_id,
+                    "Unauthorized: You can only transfer from your own accounts.",
+                    "Insufficient funds for transfer."
+                )
 
-        return new_from_balance, new_to_balance
+            cursor.execute('''
+                UPDATE accounts SET balance = balance + ?
+                WHERE account_id = ? AND active = 1
+            ''', (amount, to_id))
+            if cursor.rowcount == 0:
+                self._raise_update_failure(cursor, to_id)
+
+            self._adjust_user_total(cursor, user_id, -amount)
+            self._adjust_user_total(cursor, self._owner_of(cursor, to_id), amount)
+
+            # One journal entry; both history rows point at it
+            seq = post_entry(cursor, "transfer", [(from_id, -amount), (to_id, amount)])
+            self._record_transaction(cursor, from_id, amount, "transfer_out", seq)
+            self._record_transaction(cursor, to_id, amount, "transfer_in", seq)
+            return self._read_balance(cursor, from_id), self._read_balance(cursor, to_id)
+
+    def apply_batch(self, operations):
+        """Apply many deposits, withdrawals and transfers in one transaction.
+
+        Each operation is a dict with ``type`` ("deposit", "withdraw" or
+        "transfer"), ``user_id`` and ``amount``, plus ``account_id`` for
+        deposits/withdrawals or ``from_id``/``to_id`` for transfers.
+
+        Every account involved is loaded in one snapshot read under the write
+        lock, operations are validated in order against running balances, and
+        the accepted ones are written with executemany, one journal entry per
+        operation. A failed item does not
+        stop the rest. Returns one result per operation, in order:
+        ``{"index", "status": "ok", "balance"}`` (``from_balance``/``to_balance``
+        for transfers) or ``{"index", "status": "failed", "error"}``.
+        """
+        operations = list(operations)
+        account_ids = set()
+        for op in operations:
+            for key in ("account_id", "from_id", "to_id"):
+                if op.get(key) is not None:
+                    account_ids.add(str(op[key]))
+
+        with immediate_transaction() as conn:
+            cursor = conn.cursor()
+            accounts = self._load_snapshot(cursor, account_ids)
+            results, entries, user_deltas = [], [], {}
+            touched = set()
+
+            for index, op in enumerate(operations):
+                try:
+                    balances = self._apply_to_snapshot(op, accounts, entries, user_deltas, touched)
+                except (ValueError, PermissionError, AccountNotFoundError,
+                        InactiveAccountError, InsufficientFundsError) as e:
+                    results.append({"index": index, "status": "failed", "error": str(e)})
+                    continue
+                results.append({"index": index, "status": "ok", **balances})
+
+            cursor.executemany(
+                'UPDATE accounts SET balance = ? WHERE account_id = ?',
+                [(accounts[account_id]["balance"], account_id) for account_id in touched]
+            )
+            seqs = post_entries(cursor, [(entry_type, postings) for entry_type, postings, _ in entries])
+            cursor.executemany(INSERT_TRANSACTION, [
+                self._transaction_row(account_id, amount, transaction_type, seq)
+                for seq, (_, _, legs) in zip(seqs, entries)
+                for account_id, amount, transaction_type in legs
+            ])
+            now = datetime.now().isoformat()
+            cursor.executemany('''
+                UPDATE user_balance_summary
+                SET total_balance = total_balance + ?, updated_at = ?
+                WHERE user_id = ?
+            ''', [(delta, now, user_id) for user_id, delta in user_deltas.items() if delta])
+
+        return results
+
+    def _load_snapshot(self, cursor, account_ids):
+        """Read owner, ngwee balance and active flag for each account, keyed by account_id."""
+        rows = select_in_chunks(
+            cursor, "SELECT account_id, user_id, balance, active FROM accounts WHERE account_id IN ({ids})", account_ids
+        )
+        return {row[0]: {"user_id": row[1], "balance": row[2], "active": bool(row[3])} for row in rows}
+
+    def _apply_to_snapshot(self, op, accounts, entries, user_deltas, touched):
+        """Validate one batch operation against the snapshot and stage its effects."""
+        op_type = op.get("type")
+        user_id = str(op.get("user_id"))
+        amount = self._positive_ngwee(op.get("amount"))
+
+        def active_account(account_id):
+            account = accounts.get(str(account_id))
+            if account is None:
+                raise AccountNotFoundError(f"Account with ID {account_id} not found.")
+            if not account["active"]:
+                raise InactiveAccountError("This account is inactive.")
+            return str(account_id), account
+
+        def move(account_id, account, delta):
+            account["balance"] += delta
+            user_deltas[account["user_id"]] = user_deltas.get(account["user_id"], 0) + delta
+            touched.add(account_id)
+
+        if op_type == "deposit":
+            account_id, account = active_account(op.get("account_id"))
+            if account["user_id"] != user_id:
+                raise PermissionError("Unauthorized: This account doesn't belong to the logged-in user.")
+            move(account_id, account, amount)
+            entries.append(("deposit", [(account_id, amount), (CASH_ACCOUNT, -amount)],
+                            [(account_id, amount, "deposit")]))
+            return {"balance": from_ngwee(account["balance"])}
+
+        if op_type == "withdraw":
+            account_id, account = active_account(op.get("account_id"))
+            if account["user_id"] != user_id:
+                raise PermissionError("Unauthorized: This account doesn't belong to the logged-in user.")
+            if account["balance"] < amount:
+                raise InsufficientFundsError("Insufficient funds.")
+            move(account_id, account, -amount)
+            entries.append(("withdraw", [(account_id, -amount), (CASH_ACCOUNT, amount)],
+                            [(account_id, amount, "withdraw")]))
+            return {"balance": from_ngwee(account["balance"])}
+
+        if op_type == "transfer":
+            from_id, source = active_account(op.get("from_id"))
+            to_id, target = active_account(op.get("to_id"))
+            if source["user_id"] != user_id:
+                raise PermissionError("Unauthorized: You can only transfer from your own accounts.")
+            if source["balance"] < amount:
+                raise InsufficientFundsError("Insufficient funds for transfer.")
+            move(from_id, source, -amount)
+            move(to_id, target, amount)
+            entries.append(("transfer", [(from_id, -amount), (to_id, amount)],
+                            [(from_id, amount, "transfer_out"), (to_id, amount, "transfer_in")]))
+            return {"from_balance": from_ngwee(source["balance"]), "to_balance": from_ngwee(target["balance"])}
+
+        raise ValueError(f"Unknown operation type: {op_type!r}")
 
     def check_funds(self, account_id: str):
         account = self._get_account(account_id)
         return account["balance"]
 
+    def balance_at(self, account_id: str, timestamp):
+        """Balance of an account as of ``timestamp``, derived from the ledger.
+
+        ``timestamp`` may be a datetime, a date or an ISO string; a bare date
+        means the end of that day. Reads start from the nearest daily snapshot,
+        so the cost does not grow with the account's history. Raises ValueError
+        for times before a migrated database's opening balances.
+        """
+        self._get_account(account_id)
+
+        if isinstance(timestamp, date):  # datetime is a date subclass
+            timestamp = timestamp.isoformat()
+        if len(timestamp) == 10:
+            timestamp += "T23:59:59.999999"
+        return from_ngwee(ledger_balance_at(account_id, timestamp))
+
     def update_account(self, account_id: str, **kwargs):
-        conn = None
-        try:
-            conn = get_db_connection()
+        with pooled_connection() as conn:
             cursor = conn.cursor()
             for key, val in kwargs.items():
                 cursor.execute(f'''
                     UPDATE accounts SET {key} = ? WHERE account_id = ?
                 ''', (val, account_id))
             conn.commit()
-        finally:
-            if conn:
-                conn.close()
 
         return self._get_account(account_id)
 
-    def _record_transaction(self, cursor, account_id: str, amount: float, transaction_type: str):
-        tx_id = str(uuid.uuid4())
-        timestamp = datetime.now().isoformat()
+    def get_user_totals(self, user_id: str):
+        """Total balance and account count for a user, read from the maintained summary row."""
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT total_balance, account_count FROM user_balance_summary WHERE user_id = ?
+            ''', (str(user_id),))
+            row = cursor.fetchone()
+
+        if not row:
+            return {"total_balance": 0.0, "account_count": 0}
+        return {"total_balance": from_ngwee(row[0]), "account_count": row[1]}
+
+    def reconcile_balance_summary(self, user_id: str = None, repair: bool = True):
+        """Compare user_balance_summary with the account balances it is derived from.
+
+        Returns one entry per user whose stored totals disagree with a fresh
+        aggregate. Balances are compared exactly, in ngwee. With ``repair``
+        those rows are rewritten in the same transaction. Pass ``user_id`` to
+        check a single user.
+        """
+        user_filter = "" if user_id is None else "WHERE user_id = ?"
+        params = () if user_id is None else (str(user_id),)
+
+        with immediate_transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT u.user_id, u.expected_balance, u.expected_count,
+                       s.total_balance, s.account_count
+                FROM (
+                    SELECT user_id, SUM(balance) AS expected_balance, COUNT(*) AS expected_count
+                    FROM accounts {user_filter}
+                    GROUP BY user_id
+                ) u
+                LEFT JOIN user_balance_summary s ON s.user_id = u.user_id
+            ''', params)
+
+            mismatches = []
+            for row in cursor.fetchall():
+                if row[3] is None or row[1] != row[3] or row[2] != row[4]:
+                    mismatches.append({
+                        "user_id": row[0],
+                        "expected_balance": row[1],
+                        "stored_balance": row[3],
+                        "expected_count": row[2],
+                        "stored_count": row[4]
+                    })
+
+            if repair and mismatches:
+                now = datetime.now().isoformat()
+                cursor.executemany('''
+                    INSERT OR REPLACE INTO user_balance_summary
+                        (user_id, total_balance, account_count, updated_at)
+                    VALUES (?, ?, ?, ?)
+                ''', [(m["user_id"], m["expected_balance"], m["expected_count"], now) for m in mismatches])
+
+            return mismatches
+
+    def verify_ledger(self, full_replay: bool = False, repair: bool = False):
+        """Audit accounts.balance against the double-entry ledger (see account/ledger.py).
+
+        Returns the ledger's report: unbalanced journal entries and accounts
+        whose cached balance (ngwee) differs from the ledger. With ``repair``
+        the ledger wins: mismatched balances are rewritten from it and the
+        per-user summary is reconciled afterwards.
+        """
+        report = verify_ledger(full_replay)
+        if repair and report["mismatched_accounts"]:
+            with immediate_transaction() as conn:
+                conn.cursor().executemany(
+                    'UPDATE accounts SET balance = ? WHERE account_id = ?',
+                    [(m["ledger_balance"], m["account_id"]) for m in report["mismatched_accounts"]]
+                )
+                self.reconcile_balance_summary()
+        return report
 
+    def _adjust_user_total(self, cursor, user_id: str, delta: int):
         cursor.execute('''
-            INSERT INTO transactions (transaction_id, account_id, amount, transaction_type, timestamp)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (tx_id, account_id, amount, transaction_type, timestamp))
+            UPDATE user_balance_summary
+            SET total_balance = total_balance + ?, updated_at = ?
+            WHERE user_id = ?
+        ''', (delta, datetime.now().isoformat(), user_id))
+
+    def _owner_of(self, cursor, account_id: str):
+        cursor.execute('SELECT user_id FROM accounts WHERE account_id = ?', (account_id,))
+        return cursor.fetchone()[0]
+
+    @staticmethod
+    def _positive_ngwee(amount):
+        """Amount in ngwee, refusing zero or negative values that would invert a debit or credit"""
+        amount = to_ngwee(amount)
+        if amount is None or amount <= 0:
+            raise ValueError("Amount must be positive.")
+        return amount
+
+    def _transaction_row(self, account_id: str, amount: int, transaction_type: str, seq: int):
+        return (str(uuid.uuid4()), account_id, amount, transaction_type, datetime.now().isoformat(), seq)
+
+    def _record_transaction(self, cursor, account_id: str, amount: int, transaction_type: str, seq: int):
+        cursor.execute(INSERT_TRANSACTION, self._transaction_row(account_id, amount, transaction_type, seq))
+
+    def _read_balance(self, cursor, account_id: str):
+        cursor.execute('SELECT balance FROM accounts WHERE account_id = ?', (account_id,))
+        return from_ngwee(cursor.fetchone()[0])
+
+    def _raise_update_failure(self, cursor, account_id: str, user_id: str = None,
+                              unauthorized_message: str = None, insufficient_message: str = None):
+        """Explain why a guarded balance UPDATE matched no row by raising the matching error."""
+        cursor.execute('SELECT user_id, balance, active FROM accounts WHERE account_id = ?', (account_id,))
+        row = cursor.fetchone()
+
+        if not row:
+            raise AccountNotFoundError(f"Account with ID {account_id} not found.")
+        if not row[2]:
+            raise InactiveAccountError("This account is inactive.")
+        if user_id is not None and row[0] != user_id:
+            raise PermissionError(unauthorized_message)
+        raise InsufficientFundsError(insufficient_message or "Insufficient funds.")
 
     def _get_account(self, account_id: str):
         """Retrieve a single account by its ID."""
         account_id = str(account_id)
-        conn = None
-        try:
-            conn = get_db_connection()
+        with pooled_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT * FROM accounts WHERE account_id = ?', (account_id,))
             row = cursor.fetchone()
@@ -199,19 +415,14 @@ class AccountService:
                 "account_id": row[0],
                 "user_id": row[1],
                 "account_type": row[2],
-                "balance": row[3],
+                "balance": from_ngwee(row[3]),
                 "active": bool(row[4])
             }
-        finally:
-            if conn:
-                conn.close()
 
     def _get_active_account(self, account_id: str):
         """Retrieve a single active account by ID, raise errors if missing/inactive."""
         account_id = str(account_id)
-        conn = None
-        try:
-            conn = get_db_connection()
+        with pooled_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT * FROM accounts WHERE account_id = ?", (account_id,))
             row = cursor.fetchone()
@@ -223,7 +434,7 @@ class AccountService:
                 "account_id": row[0],
                 "user_id": row[1],
                 "account_type": row[2],
-                "balance": row[3],
+                "balance": from_ngwee(row[3]),
                 "active": bool(row[4])
             }
 
@@ -231,30 +442,153 @@ class AccountService:
                raise InactiveAccountError("This account is inactive.")
 
             return account
-        finally:
-            if conn:
-                conn.close()
-
-    def get_transaction_history(self, account_id: str):
-        conn = None
-        try:
-            conn = get_db_connection()
+
+    def get_transaction_history(self, account_id: str, limit: int = None, before: str = None):
+        """Return (transaction_type, amount, timestamp) tuples, newest first.
+
+        Without ``limit`` the whole history is returned. With ``limit``, pass the
+        ``next_cursor`` from get_transaction_page as ``before`` to read the next page.
+        """
+        rows = self._query_transactions(account_id, limit, before)
+        return [(row[1], from_ngwee(row[2]), row[3]) for row in rows]
+
+    def get_transaction_page(self, account_id: str, limit: int = 20, before: str = None):
+        """Return one page of history plus the cursor for the page after it."""
+        rows = self._query_transactions(account_id, limit, before)
+        transactions = [{
+            "transaction_id": row[0],
+            "transaction_type": row[1],
+            "amount": from_ngwee(row[2]),
+            "timestamp": row[3]
+        } for row in rows]
+
+        next_cursor = None
+        if rows and limit is not None and len(rows) == int(limit):
+            next_cursor = f"{rows[-1][3]}|{rows[-1][0]}"
+        return {"transactions": transactions, "next_cursor": next_cursor}
+
+    def _query_transactions(self, account_id: str, limit: int = None, before: str = None):
+        """Keyset pagination over (timestamp, transaction_id), served by the account/time index."""
+        query = '''
+            SELECT transaction_id, transaction_type, amount, timestamp FROM transactions
+            WHERE account_id = ?
+        '''
+        params = [str(account_id)]
+
+        if before:
+            try:
+                cursor_timestamp, cursor_id = before.rsplit("|", 1)
+                datetime.fromisoformat(cursor_timestamp)
+            except ValueError:
+                raise ValueError("Invalid transaction cursor.") from None
+            if not cursor_id:
+                raise ValueError("Invalid transaction cursor.")
+            query += " AND (timestamp, transaction_id) < (?, ?)"
+            params.extend([cursor_timestamp, cursor_id])
+
+        query += " ORDER BY timestamp DESC, transaction_id DESC"
+        if limit is not None:
+            # SQLite reads LIMIT -1 as "no limit", so a bad page size would return the whole history
+            if int(limit) < 1:
+                raise ValueError("Page limit must be at least 1.")
+            query += " LIMIT ?"
+            params.append(int(limit))
+
+        with pooled_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT transaction_type, amount, timestamp FROM transactions
-                WHERE account_id = ? ORDER BY timestamp DESC
-            ''', (account_id,))
+            cursor.execute(query, params)
             return cursor.fetchall()
-        finally:
-            if conn:
-                conn.close()
-    
+
+    def export_statement(self, account_id: str, fmt: str = "csv", start: str = None,
+                         end: str = None, chunk_size: int = 500):
+        """Yield an account statement as CSV or NDJSON text, oldest transaction first.
+
+        Rows are read from the cursor ``chunk_size`` at a time and each chunk is
+        yielded as one string, so memory stays flat however long the history.
+        ``start`` is inclusive and ``end`` exclusive (ISO timestamps or dates).
+        Write the chunks straight to a file or a streamed HTTP response.
+        """
+        if fmt not in STATEMENT_FORMATS:
+            raise ValueError(f"Unsupported statement format: {fmt}")
+        self._get_account(account_id)
+
+        query = '''
+            SELECT transaction_id, timestamp, transaction_type, amount FROM transactions
+            WHERE account_id = ?
+        '''
+        params = [str(account_id)]
+        if start:
+            query += " AND timestamp >= ?"
+            params.append(start)
+        if end:
+            query += " AND timestamp < ?"
+            params.append(end)
+        query += " ORDER BY timestamp, transaction_id"
+
+        return self._stream_statement(query, params, fmt, chunk_size)
+
+    def _stream_statement(self, query, params, fmt, chunk_size):
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+
+            if fmt == "csv":
+                yield ",".join(STATEMENT_COLUMNS) + "\r\n"
+
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+
+                buffer = io.StringIO()
+                if fmt == "csv":
+                    writer = csv.writer(buffer)
+                    writer.writerows((row[0], row[1], row[2], f"{from_ngwee(row[3]):.2f}") for row in rows)
+                else:
+                    for row in rows:
+                        buffer.write(json.dumps({
+                            "transaction_id": row[0],
+                            "timestamp": row[1],
+                            "transaction_type": row[2],
+                            "amount": from_ngwee(row[3])
+                        }) + "\n")
+                yield buffer.getvalue()
+
+    def get_recent_transactions(self, user_id: str, limit: int = 5):
+        """Latest ``limit`` transactions across all of a user's accounts.
+
+        Each account contributes at most ``limit`` rows via an index range read,
+        so the cost tracks what is displayed rather than lifetime history.
+        """
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT t.transaction_id, t.account_id, a.account_type,
+                       t.transaction_type, t.amount, t.timestamp
+                FROM accounts a
+                JOIN transactions t ON t.rowid IN (
+                    SELECT rowid FROM transactions
+                    WHERE account_id = a.account_id
+                    ORDER BY timestamp DESC, transaction_id DESC
+                    LIMIT ?
+                )
+                WHERE a.user_id = ?
+                ORDER BY t.timestamp DESC, t.transaction_id DESC
+                LIMIT ?
+            ''', (limit, str(user_id), limit))
+            return [{
+                "transaction_id": row[0],
+                "account_id": row[1],
+                "account_type": row[2],
+                "transaction_type": row[3],
+                "amount": from_ngwee(row[4]),
+                "timestamp": row[5]
+            } for row in cursor.fetchall()]
+
     def get_accounts_by_user(self, user_id: str):
         """Retrieve all accounts for a given user."""
         user_id = str(user_id)
-        conn = None
-        try:
-            conn = get_db_connection()
+        with pooled_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT * FROM accounts WHERE user_id = ?", (user_id,))
             rows = cursor.fetchall()
@@ -265,11 +599,8 @@ class AccountService:
                     "account_id": row[0],
                     "user_id": row[1],
                     "account_type": row[2],
-                    "balance": row[3],
+                    "balance": from_ngwee(row[3]),
                     "active": bool(row[4])
                 })
 
-            return accounts
-        finally:
-            if conn:
-                conn.close()
\ No newline at end of file
+            return accounts
\ No newline at end of file
@@ -7,3 +7,6 @@ class InsufficientFundsError(Exception):
 
 class InactiveAccountError(Exception):
     pass
+
+class UnbalancedEntryError(Exception):
+    pass
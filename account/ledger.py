@@ -0,0 +1,244 @@
+# account/ledger.py
+# Append-only double-entry ledger behind AccountService.
+# Every balance change is a journal entry whose postings (signed ngwee) sum to zero. accounts.balance
+# is a cache of the ledger, written in the same transaction and checked against it by verify_ledger().
+# Checkpoints (every CHECKPOINT_INTERVAL entries) and daily balance snapshots bound how much of the
+# ledger any balance lookup has to replay.
+
+from datetime import datetime
+from database.db_helper import pooled_connection, immediate_transaction
+from .exceptions import UnbalancedEntryError
+
+# Contra account for money entering or leaving the bank (deposits and withdrawals)
+CASH_ACCOUNT = "@cash"
+
+# Journal entries between automatic checkpoints
+CHECKPOINT_INTERVAL = 1000
+
+
+def post_entries(cursor, entries):
+    """Append journal entries and return their sequence numbers.
+
+    ``entries`` is a list of ``(entry_type, postings)`` pairs, where postings
+    are ``(account_id, amount)`` tuples in signed ngwee. The caller must hold
+    the write lock (``immediate_transaction``) so sequence numbers are
+    allocated without gaps or races.
+    """
+    for entry_type, postings in entries:
+        if sum(amount for _, amount in postings) != 0:
+            raise UnbalancedEntryError(f"Postings for '{entry_type}' do not sum to zero: {postings}")
+
+    cursor.execute(
+        "SELECT seq, created_at FROM journal_entries WHERE seq = (SELECT MAX(seq) FROM journal_entries)"
+    )
+    row = cursor.fetchone()
+    head = row[0] if row else 0
+    today = datetime.now().date().isoformat()
+    if row and row[1][:10] < today:
+        # First entry of a new day: close out the days before it
+        take_daily_snapshots(cursor, today)
+
+    seqs = list(range(head + 1, head + 1 + len(entries)))
+    now = datetime.now().isoformat()
+
+    cursor.executemany(
+        "INSERT INTO journal_entries (seq, entry_type, created_at) VALUES (?, ?, ?)",
+        [(seq, entry_type, now) for seq, (entry_type, _) in zip(seqs, entries)]
+    )
+    cursor.executemany(
+        "INSERT INTO postings (seq, account_id, amount) VALUES (?, ?, ?)",
+        [(seq, account_id, amount)
+         for seq, (_, postings) in zip(seqs, entries)
+         for account_id, amount in postings]
+    )
+
+    if seqs and seqs[-1] // CHECKPOINT_INTERVAL > head // CHECKPOINT_INTERVAL:
+        checkpoint(cursor)
+    return seqs
+
+
+def post_entry(cursor, entry_type, postings):
+    """Append one journal entry and return its sequence number"""
+    return post_entries(cursor, [(entry_type, postings)])[0]
+
+
+def checkpoint(cursor=None):
+    """Record each changed account's ledger balance as of the current head sequence.
+
+    Only accounts with postings since the last checkpoint are written. Each of
+    those had no postings between its own previous checkpoint and the last
+    run, so its new balance is that checkpoint plus the postings since.
+    Returns the checkpointed sequence number, or None if nothing changed.
+    """
+    if cursor is None:
+        with immediate_transaction() as conn:
+            return checkpoint(conn.cursor())
+
+    cursor.execute("SELECT COALESCE(MAX(seq), 0) FROM journal_entries")
+    head = cursor.fetchone()[0]
+    cursor.execute("SELECT COALESCE(MAX(seq), 0) FROM ledger_checkpoints")
+    last = cursor.fetchone()[0]
+    if head <= last:
+        return None
+
+    cursor.execute("""
+        INSERT INTO ledger_checkpoints (account_id, seq, balance, created_at)
+        SELECT p.account_id, ?,
+               COALESCE((SELECT c.balance FROM ledger_checkpoints c
+                         WHERE c.account_id = p.account_id
+                         ORDER BY c.seq DESC LIMIT 1), 0) + SUM(p.amount),
+               ?
+        FROM postings p
+        WHERE p.seq > ?
+        GROUP BY p.account_id
+    """, (head, datetime.now().isoformat(), last))
+    return head
+
+
+def take_daily_snapshots(cursor=None, before_day=None):
+    """Write end-of-day balance snapshots for every day before ``before_day`` not yet covered.
+
+    ``before_day`` defaults to today, so only completed days are snapshotted.
+    Days are processed in order and each writes rows only for accounts with
+    postings that day; an account's latest snapshot therefore stays valid
+    until its next active day. Returns the number of days snapshotted.
+    """
+    if cursor is None:
+        with immediate_transaction() as conn:
+            return take_daily_snapshots(conn.cursor(), before_day)
+
+    before_day = before_day or datetime.now().date().isoformat()
+    cursor.execute("SELECT COALESCE(MAX(seq), 0) FROM balance_snapshots")
+    last = cursor.fetchone()[0]
+    cursor.execute("""
+        SELECT substr(created_at, 1, 10) AS day, MAX(seq) FROM journal_entries
+        WHERE seq > ?
+        GROUP BY day
+        ORDER BY day
+    """, (last,))
+    days = [(day, end_seq) for day, end_seq in cursor.fetchall() if day < before_day]
+
+    for day, end_seq in days:
+        cursor.execute("""
+            INSERT INTO balance_snapshots (account_id, day, seq, balance)
+            SELECT p.account_id, ?, ?,
+                   COALESCE((SELECT s.balance FROM balance_snapshots s
+                             WHERE s.account_id = p.account_id
+                             ORDER BY s.day DESC LIMIT 1), 0) + SUM(p.amount)
+            FROM postings p
+            WHERE p.seq > ? AND p.seq <= ?
+            GROUP BY p.account_id
+        """, (day, end_seq, last, end_seq))
+        last = end_seq
+    return len(days)
+
+
+def balance_at(account_id, timestamp):
+    """Ledger balance of an account in ngwee as of ``timestamp`` (ISO 8601 string).
+
+    Finds the last journal entry at or before ``timestamp``, starts from the
+    nearest daily snapshot or checkpoint at or before it, and replays only
+    the postings in between. Times before the ledger's first entry return 0,
+    unless that entry is the opening balance posted when an existing database
+    was migrated: the history before it was never journaled, so ValueError
+    is raised rather than reporting a balance of 0.
+    """
+    account_id = str(account_id)
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT seq FROM journal_entries WHERE created_at <= ?
+            ORDER BY created_at DESC, seq DESC LIMIT 1
+        """, (timestamp,))
+        row = cursor.fetchone()
+        if not row:
+            cursor.execute("SELECT entry_type, created_at FROM journal_entries WHERE seq = 1")
+            first = cursor.fetchone()
+            if first and first[0] == "opening":
+                raise ValueError(f"No ledger history before {first[1]}, when opening balances were posted.")
+            return 0
+        target = row[0]
+
+        # The snapshot for the timestamp's own day is skipped by the seq bound when it ends later
+        cursor.execute("""
+            SELECT seq, balance FROM balance_snapshots
+            WHERE account_id = ? AND day <= ? AND seq <= ?
+            ORDER BY day DESC LIMIT 1
+        """, (account_id, timestamp[:10], target))
+        base_seq, base_balance = cursor.fetchone() or (0, 0)
+
+        cursor.execute("""
+            SELECT seq, balance FROM ledger_checkpoints
+            WHERE account_id = ? AND seq > ? AND seq <= ?
+            ORDER BY seq DESC LIMIT 1
+        """, (account_id, base_seq, target))
+        base_seq, base_balance = cursor.fetchone() or (base_seq, base_balance)
+
+        cursor.execute("""
+            SELECT COALESCE(SUM(amount), 0) FROM postings
+            WHERE account_id = ? AND seq > ? AND seq <= ?
+        """, (account_id, base_seq, target))
+        return base_balance + cursor.fetchone()[0]
+
+
+def derive_balance(account_id, as_of_seq=None):
+    """Ledger balance of an account in ngwee: latest checkpoint plus the postings after it.
+
+    With ``as_of_seq`` the balance is derived as of that journal sequence.
+    """
+    upper = "" if as_of_seq is None else " AND seq <= ?"
+    upper_params = () if as_of_seq is None else (as_of_seq,)
+
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT seq, balance FROM ledger_checkpoints WHERE account_id = ?" + upper +
+            " ORDER BY seq DESC LIMIT 1",
+            (str(account_id),) + upper_params
+        )
+        row = cursor.fetchone()
+        base_seq, base_balance = (row[0], row[1]) if row else (0, 0)
+
+        cursor.execute(
+            "SELECT COALESCE(SUM(amount), 0) FROM postings WHERE account_id = ? AND seq > ?" + upper,
+            (str(account_id), base_seq) + upper_params
+        )
+        return base_balance + cursor.fetchone()[0]
+
+
+def verify_ledger(full_replay=False):
+    """Audit the ledger and return what disagrees.
+
+    Checks that every journal entry balances and that each account's cached
+    ``accounts.balance`` equals its ledger balance. By default balances are
+    derived from the latest checkpoints. ``full_replay`` replays every posting
+    from the start, which also validates the checkpoints themselves.
+    """
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT seq FROM postings GROUP BY seq HAVING SUM(amount) != 0")
+        unbalanced = [row[0] for row in cursor.fetchall()]
+
+        if full_replay:
+            cursor.execute("""
+                SELECT a.account_id, a.balance,
+                       (SELECT COALESCE(SUM(p.amount), 0) FROM postings p WHERE p.account_id = a.account_id)
+                FROM accounts a
+            """)
+        else:
+            cursor.execute("""
+                SELECT a.account_id, a.balance,
+                       COALESCE(c.balance, 0) + (
+                           SELECT COALESCE(SUM(p.amount), 0) FROM postings p
+                           WHERE p.account_id = a.account_id AND p.seq > COALESCE(c.seq, 0))
+                FROM accounts a
+                LEFT JOIN ledger_checkpoints c ON c.account_id = a.account_id
+                    AND c.seq = (SELECT MAX(seq) FROM ledger_checkpoints WHERE account_id = a.account_id)
+            """)
+        mismatched = [{
+            "account_id": row[0],
+            "stored_balance": row[1],
+            "ledger_balance": row[2]
+        } for row in cursor.fetchall() if row[1] != row[2]]
+
+    return {"unbalanced_entries": unbalanced, "mismatched_accounts": mismatched}
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Behaviour of AccountService against a scratch database: batches, concurrency, statements and paging.
+"""
+
+import sys
+import os
+import csv
+import json
+import threading
+import pytest
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_helper import pooled_connection
+from account import ledger
+from account.account_cli import launch_account_cli
+from account.account_service import AccountService
+from account.exceptions import AccountNotFoundError, InactiveAccountError, InsufficientFundsError
+
+
+@pytest.fixture
+def service(pool_db):
+    return AccountService()
+
+
+def _run_concurrently(worker, count):
+    """Start ``count`` threads on ``worker(i)`` together and collect their exceptions"""
+    start = threading.Barrier(count)
+    errors = []
+
+    def run(i):
+        start.wait()
+        try:
+            worker(i)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return errors
+
+
+def _history(service, timestamps):
+    """Deposit 1, 2, 3... into a new account and stamp the rows with ``timestamps``, in order"""
+    account = service.create_account("1", "Savings")["account_id"]
+    for amount in range(1, len(timestamps) + 1):
+        service.deposit("1", account, amount)
+    with pooled_connection() as conn:
+        ids = [row[0] for row in conn.execute("SELECT transaction_id FROM transactions ORDER BY seq")]
+        conn.executemany(
+            "UPDATE transactions SET timestamp = ? WHERE transaction_id = ?", list(zip(timestamps, ids))
+        )
+        conn.commit()
+    return account
+
+
+def test_apply_batch_reports_each_item_and_carries_balances_forward(service):
+    first = service.create_account("1", "Savings")["account_id"]
+    second = service.create_account("2", "Checking")["account_id"]
+
+    results = service.apply_batch([
+        {"type": "deposit", "user_id": "1", "account_id": first, "amount": 100},
+        {"type": "overdraft", "user_id": "1", "account_id": first, "amount": 5},
+        {"type": "deposit", "user_id": "1", "account_id": first, "amount": "abc"},
+        {"type": "deposit", "user_id": "1", "account_id": first, "amount": ""},
+        {"type": "deposit", "user_id": "1", "account_id": first, "amount": float("inf")},
+        {"type": "withdraw", "user_id": "1", "account_id": first, "amount": 60},
+        {"type": "withdraw", "user_id": "1", "account_id": first, "amount": 50},
+        {"type": "deposit", "user_id": "1", "account_id": "no-such-account", "amount": 5},
+        {"type": "transfer", "user_id": "1", "from_id": first, "to_id": second, "amount": 40},
+    ])
+
+    assert [r["index"] for r in results] == list(range(9))
+    assert [r["status"] for r in results] == [
+        "ok", "failed", "failed", "failed", "failed", "ok", "failed", "failed", "ok",
+    ]
+    assert results[0]["balance"] == 100
+    assert "Unknown operation type" in results[1]["error"]
+    assert all("Not a valid amount" in results[i]["error"] for i in (2, 3, 4))
+    # The failed withdrawal sees the 40 left after the first one, not the starting 100
+    assert results[5]["balance"] == 40
+    assert results[6]["error"] == "Insufficient funds."
+    assert "not found" in results[7]["error"]
+    assert (results[8]["from_balance"], results[8]["to_balance"]) == (0, 40)
+
+    assert service.check_funds(first) == 0
+    assert service.check_funds(second) == 40
+    assert service.get_user_totals("1")["total_balance"] == 0
+    assert service.get_user_totals("2")["total_balance"] == 40
+
+
+def test_concurrent_deposits_withdrawals_and_transfers_keep_balances_exact(service):
+    source = service.create_account("1", "Savings")["account_id"]
+    target = service.create_account("2", "Checking")["account_id"]
+    service.deposit("1", source, 1000)
+
+    def worker(i):
+        for _ in range(10):
+            service.deposit("1", source, 1.25)
+            service.withdraw("1", source, 0.25)
+            service.transfer_funds("1", source, target, 0.5)
+
+    assert _run_concurrently(worker, 8) == []
+    # 80 rounds of +1.25 - 0.25 - 0.50
+    assert service.check_funds(source) == 1040
+    assert service.check_funds(target) == 40
+    assert service.get_user_totals("1")["total_balance"] == 1040
+    assert service.get_user_totals("2")["total_balance"] == 40
+    assert ledger.derive_balance(source) == 104000
+    assert ledger.derive_balance(target) == 4000
+
+
+def test_concurrent_withdrawals_never_overdraw(service):
+    account = service.create_account("1", "Savings")["account_id"]
+    service.deposit("1", account, 10)
+
+    errors = _run_concurrently(lambda i: service.withdraw("1", account, 1), 20)
+
+    assert len(errors) == 10 and all(isinstance(e, InsufficientFundsError) for e in errors)
+    assert service.check_funds(account) == 0
+    assert service.get_user_totals("1")["total_balance"] == 0
+
+
+def test_failed_transfer_rolls_back_both_legs(service):
+    source = service.create_account("1", "Savings")["account_id"]
+    closed = service.create_account("2", "Checking")["account_id"]
+    service.deposit("1", source, 100)
+    service.update_account(closed, active=0)
+
+    with pytest.raises(AccountNotFoundError):
+        service.transfer_funds("1", source, "no-such-account", 40)
+    with pytest.raises(InactiveAccountError):
+        service.transfer_funds("1", source, closed, 40)
+
+    assert service.check_funds(source) == 100
+    assert service.check_funds(closed) == 0
+    assert service.get_user_totals("1")["total_balance"] == 100
+    assert ledger.derive_balance(source) == 10000
+    with pooled_connection() as conn:
+        assert [row[0] for row in conn.execute("SELECT transaction_type FROM transactions")] == ["deposit"]
+
+
+@pytest.mark.parametrize("amount", [0, -1000, None])
+def test_single_operations_reject_non_positive_amounts(service, amount):
+    source = service.create_account("1", "Savings")["account_id"]
+    target = service.create_account("1", "Checking")["account_id"]
+    service.deposit("1", source, 5)
+
+    for operation in (lambda: service.deposit("1", source, amount),
+                      lambda: service.withdraw("1", source, amount),
+                      lambda: service.transfer_funds("1", source, target, amount)):
+        with pytest.raises(ValueError, match="Amount must be positive"):
+            operation()
+
+    assert (service.check_funds(source), service.check_funds(target)) == (5, 0)
+    assert ledger.derive_balance(source) == 500
+
+
+def test_export_statement_streams_csv_and_ndjson_within_bounds(service):
+    account = _history(service, [
+        "2026-01-31T23:59:59", "2026-02-01T00:00:00", "2026-02-14T12:00:00",
+        "2026-02-28T23:59:59", "2026-03-01T00:00:00",
+    ])
+
+    text = "".join(service.export_statement(account, "csv", "2026-02-01", "2026-03-01", chunk_size=2))
+    rows = list(csv.reader(text.splitlines()))
+    assert rows[0] == ["transaction_id", "timestamp", "transaction_type", "amount"]
+    assert [(row[1], row[2], row[3]) for row in rows[1:]] == [
+        ("2026-02-01T00:00:00", "deposit", "2.00"),
+        ("2026-02-14T12:00:00", "deposit", "3.00"),
+        ("2026-02-28T23:59:59", "deposit", "4.00"),
+    ]
+
+    lines = "".join(service.export_statement(account, "ndjson", start="2026-02-14")).splitlines()
+    assert [(r["timestamp"], r["amount"]) for r in map(json.loads, lines)] == [
+        ("2026-02-14T12:00:00", 3), ("2026-02-28T23:59:59", 4), ("2026-03-01T00:00:00", 5),
+    ]
+    assert len("".join(service.export_statement(account, "ndjson")).splitlines()) == 5
+
+
+def test_cli_export_creates_no_file_for_a_rejected_request(service, tmp_path, monkeypatch):
+    account = service.create_account("1", "Savings")["account_id"]
+    path = tmp_path / "statement.xml"
+    answers = iter(["8", account, "xml", "", "", str(path), "8", "missing", "csv", "", "", str(path), "9"])
+    monkeypatch.setattr("builtins.input", lambda prompt="": next(answers))
+
+    launch_account_cli("1")
+
+    assert not path.exists()
+
+
+def test_transaction_pages_walk_shared_timestamps_without_gaps_or_repeats(service):
+    account = _history(service, [
+        "2026-01-01T09:00:00", "2026-01-01T09:00:00", "2026-01-01T09:00:00",
+        "2026-01-02T09:00:00", "2026-01-02T09:00:00", "2026-01-03T09:00:00", "2026-01-04T09:00:00",
+    ])
+    newest_first = [row[0] for row in service._query_transactions(account)]
+
+    seen, cursor = [], None
+    while True:
+        page = service.get_transaction_page(account, limit=2, before=cursor)
+        seen.extend(t["transaction_id"] for t in page["transactions"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == newest_first
+    assert len(set(seen)) == 7
+
+
+@pytest.mark.parametrize("cursor", ["garbage", "|", "2026-01-01T09:00:00|", "yesterday|abc"])
+def test_malformed_transaction_cursor_is_rejected(service, cursor):
+    account = service.create_account("1", "Savings")["account_id"]
+    with pytest.raises(ValueError, match="Invalid transaction cursor"):
+        service.get_transaction_page(account, before=cursor)
+
+
+@pytest.mark.parametrize("limit", [0, -1])
+def test_page_limit_below_one_is_rejected(service, limit):
+    account = _history(service, ["2026-01-01T09:00:00"])
+    with pytest.raises(ValueError, match="Page limit"):
+        service.get_transaction_page(account, limit=limit)
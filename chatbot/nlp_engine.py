@@ -0,0 +1,131 @@
+# chatbot/nlp_engine.py
+# Shared NLP resources for Penny: the spaCy model, custom matchers and the fitted TF-IDF intent index.
+# Loading these is expensive, so they are built once per process and borrowed by every PennyChatbot.
+
+import threading
+import spacy
+from spacy.matcher import Matcher, PhraseMatcher
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+# Training data for intent classification
+INTENT_EXAMPLES = {
+    "balance_inquiry": [
+        "what's my balance", "show my balance", "how much money do I have",
+        "check balance", "current balance", "account balance", "my funds",
+        "how much is in my account", "what do I have in savings", "total balance"
+    ],
+    "account_summary": [
+        "show my accounts", "account summary", "list my accounts",
+        "what accounts do I have", "account information", "my bank accounts",
+        "account details", "show account info", "my accounts"
+    ],
+    "transaction_history": [
+        "show transactions", "transaction history", "recent transactions",
+        "what did I spend", "payment history", "my transactions",
+        "show my spending", "transaction details", "recent payments"
+    ],
+    "purchase_planning": [
+        "can I buy", "should I purchase", "can I afford", "buying advice",
+        "purchase planning", "afford to buy", "help me buy", "planning to buy",
+        "want to purchase", "thinking of buying", "can I get", "is it affordable",
+        "will I be able to buy", "financial planning for purchase",
+        "what of a", "how about a", "what about", "can I get a", "i want a"
+    ],
+    "multiple_purchase_planning": [
+        "both", "and", "also", "as well", "together", "combined",
+        "how long for both", "total cost", "all together"
+    ],
+    "family_update": [
+        "i have a family", "we are", "family of", "support", "people",
+        "family members", "household size"
+    ],
+    "budget_inquiry": [
+        "my budget", "budget summary", "show budgets", "budget status",
+        "how much can I spend", "spending limits", "budget information",
+        "check my budget", "budget details"
+    ],
+    "savings_goals": [
+        "savings goals", "my goals", "saving progress", "goal status",
+        "how close to my goal", "savings plan", "goal summary",
+        "check my goals", "savings target"
+    ],
+    "loan_inquiry": [
+        "my loans", "loan information", "loan balance", "loan status",
+        "debt information", "what do I owe", "loan details",
+        "outstanding loans", "loan summary"
+    ],
+    "greeting": [
+        "hello", "hi", "hey", "good morning", "good afternoon",
+        "greetings", "hi there", "hello there"
+    ],
+    "help": [
+        "help", "what can you do", "how can you help", "assist me",
+        "what are your capabilities", "help me", "assistance"
+    ],
+    "complaint": [
+        "problem", "issue", "complaint", "error", "not working",
+        "having trouble", "something wrong", "malfunction"
+    ]
+}
+
+
+class PennyNLPEngine:
+    """Read-only bundle of the spaCy pipeline, matchers and fitted intent vectorizer"""
+
+    def __init__(self, model_name="en_core_web_sm"):
+        self.nlp = spacy.load(model_name)
+        self.matcher = Matcher(self.nlp.vocab)
+        self.phrase_matcher = PhraseMatcher(self.nlp.vocab)
+
+        self._setup_intent_classification()
+        self._setup_entity_extraction()
+
+    def _setup_intent_classification(self):
+        """Fit the TF-IDF index over every intent example"""
+        self.intent_examples = INTENT_EXAMPLES
+        self.all_examples = []
+        self.all_labels = []
+
+        for intent, examples in self.intent_examples.items():
+            self.all_examples.extend(examples)
+            self.all_labels.extend([intent] * len(examples))
+
+        self.vectorizer = TfidfVectorizer(ngram_range=(1, 2), stop_words='english')
+        self.tfidf_matrix = self.vectorizer.fit_transform(self.all_examples)
+
+    def _setup_entity_extraction(self):
+        """Set up entity extraction patterns"""
+
+        # Money patterns
+        money_patterns = [
+            [{"TEXT": {"REGEX": r"^\d+$"}}, {"LOWER": {"IN": ["kwacha", "zmw", "k"]}}],
+            [{"TEXT": {"REGEX": r"^\d+,\d+$"}}, {"LOWER": {"IN": ["kwacha", "zmw", "k"]}}],
+            [{"LOWER": {"IN": ["zmw", "k"]}}, {"TEXT": {"REGEX": r"^\d+$"}}],
+            [{"TEXT": {"REGEX": r"^\d+\.\d+$"}}],  # Decimal numbers
+            # Add patterns for numbers without currency symbols but in money context
+            [{"TEXT": {"REGEX": r"^\d+$"}, "OP": "?"}, {"LOWER": {"IN": ["costs", "cost", "price", "worth", "salary", "earn"]}}, {"TEXT": {"REGEX": r"^\d+$"}}],
+        ]
+
+        # Purchase intention patterns
+        purchase_patterns = [
+            [{"LEMMA": {"IN": ["buy", "purchase", "get", "afford"]}},
+             {"POS": {"IN": ["DET", "ADJ"]}, "OP": "*"},
+             {"POS": "NOUN", "OP": "+"}],
+        ]
+
+        # Add patterns to matcher
+        self.matcher.add("MONEY_AMOUNT", money_patterns)
+        self.matcher.add("PURCHASE_INTENT", purchase_patterns)
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_nlp_engine():
+    """Return the process-wide NLP engine, loading the model on first use"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = PennyNLPEngine()
+    return _engine
@@ -7,15 +7,13 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import json
 import re
-import spacy
-from spacy.matcher import Matcher, PhraseMatcher
-from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
 
 from account.account_service import AccountService
 from purchases.purchase_service import PurchaseService
 from loan.loan_service import LoanService
+from chatbot.nlp_engine import get_nlp_engine
 
 class PennyChatbot:
     def __init__(self, user_id, session=None):
@@ -46,113 +44,15 @@ class PennyChatbot:
             raise
 
         # === Enhanced NLP Setup ===
-        self.nlp = spacy.load("en_core_web_sm")
-        self.matcher = Matcher(self.nlp.vocab)
-        self.phrase_matcher = PhraseMatcher(self.nlp.vocab)
-        
-        # Initialize intent classification
-        self._setup_intent_classification()
-        self._setup_entity_extraction()
-
-    def _setup_intent_classification(self):
-        """Set up advanced intent classification using multiple approaches"""
-        
-        # 1. Training data for intent classification
-        self.intent_examples = {
-            "balance_inquiry": [
-                "what's my balance", "show my balance", "how much money do I have",
-                "check balance", "current balance", "account balance", "my funds",
-                "how much is in my account", "what do I have in savings", "total balance"
-            ],
-            "account_summary": [
-                "show my accounts", "account summary", "list my accounts", 
-                "what accounts do I have", "account information", "my bank accounts",
-                "account details", "show account info", "my accounts"
-            ],
-            "transaction_history": [
-                "show transactions", "transaction history", "recent transactions",
-                "what did I spend", "payment history", "my transactions", 
-                "show my spending", "transaction details", "recent payments"
-            ],
-           "purchase_planning": [
-                "can I buy", "should I purchase", "can I afford", "buying advice",
-                "purchase planning", "afford to buy", "help me buy", "planning to buy",
-                "want to purchase", "thinking of buying", "can I get", "is it affordable",
-                "will I be able to buy", "financial planning for purchase",
-                "what of a", "how about a", "what about", "can I get a", "i want a"
-            ],
-            "multiple_purchase_planning": [
-                "both", "and", "also", "as well", "together", "combined",
-                "how long for both", "total cost", "all together"
-            ],
-            "family_update": [
-                "i have a family", "we are", "family of", "support", "people",
-                "family members", "household size"
-            ],
-            "budget_inquiry": [
-                "my budget", "budget summary", "show budgets", "budget status",
-                "how much can I spend", "spending limits", "budget information",
-                "check my budget", "budget details"
-            ],
-            "savings_goals": [
-                "savings goals", "my goals", "saving progress", "goal status",
-                "how close to my goal", "savings plan", "goal summary",
-                "check my goals", "savings target"
-            ],
-            "loan_inquiry": [
-                "my loans", "loan information", "loan balance", "loan status",
-                "debt information", "what do I owe", "loan details",
-                "outstanding loans", "loan summary"
-            ],
-            "greeting": [
-                "hello", "hi", "hey", "good morning", "good afternoon",
-                "greetings", "hi there", "hello there"
-            ],
-            "help": [
-                "help", "what can you do", "how can you help", "assist me",
-                "what are your capabilities", "help me", "assistance"
-            ],
-            "complaint": [
-                "problem", "issue", "complaint", "error", "not working",
-                "having trouble", "something wrong", "malfunction"
-            ]
-        }
-        
-        # 2. Create training data for TF-IDF
-        self.all_examples = []
-        self.all_labels = []
-        
-        for intent, examples in self.intent_examples.items():
-            self.all_examples.extend(examples)
-            self.all_labels.extend([intent] * len(examples))
-        
-        # 3. Train TF-IDF vectorizer
-        self.vectorizer = TfidfVectorizer(ngram_range=(1, 2), stop_words='english')
-        self.tfidf_matrix = self.vectorizer.fit_transform(self.all_examples)
-
-    def _setup_entity_extraction(self):
-        """Set up entity extraction patterns"""
-        
-        # Money patterns
-        money_patterns = [
-            [{"TEXT": {"REGEX": r"^\d+$"}}, {"LOWER": {"IN": ["kwacha", "zmw", "k"]}}],
-            [{"TEXT": {"REGEX": r"^\d+,\d+$"}}, {"LOWER": {"IN": ["kwacha", "zmw", "k"]}}],
-            [{"LOWER": {"IN": ["zmw", "k"]}}, {"TEXT": {"REGEX": r"^\d+$"}}],
-            [{"TEXT": {"REGEX": r"^\d+\.\d+$"}}],  # Decimal numbers
-            # Add patterns for numbers without currency symbols but in money context
-            [{"TEXT": {"REGEX": r"^\d+$"}, "OP": "?"}, {"LOWER": {"IN": ["costs", "cost", "price", "worth", "salary", "earn"]}}, {"TEXT": {"REGEX": r"^\d+$"}}],
-        ]   
-
-        # Purchase intention patterns
-        purchase_patterns = [
-            [{"LEMMA": {"IN": ["buy", "purchase", "get", "afford"]}},
-             {"POS": {"IN": ["DET", "ADJ"]}, "OP": "*"},
-             {"POS": "NOUN", "OP": "+"}],
-        ]
-        
-        # Add patterns to matcher
-        self.matcher.add("MONEY_AMOUNT", money_patterns)
-        self.matcher.add("PURCHASE_INTENT", purchase_patterns)
+        # Borrow the shared model, matchers and fitted intent index instead of rebuilding them per message
+        self.nlp_engine = get_nlp_engine()
+        self.nlp = self.nlp_engine.nlp
+        self.matcher = self.nlp_engine.matcher
+        self.phrase_matcher = self.nlp_engine.phrase_matcher
+        self.intent_examples = self.nlp_engine.intent_examples
+        self.all_labels = self.nlp_engine.all_labels
+        self.vectorizer = self.nlp_engine.vectorizer
+        self.tfidf_matrix = self.nlp_engine.tfidf_matrix
 
     def classify_intent(self, user_input):
         """Advanced intent classification using TF-IDF similarity"""
@@ -959,12 +859,10 @@ class PennyChatbot:
                 return "You don't have any accounts yet. Please create an account first."
             
             response_parts = ["Here are your account balances:"]
-            total_balance = 0
-            
             for acc in accounts:
                 response_parts.append(f"• {acc['account_type']}: ZMW {acc['balance']:.2f}")
-                total_balance += acc['balance']
             
+            total_balance = self.account_service.get_user_totals(self.user_id)['total_balance']
             response_parts.append(f"<br><strong>Total balance: ZMW {total_balance:.2f}</strong>")
             return "<br>".join(response_parts)
         except Exception as e:
@@ -999,11 +897,11 @@ class PennyChatbot:
             has_transactions = False
             
             for acc in accounts:
-                txns = self.account_service.get_transaction_history(acc['account_id'])
+                txns = self.account_service.get_transaction_history(acc['account_id'], limit=3)
                 if txns:
                     has_transactions = True
                     response_parts.append(f"<br><strong>{acc['account_type']} account:</strong>")
-                    for i, txn in enumerate(txns[:3]):  # Show only last 3 transactions per account
+                    for txn in txns:  # Show only last 3 transactions per account
                         txn_type, amount, timestamp = txn
                         sign = "+" if txn_type in ["deposit", "transfer_in"] else "-"
                         response_parts.append(f"  {sign}ZMW {amount:.2f} ({txn_type}) on {timestamp[:10]}")
@@ -1023,10 +921,20 @@ class PennyChatbot:
             if not budget_summary:
                 return "You haven't set any budgets yet. Visit the 'Plans' section to create budgets."
             
-            return (f"<strong>Budget summary:</strong><br>"
-                   f"Total budget: ZMW {budget_summary['total_budget']:.2f}<br>"
-                   f"Spent: ZMW {budget_summary['total_spent']:.2f}<br>"
-                   f"Remaining: ZMW {budget_summary['remaining']:.2f}")
+            response_parts = [
+                "<strong>Budget summary:</strong>",
+                f"Total budget: ZMW {budget_summary['total_budget']:.2f}",
+                f"Spent: ZMW {budget_summary['total_spent']:.2f}",
+                f"Remaining: ZMW {budget_summary['remaining']:.2f}"
+            ]
+            for category in budget_summary['categories']:
+                if category['amount'] is None:
+                    response_parts.append(f"• {category['category']}: ZMW {category['spent']:.2f} spent (no budget)")
+                else:
+                    response_parts.append(
+                        f"• {category['category']}: ZMW {category['spent']:.2f} of ZMW {category['amount']:.2f}"
+                    )
+            return "<br>".join(response_parts)
             
         except Exception as e:
             print(f"Error in _get_budget_summary_response: {e}")
@@ -1035,27 +943,25 @@ class PennyChatbot:
     def _get_savings_goals_response(self):
         """Get savings goals"""
         try:
-            goals = self.purchase_service.get_savings_goals()
+            goals = self.purchase_service.get_savings_projections()
             if not goals:
                 return "You don't have any savings goals yet. Visit the 'Plans' section to create goals."
             
             response_parts = ["Your savings goals:"]
             for goal in goals:
-                goal_name = goal['goal_name']
-                target_amount = float(goal['target_amount'])
-                saved_amount = float(goal['saved_amount'])
-                
-                progress = (saved_amount / target_amount * 100) if target_amount > 0 else 0
-                remaining = target_amount - saved_amount
-                
-                if remaining <= 0:
+                if goal['remaining'] == 0:
                     status = "✅ Complete!"
                 else:
-                    status = f"ZMW {remaining:.2f} remaining"
+                    status = f"ZMW {goal['remaining']:.2f} remaining"
+                    if goal['expected_completion']:
+                        status += f", on pace to finish by {goal['expected_completion']}"
+                    if goal['on_track'] is not None:
+                        status += (" (on track)" if goal['on_track'] else
+                                   f" (save ZMW {goal['required_monthly']:.2f}/month to reach it by {goal['target_date'][:10]})")
                 
                 response_parts.append(
-                    f"• {goal_name}: ZMW {saved_amount:.2f}/ZMW {target_amount:.2f} "
-                    f"({progress:.1f}%) - {status}"
+                    f"• {goal['goal_name']}: ZMW {goal['saved_amount']:.2f}/ZMW {goal['target_amount']:.2f} "
+                    f"({goal['progress']:.1f}%) - {status}"
                 )
             
             return "<br>".join(response_parts)
@@ -1073,13 +979,15 @@ class PennyChatbot:
             if not loans:
                 return "You don't have any active loans. You can apply for one in the Loan section."
         
+            summaries = self.loan_service.get_loan_summaries(loans)
             response_parts = ["Here are your loans:"]
             for loan in loans:
                 response_parts.append(
-                    f"• {loan['loan_type']} of ZMW {loan['principal']:.2f}, "
-                    f"remaining: ZMW {loan['balance']:.2f}, "
-                    f"interest: {loan['interest_rate']}%, "
-                    f"term: {loan['term']} months"
+                    f"• {loan.loan_type} of ZMW {loan.principal:.2f} ({loan.status}), "
+                    f"remaining: ZMW {loan.balance_remaining:.2f}, "
+                    f"interest: {loan.interest_rate}%, "
+                    f"term: {loan.term_months} months, "
+                    f"monthly payment: ZMW {summaries[loan.id]['monthly_payment']:.2f}"
                 )
             return "<br>".join(response_parts)
         except Exception as e:
@@ -0,0 +1,16 @@
+"""
+Shared pytest fixtures.
+"""
+
+import pytest
+
+from database.db_helper import configure_pool
+
+
+@pytest.fixture
+def pool_db(tmp_path):
+    """Point the process-wide connection pool at a scratch database and yield its path"""
+    db_path = str(tmp_path / "test.db")
+    configure_pool(db_path)
+    yield db_path
+    configure_pool()
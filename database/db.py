@@ -1,7 +1,8 @@
 # database/db.py
-# this file sets up the SQLite database and its schema
+# this file sets up the SQLite database; the schema itself lives in database/migrations.py
 import sqlite3
 import os
+from database.migrations import migrate
 
 DB_PATH = os.path.join(os.path.dirname(__file__), 'penny.db')
 
@@ -12,57 +13,9 @@ def get_connection(db_path=None):
     return sqlite3.connect(db_path)
 
 def initialize_database():
+    """Create or upgrade the schema through the numbered migrations in database/migrations.py"""
     conn = get_connection()
-    cursor = conn.cursor()
-
-    # Users Table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            email TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            user_type TEXT CHECK(user_type IN ('customer', 'employee')) NOT NULL
-        )
-    """)
-
-    # Accounts Table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS accounts (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            account_type TEXT,
-            balance REAL DEFAULT 0.0,
-            FOREIGN KEY(user_id) REFERENCES users(id)
-        )
-    """)
-
-    # Loans Table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS loans (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            principal REAL,
-            interest_rate REAL,
-            term_months INTEGER,
-            loan_type TEXT,
-            status TEXT DEFAULT 'pending',
-            FOREIGN KEY(user_id) REFERENCES users(id)
-        )
-    """)
-
-    # Purchases Table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS purchases (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            item TEXT,
-            amount REAL,
-            date TEXT,
-            category TEXT,
-            FOREIGN KEY(user_id) REFERENCES users(id)
-        )
-    """)
-
-    conn.commit()
-    conn.close()
+    try:
+        migrate(conn)
+    finally:
+        conn.close()
@@ -1,21 +1,27 @@
 # database/db_helper.py
 # This module provides helper functions for database operations using SQLite.
-# Updated database/db_helper.py with better connection handling
+# Updated database/db_helper.py with better connection handling and a shared connection pool
 
 import sqlite3
 import os
 import threading
 import time
+from contextlib import contextmanager
 
-# Add connection timeout and better error handling
-def get_db_connection():
-    """Get a fresh database connection with timeout"""
-    db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database', 'penny.db')
-    
+DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database', 'penny.db')
+
+
+class PoolTimeoutError(sqlite3.OperationalError):
+    """Raised when no pooled connection becomes free before the checkout timeout"""
+
+
+def _open_connection(db_path):
+    """Open a new connection, retrying while the database is locked"""
     # Try multiple times with increasing timeout
     for attempt in range(3):
         try:
-            conn = sqlite3.connect(db_path, timeout=20.0)  # 20 second timeout
+            # Pooled connections may be checked out by different threads over their lifetime
+            conn = sqlite3.connect(db_path, timeout=20.0, check_same_thread=False)  # 20 second timeout
             conn.row_factory = sqlite3.Row
             # Enable WAL mode for better concurrency (optional)
             conn.execute('PRAGMA journal_mode=WAL')
@@ -28,6 +34,265 @@ def get_db_connection():
             else:
                 raise
 
+
+class _SavepointConnection:
+    """Connection handed to a nested checkout while the outer block has a transaction open.
+
+    ``commit()`` releases and ``rollback()`` rolls back to a savepoint taken at
+    checkout, so a helper finishing its own unit of work cannot commit or
+    discard the caller's pending writes. Everything else goes to the real
+    connection.
+    """
+
+    def __init__(self, conn, name):
+        object.__setattr__(self, '_conn', conn)
+        object.__setattr__(self, '_name', name)
+        object.__setattr__(self, '_open', True)
+        conn.execute(f'SAVEPOINT {name}')
+
+    def __getattr__(self, attr):
+        return getattr(self._conn, attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._conn, attr, value)
+
+    def commit(self):
+        if self._open:
+            self._conn.execute(f'RELEASE SAVEPOINT {self._name}')
+            object.__setattr__(self, '_open', False)
+
+    def rollback(self):
+        if self._open:
+            self._conn.execute(f'ROLLBACK TO SAVEPOINT {self._name}')
+            self._conn.execute(f'RELEASE SAVEPOINT {self._name}')
+            object.__setattr__(self, '_open', False)
+
+
+class ConnectionPool:
+    """Bounded, thread-aware pool of SQLite connections.
+
+    Connections are opened lazily up to ``max_size``. A thread that already
+    holds a connection gets the same one back from nested ``connection()``
+    blocks, so helper methods can share their caller's transaction. If that
+    transaction is already open, the nested block runs inside a savepoint:
+    its ``commit()`` only releases the savepoint, and the caller's own commit
+    or rollback still decides what reaches the database. Idle
+    connections are closed after ``idle_timeout`` seconds, and a connection
+    that sat idle longer than ``health_check_interval`` is pinged before reuse.
+    """
+
+    def __init__(self, db_path=DB_PATH, max_size=8, idle_timeout=300.0,
+                 checkout_timeout=20.0, health_check_interval=30.0):
+        self.db_path = db_path
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        self.health_check_interval = health_check_interval
+
+        self._idle = []  # (conn, last_used) pairs, most recently used last
+        self._size = 0   # open connections, idle + checked out
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self._closed = False
+
+    def _evict_idle(self, now):
+        """Close idle connections past their idle timeout (caller holds the lock)"""
+        keep = []
+        for conn, last_used in self._idle:
+            if now - last_used > self.idle_timeout:
+                self._size -= 1
+                close_db_connection(conn)
+            else:
+                keep.append((conn, last_used))
+        self._idle = keep
+
+    @staticmethod
+    def _is_healthy(conn):
+        try:
+            conn.execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def acquire(self):
+        """Check a connection out of the pool, opening one if there is room"""
+        deadline = time.monotonic() + self.checkout_timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise sqlite3.ProgrammingError("Connection pool is closed")
+                now = time.monotonic()
+                self._evict_idle(now)
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    conn, last_used = None, now
+                    break
+                remaining = deadline - now
+                if remaining <= 0:
+                    raise PoolTimeoutError(
+                        f"No database connection available after {self.checkout_timeout}s "
+                        f"(pool size {self.max_size})"
+                    )
+                self._cond.wait(remaining)
+
+        if conn is not None and (time.monotonic() - last_used <= self.health_check_interval
+                                 or self._is_healthy(conn)):
+            return conn
+
+        # Either a new slot or a stale connection that failed its health check
+        close_db_connection(conn)
+        try:
+            return _open_connection(self.db_path)
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, conn):
+        """Return a connection to the pool, rolling back anything left uncommitted"""
+        healthy = True
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            healthy = False
+
+        with self._cond:
+            if healthy and not self._closed:
+                self._idle.append((conn, time.monotonic()))
+            else:
+                self._size -= 1
+                close_db_connection(conn)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection for the duration of a ``with`` block"""
+        held = getattr(self._local, 'conn', None)
+        if held is not None:
+            # Re-entrant: nested blocks on the same thread share the outer connection
+            if not held.in_transaction:
+                yield held
+                return
+            depth = getattr(self._local, 'depth', 0) + 1
+            self._local.depth = depth
+            nested = _SavepointConnection(held, f'pool_nested_{depth}')
+            try:
+                yield nested
+            except BaseException:
+                nested.rollback()
+                raise
+            else:
+                # Work the helper left uncommitted stays part of the outer transaction
+                nested.commit()
+            finally:
+                self._local.depth = depth - 1
+            return
+
+        conn = self.acquire()
+        self._local.conn = conn
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            self.release(conn)
+
+    def close_all(self):
+        """Close every idle connection and refuse further checkouts"""
+        with self._cond:
+            self._closed = True
+            for conn, _ in self._idle:
+                self._size -= 1
+                close_db_connection(conn)
+            self._idle = []
+            self._cond.notify_all()
+
+    def stats(self):
+        """Return a snapshot of pool usage for diagnostics"""
+        with self._cond:
+            return {
+                'db_path': self.db_path,
+                'max_size': self.max_size,
+                'open': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Return the process-wide connection pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(DB_PATH)
+    return _pool
+
+def configure_pool(db_path=None, **options):
+    """Replace the process-wide pool, e.g. to point every service at another database file"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close_all()
+        _pool = ConnectionPool(db_path or DB_PATH, **options)
+    return _pool
+
+def pooled_connection():
+    """Context manager yielding a pooled connection: ``with pooled_connection() as conn:``"""
+    return get_pool().connection()
+
+@contextmanager
+def immediate_transaction():
+    """Run a block inside ``BEGIN IMMEDIATE`` on a pooled connection.
+
+    The write lock is taken up front so read-check-write sequences cannot
+    interleave with other writers. Commits on success and rolls back on any
+    exception. Nested use on the same thread joins the outer transaction.
+    """
+    with pooled_connection() as conn:
+        if conn.in_transaction:
+            yield conn
+            return
+
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        else:
+            conn.commit()
+
+# SQLite caps bound parameters per statement (999 before 3.32); id lists are chunked below this
+IN_CHUNK = 500
+
+def select_in_chunks(cursor, query, ids, params=()):
+    """Run ``query`` once per chunk of ``ids`` and collect every row.
+
+    ``query`` marks the ``IN`` list with an ``{ids}`` placeholder; ``params``
+    are bound ahead of each chunk for any ``?`` that precede it.
+    """
+    ids = list(ids)
+    params = list(params)
+    rows = []
+    for start in range(0, len(ids), IN_CHUNK):
+        chunk = ids[start:start + IN_CHUNK]
+        cursor.execute(query.format(ids=", ".join("?" * len(chunk))), params + chunk)
+        rows.extend(cursor.fetchall())
+    return rows
+
+# Add connection timeout and better error handling
+def get_db_connection():
+    """Get a fresh, unpooled database connection with timeout (caller must close it)"""
+    return _open_connection(get_pool().db_path)
+
 def close_db_connection(conn=None):
     """Close the provided database connection safely"""
     if conn:
@@ -39,24 +304,23 @@ def close_db_connection(conn=None):
 def execute_with_retry(query, params=None, fetch=False):
     """Execute a query with automatic retry on database lock"""
     for attempt in range(3):
-        conn = None
         try:
-            conn = get_db_connection()
-            cursor = conn.cursor()
-            
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
-            
-            if fetch:
-                result = cursor.fetchall() if fetch == 'all' else cursor.fetchone()
-            else:
-                result = cursor.lastrowid
-                
-            conn.commit()
-            return result
-            
+            with pooled_connection() as conn:
+                cursor = conn.cursor()
+
+                if params:
+                    cursor.execute(query, params)
+                else:
+                    cursor.execute(query)
+
+                if fetch:
+                    result = cursor.fetchall() if fetch == 'all' else cursor.fetchone()
+                else:
+                    result = cursor.lastrowid
+
+                conn.commit()
+                return result
+
         except sqlite3.OperationalError as e:
             if "database is locked" in str(e) and attempt < 2:
                 print(f"Database locked during query, retrying... (attempt {attempt + 1})")
@@ -64,38 +328,29 @@ def execute_with_retry(query, params=None, fetch=False):
                 continue
             else:
                 raise
-        finally:
-            if conn:
-                conn.close()
 
 def get_user_by_username(username):
     """Get user by username from the database"""
-    conn = None
-    try:
-        conn = get_db_connection()
+    with pooled_connection() as conn:
         cursor = conn.cursor()
         cursor.execute(
             'SELECT id, username, password_hash, full_name, email FROM users WHERE username = ?', 
             (username,)
         )
         return cursor.fetchone()
-    finally:
-        if conn:
-            conn.close()
 
 def create_user(username, password_hash, full_name, email):
     """Create a new user in the database with retry logic"""
     for attempt in range(3):
-        conn = None
         try:
-            conn = get_db_connection()
-            cursor = conn.cursor()
-            cursor.execute(
-                'INSERT INTO users (username, password_hash, full_name, email) VALUES (?, ?, ?, ?)',
-                (username, password_hash, full_name, email)
-            )
-            conn.commit()
-            return cursor.lastrowid
+            with pooled_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    'INSERT INTO users (username, password_hash, full_name, email) VALUES (?, ?, ?, ?)',
+                    (username, password_hash, full_name, email)
+                )
+                conn.commit()
+                return cursor.lastrowid
         except sqlite3.IntegrityError:
             # User already exists
             return None
@@ -106,21 +361,13 @@ def create_user(username, password_hash, full_name, email):
                 continue
             else:
                 raise
-        finally:
-            if conn:
-                conn.close()
 
 def user_exists(username, email):
     """Check if a user with the given username or email already exists"""
-    conn = None
-    try:
-        conn = get_db_connection()
+    with pooled_connection() as conn:
         cursor = conn.cursor()
         cursor.execute(
             'SELECT id FROM users WHERE username = ? OR email = ?',
             (username, email)
         )
         return cursor.fetchone() is not None
-    finally:
-        if conn:
-            conn.close()
\ No newline at end of file
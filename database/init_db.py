@@ -1,25 +1,19 @@
 # init_db.py
 
 import sqlite3
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.migrations import migrate
 
 def init_database(db_path="penny.db"):
     conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        username TEXT NOT NULL,
-        email TEXT UNIQUE NOT NULL,
-        password TEXT NOT NULL,
-        role TEXT NOT NULL,
-        is_verified INTEGER DEFAULT 0
-    )
-    ''')
-
-    conn.commit()
-    conn.close()
-    print("✅ Database initialized and 'users' table created.")
+    try:
+        applied = migrate(conn)
+    finally:
+        conn.close()
+    print(f"✅ Database initialized ({len(applied)} migration(s) applied).")
 
 if __name__ == "__main__":
     init_database()
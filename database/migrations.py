@@ -0,0 +1,542 @@
+# database/migrations.py
+# Numbered schema migrations for the central Penny database.
+# Each migration runs once, in its own transaction, and is recorded in the schema_version table.
+
+import re
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Optional, Tuple
+
+from database.db_helper import pooled_connection
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    statements: Tuple[str, ...] = ()
+    function: Optional[Callable] = None  # called with a cursor after the statements run
+
+
+def _column_names(cursor, table):
+    cursor.execute(f"PRAGMA table_info({table})")
+    return [col[1] for col in cursor.fetchall()]
+
+
+def _add_missing_columns(cursor, table, columns):
+    """Add each (name, definition) pair the table does not have yet"""
+    existing = _column_names(cursor, table)
+    for name, definition in columns:
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+
+
+def _rebuild_legacy_accounts(cursor):
+    """Rebuild an ``accounts(id INTEGER, ...)`` table from database/db.py into the service's shape.
+
+    The old db.py schema keyed accounts on an integer ``id`` and had no
+    ``active`` flag; AccountService and the ledger use ``account_id TEXT``.
+    Ids are kept as their text form, so existing references still resolve.
+    Does nothing once the table has ``account_id``.
+    """
+    columns = {col[1]: col[2] for col in cursor.execute("PRAGMA table_info(accounts)").fetchall()}
+    if "account_id" in columns or "id" not in columns:
+        return
+
+    cursor.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = 'accounts' AND sql IS NOT NULL"
+    )
+    index_sql = [row[0] for row in cursor.fetchall()]
+    # REAL kwacha before migration 6, INTEGER ngwee after it
+    balance_type = columns.get("balance") or "REAL"
+    cursor.execute(f"""
+        CREATE TABLE accounts__legacy (
+            account_id TEXT PRIMARY KEY,
+            user_id TEXT NOT NULL,
+            account_type TEXT NOT NULL,
+            balance {balance_type} NOT NULL DEFAULT 0,
+            active INTEGER NOT NULL DEFAULT 1
+        )
+    """)
+    cursor.execute("""
+        INSERT INTO accounts__legacy (account_id, user_id, account_type, balance, active)
+        SELECT CAST(id AS TEXT), COALESCE(CAST(user_id AS TEXT), ''), COALESCE(account_type, ''),
+               COALESCE(balance, 0), 1
+        FROM accounts
+    """)
+    cursor.execute("DROP TABLE accounts")
+    cursor.execute("ALTER TABLE accounts__legacy RENAME TO accounts")
+    cursor.execute("DELETE FROM sqlite_sequence WHERE name = 'accounts'")
+    for statement in index_sql:
+        cursor.execute(statement)
+
+
+def _patch_legacy_columns(cursor):
+    """Bring tables created by older code paths up to the columns the services use"""
+    _rebuild_legacy_accounts(cursor)
+
+    # Loans created by database/db.py only had the core columns
+    _add_missing_columns(cursor, "loans", [
+        ("reason", "TEXT DEFAULT ''"),
+        ("application_date", "TEXT DEFAULT ''"),
+        ("monthly_payment", "REAL DEFAULT 0"),
+        ("total_repayment", "REAL DEFAULT 0"),
+        ("balance_remaining", "REAL"),
+    ])
+    cursor.execute("""
+        UPDATE loans SET application_date = datetime('now')
+        WHERE application_date = '' OR application_date IS NULL
+    """)
+    cursor.execute("UPDATE loans SET balance_remaining = principal WHERE balance_remaining IS NULL")
+
+    # db_helper reads users.full_name
+    _add_missing_columns(cursor, "users", [("full_name", "TEXT")])
+
+
+# Money columns converted from REAL kwacha to INTEGER ngwee by migration 6
+MONEY_COLUMNS = {
+    "accounts": ("balance",),
+    "transactions": ("amount",),
+    "user_balance_summary": ("total_balance",),
+    "loans": ("principal", "monthly_payment", "total_repayment", "balance_remaining"),
+    "repayments": ("amount",),
+    "budget": ("amount",),
+    "overall_budget": ("total_amount",),
+    "savings_goals": ("target_amount", "saved_amount"),
+    "purchases": ("amount",),
+}
+
+
+_MONTH_NUMBER_SQL = """CASE
+    WHEN CAST(month AS INTEGER) BETWEEN 1 AND 12 THEN CAST(month AS INTEGER)
+    ELSE NULLIF((instr('|JAN|FEB|MAR|APR|MAY|JUN|JUL|AUG|SEP|OCT|NOV|DEC|', '|' || upper(substr(month, 1, 3)) || '|') + 3) / 4, 0)
+END"""
+
+
+def _rebuild_money_table(cursor, table, money_columns):
+    """Rebuild one table with INTEGER money columns, converting kwacha values to ngwee.
+
+    SQLite cannot change a column's type in place, so the table's own CREATE
+    statement is rewritten, the rows copied across, and its indexes recreated.
+    Working from sqlite_master keeps legacy column orders and defaults intact.
+    """
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+    create_sql = cursor.fetchone()[0]
+    cursor.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+        (table,)
+    )
+    index_sql = [row[0] for row in cursor.fetchall()]
+    # sqlite_sequence exists from migration 1 on, since several tables use AUTOINCREMENT
+    cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,))
+    sequence = cursor.fetchone()
+
+    staging = f"{table}__ngwee"
+    create_sql = re.sub(rf"^CREATE TABLE (IF NOT EXISTS )?\"?{table}\"?", f"CREATE TABLE {staging}", create_sql.strip())
+    for column in money_columns:
+        create_sql = re.sub(rf"\b{column}\s+REAL\b", f"{column} INTEGER", create_sql)
+    cursor.execute(create_sql)
+
+    columns = _column_names(cursor, table)
+    selected = [
+        f"CAST(ROUND({name} * 100) AS INTEGER)" if name in money_columns else name
+        for name in columns
+    ]
+    cursor.execute(f"INSERT INTO {staging} ({', '.join(columns)}) SELECT {', '.join(selected)} FROM {table}")
+    cursor.execute(f"DROP TABLE {table}")
+    cursor.execute(f"ALTER TABLE {staging} RENAME TO {table}")
+
+    for statement in index_sql:
+        cursor.execute(statement)
+    if sequence:
+        # Keep AUTOINCREMENT from reissuing ids of rows deleted before the rebuild
+        cursor.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?", (sequence[0], table))
+
+
+def _convert_money_to_ngwee(cursor):
+    for table, columns in MONEY_COLUMNS.items():
+        _rebuild_money_table(cursor, table, columns)
+
+
+def _open_ledger(cursor):
+    """Link transactions to journal entries and post existing balances as one opening entry"""
+    # Databases that applied migration 2 before it learned this stopped here on the legacy shape
+    _rebuild_legacy_accounts(cursor)
+    _add_missing_columns(cursor, "transactions", [("seq", "INTEGER")])
+
+    cursor.execute("SELECT COALESCE(SUM(balance), 0), COUNT(*) FROM accounts WHERE balance != 0")
+    total, funded = cursor.fetchone()
+    if not funded:
+        return
+
+    cursor.execute(
+        "INSERT INTO journal_entries (entry_type, created_at) VALUES ('opening', ?)",
+        (datetime.now().isoformat(),)
+    )
+    seq = cursor.lastrowid
+    cursor.execute(
+        "INSERT INTO postings (seq, account_id, amount) SELECT ?, account_id, balance FROM accounts WHERE balance != 0",
+        (seq,)
+    )
+    # '@cash' is the ledger's contra account (account.ledger.CASH_ACCOUNT)
+    cursor.execute("INSERT INTO postings (seq, account_id, amount) VALUES (?, '@cash', ?)", (seq, -total))
+
+
+MIGRATIONS = [
+    Migration(1, "baseline schema", (
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            role TEXT NOT NULL,
+            is_verified INTEGER DEFAULT 0
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS accounts (
+            account_id TEXT PRIMARY KEY,
+            user_id TEXT NOT NULL,
+            account_type TEXT NOT NULL,
+            balance REAL NOT NULL DEFAULT 0,
+            active INTEGER NOT NULL DEFAULT 1
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS transactions (
+            transaction_id TEXT PRIMARY KEY,
+            account_id TEXT NOT NULL,
+            amount REAL NOT NULL,
+            transaction_type TEXT NOT NULL,
+            timestamp TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS loans (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            principal REAL NOT NULL,
+            interest_rate REAL NOT NULL,
+            term_months INTEGER NOT NULL,
+            loan_type TEXT NOT NULL,
+            reason TEXT DEFAULT '',
+            status TEXT DEFAULT 'pending',
+            application_date TEXT DEFAULT CURRENT_TIMESTAMP,
+            monthly_payment REAL,
+            total_repayment REAL DEFAULT 0,
+            balance_remaining REAL,
+            FOREIGN KEY(user_id) REFERENCES users(id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS repayments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            loan_id INTEGER NOT NULL,
+            amount REAL NOT NULL,
+            payment_date TEXT DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(loan_id) REFERENCES loans(id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS budget (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT,
+            category TEXT,
+            amount REAL,
+            month TEXT,
+            year INTEGER,
+            created_at TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS overall_budget (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT,
+            total_amount REAL,
+            month TEXT,
+            year INTEGER,
+            created_at TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS savings_goals (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT,
+            goal_name TEXT,
+            target_amount REAL,
+            saved_amount REAL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS purchases (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            item TEXT,
+            amount REAL,
+            date TEXT,
+            category TEXT,
+            FOREIGN KEY(user_id) REFERENCES users(id)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_repayments_loan_id ON repayments(loan_id)",
+    )),
+    Migration(2, "patch legacy loan and user columns", function=_patch_legacy_columns),
+    Migration(3, "indexes for hot lookups", (
+        "CREATE INDEX IF NOT EXISTS idx_accounts_user_id ON accounts(user_id)",
+        "CREATE INDEX IF NOT EXISTS idx_transactions_account_time ON transactions(account_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_loans_user_id ON loans(user_id)",
+        "CREATE INDEX IF NOT EXISTS idx_budget_user_period ON budget(user_id, month, year, category)",
+        "CREATE INDEX IF NOT EXISTS idx_overall_budget_user_period ON overall_budget(user_id, month, year)",
+        "CREATE INDEX IF NOT EXISTS idx_savings_goals_user_goal ON savings_goals(user_id, goal_name)",
+    )),
+    Migration(4, "keyset index for transaction history", (
+        # Covers ORDER BY timestamp, transaction_id so history pages never sort
+        "CREATE INDEX IF NOT EXISTS idx_transactions_account_time_id ON transactions(account_id, timestamp, transaction_id)",
+        "DROP INDEX IF EXISTS idx_transactions_account_time",
+    )),
+    Migration(5, "per-user balance summary", (
+        """
+        CREATE TABLE IF NOT EXISTS user_balance_summary (
+            user_id TEXT PRIMARY KEY,
+            total_balance REAL NOT NULL DEFAULT 0,
+            account_count INTEGER NOT NULL DEFAULT 0,
+            updated_at TEXT
+        )
+        """,
+        """
+        INSERT OR REPLACE INTO user_balance_summary (user_id, total_balance, account_count, updated_at)
+        SELECT user_id, SUM(balance), COUNT(*), datetime('now') FROM accounts GROUP BY user_id
+        """,
+    )),
+    Migration(6, "store money as integer ngwee", function=_convert_money_to_ngwee),
+    Migration(7, "double-entry ledger", (
+        """
+        CREATE TABLE IF NOT EXISTS journal_entries (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            entry_type TEXT NOT NULL,
+            created_at TEXT NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS postings (
+            id INTEGER PRIMARY KEY,
+            seq INTEGER NOT NULL,
+            account_id TEXT NOT NULL,
+            amount INTEGER NOT NULL,
+            FOREIGN KEY(seq) REFERENCES journal_entries(seq)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_postings_account_seq ON postings(account_id, seq, amount)",
+        "CREATE INDEX IF NOT EXISTS idx_postings_seq ON postings(seq)",
+        """
+        CREATE TABLE IF NOT EXISTS ledger_checkpoints (
+            account_id TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            balance INTEGER NOT NULL,
+            created_at TEXT,
+            PRIMARY KEY(account_id, seq)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_ledger_checkpoints_seq ON ledger_checkpoints(seq)",
+    ), function=_open_ledger),
+    Migration(8, "daily balance snapshots", (
+        """
+        CREATE TABLE IF NOT EXISTS balance_snapshots (
+            account_id TEXT NOT NULL,
+            day TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            balance INTEGER NOT NULL,
+            PRIMARY KEY(account_id, day)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_balance_snapshots_seq ON balance_snapshots(seq)",
+        # Resolves a timestamp to the last journal entry at or before it
+        "CREATE INDEX IF NOT EXISTS idx_journal_entries_created_seq ON journal_entries(created_at, seq)",
+    )),
+    Migration(9, "loan approval dates and repayment totals index", (
+        "ALTER TABLE loans ADD COLUMN approval_date TEXT",
+        # Best available start date for loans approved before this column existed
+        "UPDATE loans SET approval_date = application_date WHERE status IN ('approved', 'completed')",
+        # Covers per-loan SUM(amount) so repayment totals never touch the table
+        "CREATE INDEX IF NOT EXISTS idx_repayments_loan_amount ON repayments(loan_id, amount)",
+        "DROP INDEX IF EXISTS idx_repayments_loan_id",
+    )),
+    Migration(10, "loan status queue index", (
+        # The pending queue is an index range read in id order
+        "CREATE INDEX IF NOT EXISTS idx_loans_status_id ON loans(status, id)",
+    )),
+    Migration(11, "incremental loan repayment totals", (
+        # total_repayment was never written before; repayments now keep it current
+        """UPDATE loans SET total_repayment =
+               (SELECT COALESCE(SUM(amount), 0) FROM repayments WHERE repayments.loan_id = loans.id)""",
+        "UPDATE loans SET status = 'completed' WHERE status = 'approved' AND balance_remaining <= 0",
+    )),
+    Migration(12, "purchase spend index", (
+        # Covers per-category spend for a user's date range, so budget summaries never touch the table
+        "CREATE INDEX IF NOT EXISTS idx_purchases_user_category_date ON purchases(user_id, category, date, amount)",
+    )),
+    Migration(13, "unique budget periods", (
+        # Keep the latest row of any duplicates the old SELECT-then-INSERT path let through
+        """DELETE FROM budget WHERE id NOT IN
+               (SELECT MAX(id) FROM budget GROUP BY user_id, month, year, category)""",
+        """DELETE FROM overall_budget WHERE id NOT IN
+               (SELECT MAX(id) FROM overall_budget GROUP BY user_id, month, year)""",
+        # Same columns as the lookup indexes they replace, so reads keep their plans
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_budget_user_period_category ON budget(user_id, month, year, category)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_overall_budget_user_period ON overall_budget(user_id, month, year)",
+        "DROP INDEX IF EXISTS idx_budget_user_period",
+        "DROP INDEX IF EXISTS idx_overall_budget_user_period",
+    )),
+    Migration(14, "numeric budget periods", (
+        "ALTER TABLE budget ADD COLUMN period INTEGER",
+        "ALTER TABLE overall_budget ADD COLUMN period INTEGER",
+        # yyyymm from the stored month name ("October") or number; unrecognised months stay NULL
+        f"UPDATE budget SET period = year * 100 + {_MONTH_NUMBER_SQL}",
+        f"UPDATE overall_budget SET period = year * 100 + {_MONTH_NUMBER_SQL}",
+        # "October", "october" and "10" were distinct rows under the month-text key; keep the latest of each period
+        """DELETE FROM budget WHERE period IS NOT NULL AND id NOT IN
+               (SELECT MAX(id) FROM budget WHERE period IS NOT NULL GROUP BY user_id, period, category)""",
+        """DELETE FROM overall_budget WHERE period IS NOT NULL AND id NOT IN
+               (SELECT MAX(id) FROM overall_budget WHERE period IS NOT NULL GROUP BY user_id, period)""",
+        # Uniqueness and every lookup move from the month text to the numeric period
+        "DROP INDEX IF EXISTS uq_budget_user_period_category",
+        "DROP INDEX IF EXISTS uq_overall_budget_user_period",
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_budget_user_period_category ON budget(user_id, period, category)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_overall_budget_user_period ON overall_budget(user_id, period)",
+    )),
+    Migration(15, "savings goal dates", (
+        # Existing goals keep a NULL created_at: their saving pace is unknown rather than guessed
+        "ALTER TABLE savings_goals ADD COLUMN created_at TEXT",
+        "ALTER TABLE savings_goals ADD COLUMN target_date TEXT",
+    )),
+    Migration(16, "savings contribution history", (
+        """
+        CREATE TABLE IF NOT EXISTS savings_contributions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            goal_id INTEGER NOT NULL REFERENCES savings_goals(id),
+            amount INTEGER NOT NULL,
+            created_at TEXT
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_savings_contributions_goal_time ON savings_contributions(goal_id, created_at, amount)",
+        # Money saved before the log existed becomes one undated opening contribution per goal
+        """
+        INSERT INTO savings_contributions (goal_id, amount, created_at)
+        SELECT id, saved_amount, NULL FROM savings_goals WHERE saved_amount != 0
+        """,
+    )),
+    Migration(17, "monthly category spend counters", (
+        """
+        CREATE TABLE IF NOT EXISTS monthly_category_spend (
+            user_id INTEGER NOT NULL,
+            period INTEGER NOT NULL,
+            category TEXT NOT NULL,
+            amount INTEGER NOT NULL DEFAULT 0,
+            purchase_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, period, category)
+        ) WITHOUT ROWID
+        """,
+        """
+        INSERT INTO monthly_category_spend (user_id, period, category, amount, purchase_count)
+        SELECT user_id, CAST(substr(date, 1, 4) || substr(date, 6, 2) AS INTEGER), COALESCE(category, 'Other'),
+               SUM(amount), COUNT(*)
+        FROM purchases
+        WHERE user_id IS NOT NULL AND date IS NOT NULL
+        GROUP BY 1, 2, 3
+        """,
+        # Spend is read from the counters now; purchases only need a per-user date index
+        "DROP INDEX IF EXISTS idx_purchases_user_category_date",
+        "CREATE INDEX IF NOT EXISTS idx_purchases_user_date ON purchases(user_id, date)",
+    )),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def _ensure_version_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TEXT NOT NULL,
+            duration_ms REAL
+        )
+    """)
+
+
+def current_version(conn):
+    """Return the highest applied migration version (0 for a fresh database)"""
+    row = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'"
+    ).fetchone()
+    if not row:
+        return 0
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+
+def _apply(cursor, migration):
+    for statement in migration.statements:
+        cursor.execute(statement)
+    if migration.function:
+        migration.function(cursor)
+
+
+def migrate(conn=None, dry_run=False):
+    """Apply every pending migration and return a timing report.
+
+    Real runs commit each migration (with its schema_version row) in its own
+    ``BEGIN IMMEDIATE`` transaction, so a failure leaves earlier migrations in
+    place and the failed one fully rolled back. ``dry_run`` applies all pending
+    migrations in one transaction, times them, and rolls everything back.
+    """
+    if conn is None:
+        with pooled_connection() as pooled:
+            return migrate(pooled, dry_run)
+
+    report = []
+    cursor = conn.cursor()
+
+    if dry_run:
+        conn.execute("BEGIN IMMEDIATE")
+        _ensure_version_table(conn)
+    else:
+        _ensure_version_table(conn)
+        conn.commit()
+    try:
+        for migration in MIGRATIONS:
+            if not dry_run:
+                conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Re-checked under the write lock in case another process got here first
+                cursor.execute("SELECT 1 FROM schema_version WHERE version = ?", (migration.version,))
+                if cursor.fetchone():
+                    if not dry_run:
+                        conn.rollback()
+                    continue
+
+                start = time.perf_counter()
+                _apply(cursor, migration)
+                duration_ms = (time.perf_counter() - start) * 1000
+                cursor.execute(
+                    "INSERT INTO schema_version (version, name, applied_at, duration_ms) VALUES (?, ?, ?, ?)",
+                    (migration.version, migration.name, datetime.now().isoformat(), duration_ms)
+                )
+                if not dry_run:
+                    conn.commit()
+            except Exception:
+                if not dry_run:
+                    conn.rollback()
+                raise
+
+            report.append({
+                'version': migration.version,
+                'name': migration.name,
+                'duration_ms': duration_ms,
+            })
+    finally:
+        if dry_run:
+            conn.rollback()
+
+    return report
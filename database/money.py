@@ -0,0 +1,30 @@
+# database/money.py
+# Money is stored as integer ngwee (1 ZMW = 100 ngwee) so balances and SUM() totals are exact.
+# Services accept and return kwacha amounts; convert at the database boundary with these helpers.
+
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+NGWEE_PER_KWACHA = 100
+
+
+def to_ngwee(amount):
+    """Convert a kwacha amount (int, float, str or Decimal) to whole ngwee, rounding half up.
+
+    Raises ValueError for anything that is not a finite number ("abc", "", inf, NaN).
+    """
+    if amount is None:
+        return None
+    try:
+        value = Decimal(str(amount).strip())
+    except InvalidOperation:
+        raise ValueError(f"Not a valid amount: {amount!r}") from None
+    if not value.is_finite():
+        raise ValueError(f"Not a valid amount: {amount!r}")
+    return int((value * NGWEE_PER_KWACHA).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def from_ngwee(ngwee):
+    """Convert stored ngwee back to a kwacha float for display and the services' public API"""
+    if ngwee is None:
+        return None
+    return ngwee / NGWEE_PER_KWACHA
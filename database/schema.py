@@ -0,0 +1,32 @@
+# database/schema.py
+# Process-level gate in front of the migration runner in database/migrations.py.
+# The schema is brought up to date once per process (per database file) instead of on every service call.
+
+import threading
+from database.db_helper import get_pool, pooled_connection
+from database.migrations import LATEST_VERSION, current_version, migrate
+
+_bootstrapped = set()
+_bootstrap_lock = threading.Lock()
+
+def ensure_schema():
+    """Apply pending migrations to the pool's database once per process.
+
+    After the first call for a database file this is a set lookup. The first
+    call compares the recorded schema version with LATEST_VERSION and only
+    runs migrations when the file is behind, so restarts against an
+    up-to-date database skip DDL entirely.
+    """
+    db_path = get_pool().db_path
+    if db_path in _bootstrapped:
+        return
+
+    with _bootstrap_lock:
+        if db_path in _bootstrapped:
+            return
+
+        with pooled_connection() as conn:
+            if current_version(conn) < LATEST_VERSION:
+                migrate(conn)
+
+        _bootstrapped.add(db_path)
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared SQLite connection pool in database/db_helper.py
+"""
+
+import sys
+import os
+import threading
+import pytest
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_helper import ConnectionPool, PoolTimeoutError, IN_CHUNK, select_in_chunks
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"), max_size=2, checkout_timeout=0.2)
+    yield pool
+    pool.close_all()
+
+
+def test_connections_are_reused(pool):
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+    assert first is second
+    assert pool.stats()["open"] == 1
+
+
+def test_nested_checkout_on_same_thread_shares_connection(pool):
+    with pool.connection() as outer:
+        with pool.connection() as inner:
+            assert inner is outer
+        assert pool.stats()["in_use"] == 1
+    assert pool.stats()["in_use"] == 0
+
+
+def test_pool_is_bounded(pool):
+    held = []
+    ready = threading.Event()
+    done = threading.Event()
+
+    def hold():
+        with pool.connection() as conn:
+            held.append(conn)
+            if len(held) == 2:
+                ready.set()
+            done.wait()
+
+    threads = [threading.Thread(target=hold) for _ in range(2)]
+    for t in threads:
+        t.start()
+    ready.wait()
+    try:
+        with pytest.raises(PoolTimeoutError):
+            pool.acquire()
+    finally:
+        done.set()
+        for t in threads:
+            t.join()
+    stats = pool.stats()
+    assert stats["open"] == 2 and stats["idle"] == 2
+
+
+def test_uncommitted_work_is_rolled_back_on_checkin(pool):
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE t (x INTEGER)")
+        conn.commit()
+        conn.execute("INSERT INTO t VALUES (1)")
+    with pool.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+
+
+def test_idle_connections_are_evicted(pool):
+    pool.idle_timeout = 0
+    with pool.connection():
+        pass
+    with pool.connection():
+        assert pool.stats()["open"] == 1
+
+
+def test_nested_commit_does_not_commit_the_outer_transaction(pool):
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE t (x INTEGER)")
+        conn.commit()
+
+    with pool.connection() as outer:
+        outer.execute("INSERT INTO t VALUES (1)")
+        with pool.connection() as inner:
+            inner.execute("INSERT INTO t VALUES (2)")
+            inner.commit()
+        assert outer.in_transaction
+        outer.rollback()
+    with pool.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+
+    with pool.connection() as outer:
+        outer.execute("INSERT INTO t VALUES (1)")
+        with pytest.raises(RuntimeError):
+            with pool.connection() as inner:
+                inner.execute("INSERT INTO t VALUES (2)")
+                raise RuntimeError("helper failed")
+        with pool.connection() as inner:
+            inner.execute("INSERT INTO t VALUES (3)")
+            inner.rollback()
+        outer.commit()
+    with pool.connection() as conn:
+        assert [r[0] for r in conn.execute("SELECT x FROM t")] == [1]
+
+
+def test_select_in_chunks_spans_the_parameter_limit(pool):
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, owner INTEGER)")
+        conn.executemany("INSERT INTO t VALUES (?, ?)", [(i, i % 2) for i in range(3 * IN_CHUNK)])
+        rows = select_in_chunks(
+            conn.cursor(), "SELECT id FROM t WHERE owner = ? AND id IN ({ids})", range(2 * IN_CHUNK + 1), [1]
+        )
+        assert sorted(row[0] for row in rows) == list(range(1, 2 * IN_CHUNK + 1, 2))
+        assert select_in_chunks(conn.cursor(), "SELECT id FROM t WHERE id IN ({ids})", []) == []
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Double-entry ledger behind AccountService: balanced postings, checkpoints and audits.
+"""
+
+import sys
+import os
+import sqlite3
+import pytest
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_helper import immediate_transaction
+from database.migrations import MIGRATIONS, migrate
+from account import ledger
+from account.account_service import AccountService
+from account.exceptions import UnbalancedEntryError
+
+
+@pytest.fixture
+def service(pool_db):
+    return AccountService()
+
+
+def test_operations_post_balanced_entries_matching_cached_balances(service, monkeypatch):
+    monkeypatch.setattr(ledger, "CHECKPOINT_INTERVAL", 4)
+    first = service.create_account("1", "Savings")["account_id"]
+    second = service.create_account("2", "Checking")["account_id"]
+
+    service.deposit("1", first, 100)
+    service.withdraw("1", first, 10.25)
+    service.transfer_funds("1", first, second, 30)
+    service.apply_batch([
+        {"type": "deposit", "user_id": "2", "account_id": second, "amount": 5},
+        {"type": "transfer", "user_id": "2", "from_id": second, "to_id": first, "amount": 1},
+    ])
+
+    assert ledger.derive_balance(first) == 6075
+    assert ledger.derive_balance(second) == 3400
+    assert ledger.derive_balance(ledger.CASH_ACCOUNT) == -(6075 + 3400)
+    # Balance as of the deposit, before the withdrawal and transfer
+    assert ledger.derive_balance(first, as_of_seq=1) == 10000
+
+    clean = {"unbalanced_entries": [], "mismatched_accounts": []}
+    assert service.verify_ledger() == clean
+    assert service.verify_ledger(full_replay=True) == clean
+
+
+def test_unbalanced_entry_is_rejected(service):
+    with pytest.raises(UnbalancedEntryError):
+        with immediate_transaction() as conn:
+            ledger.post_entry(conn.cursor(), "deposit", [("a", 100), (ledger.CASH_ACCOUNT, -99)])
+
+
+def test_balance_at_replays_from_daily_snapshots(service):
+    account = service.create_account("1", "Savings")["account_id"]
+    service.deposit("1", account, 100)
+    service.deposit("1", account, 50)
+    service.withdraw("1", account, 30)
+
+    # Backdate the first two entries to earlier days, then close those days out
+    with immediate_transaction() as conn:
+        conn.execute("UPDATE journal_entries SET created_at = '2025-01-10T09:00:00' WHERE seq = 1")
+        conn.execute("UPDATE journal_entries SET created_at = '2025-01-11T18:30:00' WHERE seq = 2")
+        assert ledger.take_daily_snapshots(conn.cursor()) == 2
+
+    assert service.balance_at(account, "2025-01-09") == 0
+    assert service.balance_at(account, "2025-01-10") == 100
+    assert service.balance_at(account, "2025-01-11T12:00:00") == 100
+    assert service.balance_at(account, "2025-01-11") == 150
+    assert service.balance_at(account, "2999-01-01") == 120
+
+
+def test_balance_at_refuses_times_before_a_migrated_opening_balance(pool_db):
+    conn = sqlite3.connect(pool_db)
+    for migration in MIGRATIONS:
+        if migration.version < 6:
+            for statement in migration.statements:
+                conn.execute(statement)
+    conn.execute("INSERT INTO accounts VALUES ('a1', '1', 'Savings', 500, 1)")
+    conn.execute("INSERT INTO transactions VALUES ('t1', 'a1', 500, 'deposit', '2025-01-01')")
+    conn.commit()
+    conn.close()
+    migrate()
+
+    service = AccountService()
+    with pytest.raises(ValueError, match="No ledger history before"):
+        service.balance_at("a1", "2025-06-01")
+    assert service.balance_at("a1", "2999-01-01") == 500
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Migrating databases created by the old database/db.py schema.
+"""
+
+import sys
+import os
+import sqlite3
+import pytest
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import migrations
+from database.db_helper import pooled_connection
+from account.account_service import AccountService
+from account.ledger import verify_ledger
+
+# What database/db.py created before the schema moved into migrations
+LEGACY_SCHEMA = (
+    """
+    CREATE TABLE users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        email TEXT UNIQUE NOT NULL,
+        password TEXT NOT NULL,
+        user_type TEXT CHECK(user_type IN ('customer', 'employee')) NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE accounts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        account_type TEXT,
+        balance REAL DEFAULT 0.0,
+        FOREIGN KEY(user_id) REFERENCES users(id)
+    )
+    """,
+    """
+    CREATE TABLE loans (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        principal REAL,
+        interest_rate REAL,
+        term_months INTEGER,
+        loan_type TEXT,
+        status TEXT DEFAULT 'pending',
+        FOREIGN KEY(user_id) REFERENCES users(id)
+    )
+    """,
+    """
+    CREATE TABLE purchases (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        item TEXT,
+        amount REAL,
+        date TEXT,
+        category TEXT,
+        FOREIGN KEY(user_id) REFERENCES users(id)
+    )
+    """,
+)
+
+
+@pytest.fixture
+def legacy_db(pool_db):
+    # The pool opens lazily, so the legacy schema can be built in its file first
+    conn = sqlite3.connect(pool_db)
+    for statement in LEGACY_SCHEMA:
+        conn.execute(statement)
+    conn.execute("INSERT INTO users (name, email, password, user_type) VALUES ('Ann', 'a@x', 'pw', 'customer')")
+    conn.execute("INSERT INTO accounts (user_id, account_type, balance) VALUES (1, 'Savings', 12.5)")
+    conn.execute("INSERT INTO accounts (user_id, account_type, balance) VALUES (1, 'Checking', 0)")
+    conn.execute("INSERT INTO loans (user_id, principal, interest_rate, term_months, loan_type) "
+                 "VALUES (1, 500, 10, 12, 'Full')")
+    conn.commit()
+    conn.close()
+    return pool_db
+
+
+def _assert_accounts_usable():
+    with pooled_connection() as conn:
+        columns = [col[1] for col in conn.execute("PRAGMA table_info(accounts)")]
+        assert columns == ["account_id", "user_id", "account_type", "balance", "active"]
+        assert conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'idx_accounts_user_id'").fetchone()
+
+    service = AccountService()
+    assert service.check_funds("1") == 12.5
+    assert service.get_user_totals("1") == {"total_balance": 12.5, "account_count": 2}
+    assert service.deposit("1", "2", 3) == 3
+    assert service.transfer_funds("1", "1", "2", 2.5) == (10, 5.5)
+    assert verify_ledger(full_replay=True) == {"unbalanced_entries": [], "mismatched_accounts": []}
+
+
+def test_baseline_db_py_database_migrates(legacy_db):
+    migrations.migrate()
+    _assert_accounts_usable()
+
+
+def test_database_stopped_before_the_ledger_finishes_migrating(legacy_db, monkeypatch):
+    # Reproduce a database that applied migrations 1-6 before legacy accounts were rebuilt
+    with monkeypatch.context() as patch:
+        patch.setattr(migrations, "_rebuild_legacy_accounts", lambda cursor: None)
+        patch.setattr(migrations, "MIGRATIONS", [m for m in migrations.MIGRATIONS if m.version <= 6])
+        migrations.migrate()
+    with pooled_connection() as conn:
+        assert "account_id" not in [col[1] for col in conn.execute("PRAGMA table_info(accounts)")]
+
+    migrations.migrate()
+    _assert_accounts_usable()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Integer ngwee money: conversion helpers and the REAL -> INTEGER migration.
+"""
+
+import sys
+import os
+import sqlite3
+import pytest
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_helper import pooled_connection
+from database.migrations import MIGRATIONS, migrate
+from database.money import to_ngwee, from_ngwee
+from account.account_service import AccountService
+
+
+def test_to_ngwee_rounds_half_up():
+    assert to_ngwee(0.1) == 10
+    assert to_ngwee(1.005) == 101
+    assert to_ngwee("19.99") == 1999
+    assert to_ngwee(7) == 700
+    assert from_ngwee(1999) == 19.99
+    assert to_ngwee(None) is None
+
+
+@pytest.mark.parametrize("amount", ["abc", "", " ", float("inf"), float("nan"), "Infinity", "1,000"])
+def test_to_ngwee_rejects_non_numbers_with_value_error(amount):
+    with pytest.raises(ValueError):
+        to_ngwee(amount)
+
+
+def test_migration_converts_real_kwacha_to_integer_ngwee(pool_db):
+    # The pool opens lazily, so the legacy schema can be built in its file first
+    conn = sqlite3.connect(pool_db)
+    for migration in MIGRATIONS:
+        if migration.version < 6:
+            for statement in migration.statements:
+                conn.execute(statement)
+    conn.execute("INSERT INTO accounts VALUES ('a1', '1', 'Savings', 1234.56, 1)")
+    conn.execute("INSERT INTO accounts VALUES ('a2', '1', 'Checking', 0.1, 1)")
+    conn.execute("INSERT INTO transactions VALUES ('t1', 'a1', 0.3, 'deposit', '2025-01-01')")
+    conn.execute("INSERT INTO user_balance_summary VALUES ('1', 1234.66, 2, NULL)")
+    conn.commit()
+    conn.close()
+
+    migrate()
+    with pooled_connection() as conn:
+        balances = conn.execute("SELECT balance, typeof(balance) FROM accounts ORDER BY account_id").fetchall()
+        assert [tuple(row) for row in balances] == [(123456, "integer"), (10, "integer")]
+        assert conn.execute("SELECT amount FROM transactions").fetchone()[0] == 30
+        assert conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'idx_transactions_account_time_id'"
+        ).fetchone()
+
+    service = AccountService()
+    assert service.get_user_totals("1")["total_balance"] == 1234.66
+    assert service.reconcile_balance_summary() == []
+    assert service.deposit("1", "a2", 0.2) == 0.3
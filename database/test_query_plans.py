@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Run every service method against a scratch database, capture the SQL it issues,
+and fail if EXPLAIN QUERY PLAN shows a full table scan for any of it.
+"""
+
+import sys
+import os
+import pytest
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_helper import pooled_connection
+from database.schema import ensure_schema
+from account.account_service import AccountService
+from account.ledger import derive_balance
+from loan.loan_service import LoanService
+from loan.models import DecisionRules
+from purchases.budget_planner import BudgetPlanner
+from purchases.purchase_manager import record_purchases
+from purchases.savings import SavingsGoals
+
+PLANNED_VERBS = ("SELECT", "UPDATE", "DELETE", "WITH")
+
+
+@pytest.fixture
+def traced_statements(pool_db):
+    """Pin one pooled connection to this thread and record what the services execute on it"""
+    ensure_schema()
+    statements = []
+    with pooled_connection() as conn:
+        conn.set_trace_callback(statements.append)
+        yield statements
+        conn.set_trace_callback(None)
+
+
+def exercise_accounts():
+    service = AccountService()
+    first = service.create_account("1", "Savings")["account_id"]
+    second = service.create_account("1", "Checking")["account_id"]
+    service.deposit("1", first, 100)
+    service.withdraw("1", first, 10)
+    service.transfer_funds("1", first, second, 20)
+    service.apply_batch([
+        {"type": "deposit", "user_id": "1", "account_id": first, "amount": 5},
+        {"type": "withdraw", "user_id": "1", "account_id": second, "amount": 1},
+        {"type": "transfer", "user_id": "1", "from_id": first, "to_id": second, "amount": 2},
+    ])
+    service.check_funds(first)
+    service.update_account(second, account_type="Savings")
+    service.get_transaction_history(first)
+    page = service.get_transaction_page(first, limit=1)
+    service.get_transaction_page(first, limit=1, before=page["next_cursor"])
+    service.get_recent_transactions("1", limit=5)
+    list(service.export_statement(first, "csv"))
+    list(service.export_statement(first, "ndjson", start="2025-01-01", end="2999-01-01"))
+    service.get_accounts_by_user("1")
+    service.get_user_totals("1")
+    derive_balance(first)
+    derive_balance(first, as_of_seq=2)
+    service.balance_at(first, "2025-01-31")
+    service.balance_at(first, "2999-01-01T00:00:00")
+
+
+def exercise_loans():
+    service = LoanService()
+    loan = service.apply_for_loan("1", 1000, 12, 12, "Full")
+    other = service.apply_for_loan("1", 500, 10, 6, "Full")
+    service.approve_loan(loan.id)
+    service.reject_loan(other.id)
+    service.make_repayment(loan.id, 100)
+    service.find_loan(loan.id)
+    service.get_loans_by_user("1")
+    queued = [service.apply_for_loan("1", 200, 10, 6, "Full").id for _ in range(3)]
+    service.decide_many({queued[0]: "approve", queued[1]: "reject"})
+    service.auto_decide_pending(DecisionRules(max_principal=5000, max_active_loans=3))
+
+
+def exercise_budgets():
+    planner = BudgetPlanner()
+    planner.set_overall_budget("1", 5000, "October", 2025)
+    planner.set_budget("1", "food", 1000, "October", 2025)
+    planner.set_budget("1", "food", 1200, "October", 2025)
+    planner.set_budgets_bulk("1", {"food": 1300, "rent": 4000}, "October", 2025)
+    planner.get_budgets("1", "October", 2025)
+    record_purchases("1", [{"item": "Bread", "amount": 25, "date": "2025-10-03", "category": "food"}])
+    planner.get_budget_summary("1", "October", 2025)
+    planner.trend("1", "2024-11", "2025-10")
+    planner.delete_budget_category("1", "food", "October", 2025)
+
+
+def exercise_savings():
+    savings = SavingsGoals("1")
+    goal_id = savings.add_goal("Car", 10000)
+    savings.update_saved_amount("Car", 250)
+    savings.record_contributions([(goal_id, 100), (goal_id, 50, "2025-10-01T08:00:00")])
+    savings.get_goal(goal_id)
+    savings.get_contributions(goal_id, limit=10)
+    savings.get_goals()
+    savings.get_projections()
+    savings.delete_goal("Car")
+
+
+def full_scans(statement):
+    with pooled_connection() as conn:
+        plan = conn.execute("EXPLAIN QUERY PLAN " + statement).fetchall()
+    # Reading back a compound subquery's own rows is not a table scan; its branches are checked on their own
+    return [row[3] for row in plan
+            if row[3].startswith("SCAN") and row[3] != "SCAN CONSTANT ROW" and not row[3].startswith("SCAN (subquery")]
+
+
+@pytest.mark.parametrize("exercise", [exercise_accounts, exercise_loans, exercise_budgets, exercise_savings])
+def test_hot_queries_use_indexes(traced_statements, exercise):
+    exercise()
+
+    planned = {s.strip() for s in traced_statements if s.strip().upper().startswith(PLANNED_VERBS)}
+    assert planned, "exercise issued no queries"
+
+    offenders = {s: full_scans(s) for s in planned}
+    offenders = {s: scans for s, scans in offenders.items() if scans}
+    assert not offenders, "Full table scans found:\n" + "\n".join(
+        f"{scans} <- {' '.join(s.split())}" for s, scans in offenders.items()
+    )
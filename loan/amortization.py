@@ -0,0 +1,101 @@
+# loan/amortization.py
+# Vectorised annuity maths shared by the loan service, loan_manager, the web calculator and Penny.
+# Every method accepts scalars or equal-length sequences, so a whole portfolio is one NumPy pass.
+
+import numpy as np
+
+# Longest term priced (50 years); schedules allocate one column per month, so this bounds every request
+MAX_TERM_MONTHS = 600
+
+
+def _finite(values):
+    """Reject figures that overflowed (extreme rates or terms) rather than return NaN or inf"""
+    if not np.all(np.isfinite(values)):
+        raise ValueError("Loan figures are out of range for these inputs.")
+    return values
+
+
+class AmortizationEngine:
+    """Fixed-rate annuity payments and month-by-month schedules.
+
+    Rates are annual percentages (12 means 12% a year, compounded monthly),
+    terms are in months and amounts are kwacha.
+    """
+
+    @staticmethod
+    def _inputs(principal, annual_rate, term_months):
+        principal = np.atleast_1d(np.asarray(principal, dtype=float))
+        rate = np.atleast_1d(np.asarray(annual_rate, dtype=float)) / 100 / 12
+        term = np.atleast_1d(np.asarray(term_months, dtype=int))
+        if np.any(term <= 0):
+            raise ValueError("Loan term must be at least one month.")
+        if np.any(term > MAX_TERM_MONTHS):
+            raise ValueError(f"Loan term must be at most {MAX_TERM_MONTHS} months.")
+        return np.broadcast_arrays(principal, rate, term)
+
+    def monthly_payments(self, principal, annual_rate, term_months):
+        """Level monthly payment for each loan, as an array"""
+        principal, rate, term = self._inputs(principal, annual_rate, term_months)
+        # Overflow is caught by _finite below
+        with np.errstate(over="ignore", divide="ignore", invalid="ignore"):
+            growth = (1 + rate) ** term
+            payment = np.where(rate == 0, principal / term, principal * rate * growth / (growth - 1))
+        return _finite(payment)
+
+    def monthly_payment(self, principal, annual_rate, term_months):
+        """Level monthly payment for a single loan"""
+        return float(self.monthly_payments(principal, annual_rate, term_months)[0])
+
+    def schedules(self, principal, annual_rate, term_months):
+        """Full schedules for many loans at once.
+
+        Returns a dict of (loans x months) arrays: ``payment``, ``interest``,
+        ``principal`` and ``balance`` (balance after each payment). Rows are
+        padded with zeros past each loan's own term. Balances use the closed
+        form B_k = P(1+r)^k - A((1+r)^k - 1)/r, so no month depends on a loop.
+        """
+        principal, rate, term = self._inputs(principal, annual_rate, term_months)
+        payment = self.monthly_payments(principal, annual_rate, term_months)
+
+        months = np.arange(1, term.max() + 1)
+        r = rate[:, None]
+        # Padding months of a short high-rate loan can overflow; they are masked out below
+        with np.errstate(over="ignore", divide="ignore", invalid="ignore"):
+            growth = (1 + r) ** months
+            paid_down = np.where(r == 0, payment[:, None] * months, payment[:, None] * (growth - 1) / r)
+            balance = np.clip(principal[:, None] * growth - paid_down, 0, None)
+            opening = np.hstack([principal[:, None], balance[:, :-1]])
+            interest = opening * r
+        active = months <= term[:, None]
+        # The last payment clears whatever rounding left on the balance
+        principal_part = np.where(months == term[:, None], opening, payment[:, None] - interest)
+
+        return {
+            "payment": _finite(np.where(active, interest + principal_part, 0.0)),
+            "interest": _finite(np.where(active, interest, 0.0)),
+            "principal": _finite(np.where(active, principal_part, 0.0)),
+            "balance": _finite(np.where(active, np.where(months == term[:, None], 0.0, balance), 0.0)),
+        }
+
+    def schedule(self, principal, annual_rate, term_months):
+        """Schedule for a single loan as a list of per-month dicts, rounded to ngwee"""
+        table = self.schedules(principal, annual_rate, term_months)
+        return [{
+            "month": month + 1,
+            "payment": round(float(table["payment"][0, month]), 2),
+            "interest": round(float(table["interest"][0, month]), 2),
+            "principal": round(float(table["principal"][0, month]), 2),
+            "balance": round(float(table["balance"][0, month]), 2),
+        } for month in range(int(term_months))]
+
+    def summaries(self, principal, annual_rate, term_months):
+        """Monthly payment, total payment and total interest for each loan, as arrays"""
+        principal, rate, term = self._inputs(principal, annual_rate, term_months)
+        payment = self.monthly_payments(principal, annual_rate, term_months)
+        total = payment * term
+        return {"monthly_payment": payment, "total_payment": total, "total_interest": total - principal}
+
+    def summary(self, principal, annual_rate, term_months):
+        """Calculator figures for a single loan, rounded to ngwee"""
+        figures = self.summaries(principal, annual_rate, term_months)
+        return {key: round(float(values[0]), 2) for key, values in figures.items()}
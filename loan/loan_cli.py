@@ -1,7 +1,8 @@
 # loan/loan_cli.py
 
 from .loan_service import LoanService
-from .models import LoanType
+from .models import LoanType, LoanStatus, DecisionRules
+from .portfolio import LoanPortfolioReport
 from datetime import datetime
 
 loan_service = LoanService()
@@ -12,7 +13,9 @@ def display_menu():
     print("2. Approve a loan")
     print("3. Make a repayment")
     print("4. View My loans")
-    print("5. Exit")
+    print("5. Portfolio report")
+    print("6. Process pending queue")
+    print("7. Exit")
 
 def choose_loan_type():
     print("\nChoose Loan Type:")
@@ -25,6 +28,11 @@ def choose_loan_type():
             return list(LoanType)[int(choice)-1].value
         print(f"Invalid choice. Please enter 1-{len(LoanType)}")
 
+def ask_limit(prompt, cast):
+    """Read an optional numeric limit; blank means no limit"""
+    value = input(prompt).strip()
+    return cast(value) if value else None
+
 def launch_loan_cli(user_id: str):
     while True:
         display_menu()
@@ -63,11 +71,13 @@ def launch_loan_cli(user_id: str):
             loan_id = int(input("Enter Loan ID: "))  # Convert to int
             amount = float(input("Enter Repayment Amount: "))
             
-            success = loan_service.make_repayment(loan_id, amount)
-            if success:
-                print("✅ Repayment recorded.")
+            loan = loan_service.make_repayment(loan_id, amount)
+            if loan:
+                print(f"✅ Repayment recorded. Balance remaining: {loan.balance_remaining:.2f}")
+                if loan.status == LoanStatus.COMPLETED.value:
+                    print("🎉 Loan fully repaid.")
             else:
-                print("❌ Failed to make repayment. Loan may not exist or is not approved.")
+                print("❌ Repayment refused. The loan must exist, be approved, and owe at least this amount.")
 
         elif option == "4":
             print("\n--- View User's Loans ---")
@@ -88,6 +98,41 @@ def launch_loan_cli(user_id: str):
                     print(f"Balance Remaining: {loan.balance_remaining:.2f}")
 
         elif option == "5":
+            print("\n--- Loan Portfolio Report ---")
+            report = LoanPortfolioReport().generate()
+            print(f"As of: {report['as_of']}")
+            for status, figures in report["by_status"].items():
+                print(f"{status.title()}: {figures['count']} loans, principal {figures['principal']:.2f}")
+            print(f"Outstanding principal: {report['outstanding_principal']:.2f}")
+            print(f"Expected to date: {report['expected_to_date']:.2f}")
+            print(f"Repaid to date: {report['actual_to_date']:.2f}")
+            print(f"Arrears: {report['arrears']:.2f}")
+            print("Days past due:")
+            for bucket, figures in report["days_past_due"].items():
+                print(f"  {bucket}: {figures['count']} loans, outstanding {figures['outstanding']:.2f}")
+            print("Projected inflow:")
+            for month in report["projected_inflow"]:
+                print(f"  {month['month']}: {month['amount']:.2f}")
+
+        elif option == "6":
+            print("\n--- Process Pending Queue ---")
+            print("Leave a limit blank to skip that rule.")
+            rules = DecisionRules(
+                max_principal=ask_limit("Max principal: ", float),
+                max_term_months=ask_limit("Max term (months): ", int),
+                max_active_loans=ask_limit("Max active loans per user: ", int),
+                max_exposure=ask_limit("Max outstanding per user: ", float)
+            )
+            results = loan_service.auto_decide_pending(rules)
+            if not results:
+                print("No pending loans.")
+            for result in results:
+                reason = f" ({result['reason']})" if result['reason'] else ""
+                print(f"Loan {result['loan_id']}: {result['status']}{reason}")
+            approved = sum(1 for r in results if r['status'] == 'approved')
+            print(f"\n✅ {approved} approved, {len(results) - approved} rejected.")
+
+        elif option == "7":
             print("Exiting Penny Loan System.")
             break
 
@@ -1,171 +1,192 @@
 # loan/loan_manager.py
 # this module manages loan applications and retrievals
-from database.db import get_connection
+from database.db_helper import pooled_connection, immediate_transaction, select_in_chunks
+from database.money import to_ngwee, from_ngwee
+from .quotes import quote
 from datetime import datetime
 
-def ensure_loans_table_exists():
-    """Ensure the loans and repayments tables exist with all required fields"""
-    conn = get_connection('penny.db')  # Specify the database name
-    cursor = conn.cursor()
-    
-    # Loans table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS loans (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            principal REAL NOT NULL,
-            interest_rate REAL NOT NULL,
-            term_months INTEGER NOT NULL,
-            loan_type TEXT NOT NULL,
-            reason TEXT DEFAULT '',
-            status TEXT DEFAULT 'pending',
-            application_date TEXT DEFAULT CURRENT_TIMESTAMP,
-            monthly_payment REAL,
-            total_repayment REAL DEFAULT 0,
-            balance_remaining REAL,
-            FOREIGN KEY(user_id) REFERENCES users(id)
-        )
-    """)
-    
-    # Repayments table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS repayments (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            loan_id INTEGER NOT NULL,
-            amount REAL NOT NULL,
-            payment_date TEXT DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY(loan_id) REFERENCES loans(id)
-        )
-    """)
-    
-    conn.commit()
-    conn.close()
-
 def apply_loan(user_id, principal, interest_rate, term_months, loan_type, reason=""):
     """Apply for a loan with all necessary fields"""
-    ensure_loans_table_exists()
     
-    # Calculate monthly payment
-    monthly_rate = interest_rate / 100 / 12
-    monthly_payment = (principal * monthly_rate) / (1 - (1 + monthly_rate) ** -term_months)
+    monthly_payment = quote(principal, interest_rate, term_months)["monthly_payment"]
     
-    conn = get_connection('penny.db')
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO loans 
-        (user_id, principal, interest_rate, term_months, loan_type, reason, 
-         status, monthly_payment, balance_remaining)
-        VALUES (?, ?, ?, ?, ?, ?, 'pending', ?, ?)
-    """, (user_id, principal, interest_rate, term_months, loan_type, reason,
-          monthly_payment, principal))
-    
-    loan_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
-    return loan_id
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO loans 
+            (user_id, principal, interest_rate, term_months, loan_type, reason, 
+             status, monthly_payment, balance_remaining)
+            VALUES (?, ?, ?, ?, ?, ?, 'pending', ?, ?)
+        """, (user_id, to_ngwee(principal), interest_rate, term_months, loan_type, reason,
+              to_ngwee(monthly_payment), to_ngwee(principal)))
+        conn.commit()
+        return cursor.lastrowid
 
-def get_loans_by_user(user_id):
-    """Get all loans for a user with repayment calculations"""
-    ensure_loans_table_exists()
-    
-    conn = get_connection('penny.db')
-    cursor = conn.cursor()
-    
 def approve_loan_db(loan_id: int) -> bool:
     """Set loan status to 'approved'"""
-    ensure_loans_table_exists()
-    conn = get_connection('penny.db')
-    cursor = conn.cursor()
-    cursor.execute("UPDATE loans SET status = 'approved' WHERE id = ?", (loan_id,))
-    conn.commit()
-    updated = cursor.rowcount > 0
-    conn.close()
-    return updated
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "UPDATE loans SET status = 'approved', approval_date = ? WHERE id = ?",
+            (datetime.now().strftime('%Y-%m-%d %H:%M:%S'), loan_id)
+        )
+        conn.commit()
+        return cursor.rowcount > 0
 
 def reject_loan_db(loan_id: int) -> bool:
     """Set loan status to 'rejected'"""
-    ensure_loans_table_exists()
-    conn = get_connection('penny.db')
-    cursor = conn.cursor()
-    cursor.execute("UPDATE loans SET status = 'rejected' WHERE id = ?", (loan_id,))
-    conn.commit()
-    updated = cursor.rowcount > 0
-    conn.close()
-    return updated
-
-def make_repayment_db(loan_id: int, amount: float) -> bool:
-    """Add a repayment record and update balance_remaining"""
-    ensure_loans_table_exists()
-    conn = get_connection('penny.db')
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO repayments (loan_id, amount) VALUES (?, ?)",
-        (loan_id, amount)
-    )
-    # Update balance_remaining
-    cursor.execute(
-        "UPDATE loans SET balance_remaining = balance_remaining - ? WHERE id = ?",
-        (amount, loan_id)
-    )
-    conn.commit()
-    success = cursor.rowcount > 0
-    conn.close()
-    return success
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("UPDATE loans SET status = 'rejected' WHERE id = ?", (loan_id,))
+        conn.commit()
+        return cursor.rowcount > 0
+
+def get_pending_loan_ids():
+    """Ids of every pending loan, oldest application first"""
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id FROM loans WHERE status = 'pending' ORDER BY id")
+        return [row[0] for row in cursor.fetchall()]
+
+def decide_loans_db(decisions, rules=None):
+    """Approve or reject many loans in one transaction and return a result per decision.
+
+    ``decisions`` is a list of ``(loan_id, decision)`` pairs where decision is
+    "approve", "reject" or "auto". Auto decisions apply ``rules`` (a
+    DecisionRules) using each user's approved loans, including approvals
+    made earlier in the same batch. Only loans still pending are changed.
+    """
+    loan_ids = list(dict.fromkeys(int(loan_id) for loan_id, _ in decisions))
+    approval_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+    with immediate_transaction() as conn:
+        cursor = conn.cursor()
+        loans = {row[0]: row for row in select_in_chunks(
+            cursor,
+            "SELECT id, user_id, status, principal, term_months FROM loans WHERE id IN ({ids})",
+            loan_ids
+        )}
+
+        history = {}
+        if rules is not None:
+            user_ids = list({row[1] for row in loans.values()})
+            for user_id, active, outstanding in select_in_chunks(cursor, """
+                SELECT user_id, COUNT(*), COALESCE(SUM(balance_remaining), 0) FROM loans
+                WHERE status = 'approved' AND user_id IN ({ids})
+                GROUP BY user_id
+            """, user_ids):
+                history[user_id] = [active, outstanding]
+
+        results, updates = [], []
+        for loan_id, decision in decisions:
+            loan_id = int(loan_id)
+            loan = loans.get(loan_id)
+            if loan is None:
+                results.append({"loan_id": loan_id, "status": "skipped", "reason": "loan not found"})
+                continue
+            if loan[2] != 'pending':
+                results.append({"loan_id": loan_id, "status": "skipped", "reason": f"already {loan[2]}"})
+                continue
+
+            reason = None
+            if decision == "auto":
+                if rules is None:
+                    raise ValueError("Auto decisions need DecisionRules.")
+                active, outstanding = history.setdefault(loan[1], [0, 0])
+                reason = rules.rejection_reason(from_ngwee(loan[3]), loan[4], active, from_ngwee(outstanding))
+                decision = "reject" if reason else "approve"
+            elif decision not in ("approve", "reject"):
+                raise ValueError(f"Unknown loan decision: {decision!r}")
+
+            status = 'approved' if decision == "approve" else 'rejected'
+            if status == 'approved' and rules is not None:
+                user_history = history.setdefault(loan[1], [0, 0])
+                user_history[0] += 1
+                user_history[1] += loan[3]
+            loans[loan_id] = loan[:2] + (status,) + loan[3:]  # a repeated id in the batch is skipped
+            updates.append((status, status, approval_date, loan_id))
+            results.append({"loan_id": loan_id, "status": status, "reason": reason})
+
+        cursor.executemany("""
+            UPDATE loans
+            SET status = ?, approval_date = CASE WHEN ? = 'approved' THEN ? ELSE approval_date END
+            WHERE id = ? AND status = 'pending'
+        """, updates)
+
+    return results
+
+# Loan columns in _loan_row_to_dict order; total_repayment and balance_remaining are kept current by
+# make_repayment_db, so reads never aggregate repayments
+LOAN_COLUMNS = """
+    id, user_id, principal, interest_rate, term_months, loan_type,
+    reason, status, application_date, monthly_payment,
+    total_repayment, balance_remaining, approval_date
+"""
+
+LOAN_SELECT = "SELECT" + LOAN_COLUMNS + "FROM loans"
+
+def make_repayment_db(loan_id: int, amount: float, user_id=None):
+    """Record a repayment and return the updated loan as a dict, or None if it was refused.
+
+    The loan's totals, balance and status change in one guarded UPDATE: it only
+    applies to an approved loan (owned by ``user_id`` when given) whose balance
+    covers the amount, and a loan paid down to zero becomes 'completed'. The
+    repayment row is written in the same transaction, only if the UPDATE matched.
+    """
+    amount = to_ngwee(amount)
+    with immediate_transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            UPDATE loans
+            SET total_repayment = COALESCE(total_repayment, 0) + :amount,
+                balance_remaining = balance_remaining - :amount,
+                status = CASE WHEN balance_remaining = :amount THEN 'completed' ELSE status END
+            WHERE id = :loan_id AND status = 'approved' AND :amount > 0
+              AND balance_remaining >= :amount
+              AND (:user_id IS NULL OR user_id = :user_id)
+            RETURNING""" + LOAN_COLUMNS,
+            {"amount": amount, "loan_id": loan_id, "user_id": user_id}
+        )
+        loan = cursor.fetchone()
+        if not loan:
+            return None
+        cursor.execute(
+            "INSERT INTO repayments (loan_id, amount) VALUES (?, ?)",
+            (loan_id, amount)
+        )
+    return _loan_row_to_dict(loan)
+
+def _loan_row_to_dict(row):
+    # Money columns are stored in ngwee; callers work in kwacha
+    return {
+        'id': row[0],
+        'user_id': row[1],
+        'principal': from_ngwee(row[2]),
+        'interest_rate': row[3],
+        'term_months': row[4],
+        'loan_type': row[5],
+        'reason': row[6],
+        'status': row[7],
+        'application_date': row[8],
+        'monthly_payment': from_ngwee(row[9]),
+        'total_repayment': from_ngwee(row[10]),
+        'balance_remaining': from_ngwee(row[11]),
+        'approval_date': row[12]
+    }
 
 def find_loan_db(loan_id: int):
     """Find a loan by its ID and return as dict"""
-    ensure_loans_table_exists()
-    conn = get_connection('penny.db')
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM loans WHERE id = ?", (loan_id,))
-    loan = cursor.fetchone()
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(LOAN_SELECT + " WHERE id = ?", (loan_id,))
+        loan = cursor.fetchone()
     if not loan:
-        conn.close()
         return None
-    # Get total repayment
-    cursor.execute("SELECT SUM(amount) FROM repayments WHERE loan_id = ?", (loan_id,))
-    total_repaid = cursor.fetchone()[0] or 0
-    loan_dict = {
-        'id': loan[0],
-        'user_id': loan[1],
-        'principal': loan[2],
-        'interest_rate': loan[3],
-        'term_months': loan[4],
-        'loan_type': loan[5],
-        'reason': loan[6],
-        'status': loan[7],
-        'application_date': loan[8],
-        'monthly_payment': loan[9],
-        'total_repayment': total_repaid,
-        'balance_remaining': loan[10]
-    }
-    conn.close()
-    return loan_dict
+    return _loan_row_to_dict(loan)
 
 def get_loans_by_user(user_id):
-    """Get all loans for a user with repayment calculations"""
-    ensure_loans_table_exists()
-    conn = get_connection('penny.db')
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM loans WHERE user_id = ?", (user_id,))
-    loans = cursor.fetchall()
-    loan_data = []
-    for loan in loans:
-        cursor.execute("SELECT SUM(amount) FROM repayments WHERE loan_id = ?", (loan[0],))
-        total_repaid = cursor.fetchone()[0] or 0
-        loan_data.append({
-            'id': loan[0],
-            'user_id': loan[1],
-            'principal': loan[2],
-            'interest_rate': loan[3],
-            'term_months': loan[4],
-            'loan_type': loan[5],
-            'reason': loan[6],
-            'status': loan[7],
-            'application_date': loan[8],
-            'monthly_payment': loan[9],
-            'total_repayment': total_repaid,
-            'balance_remaining': loan[10]
-        })
-    conn.close()
-    return loan_data
\ No newline at end of file
+    """Get all loans for a user"""
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(LOAN_SELECT + " WHERE user_id = ? ORDER BY id", (user_id,))
+        return [_loan_row_to_dict(loan) for loan in cursor.fetchall()]
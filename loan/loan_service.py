@@ -1,13 +1,18 @@
 # loan/loan_service.py
 # handles the business logic for loan applications, repayments, and loan management.
 # It provides methods to apply for loans, approve or reject them, and manage repayments.
-from .models import Loan, LoanType, LoanStatus
+from .models import Loan, LoanType, LoanStatus, DecisionRules
 from .loan_manager import apply_loan, get_loans_by_user, approve_loan_db, reject_loan_db, make_repayment_db, find_loan_db
+from .loan_manager import decide_loans_db, get_pending_loan_ids
+from .amortization import AmortizationEngine
+from .quotes import quote
+from database.schema import ensure_schema
 from datetime import datetime
 
 class LoanService:
     def __init__(self):
-        pass  # Tables are managed by loan_manager now
+        ensure_schema()  # No-op after the first call in this process
+        self.amortization = AmortizationEngine()
 
     def apply_for_loan(self, user_id: str, principal: float, interest_rate: float,
                       term_months: int, loan_type: str, reason: str = "") -> Loan:
@@ -43,6 +48,7 @@ class LoanService:
                 reason=loan['reason'],
                 status=loan['status'],
                 application_date=loan['application_date'],
+                approval_date=loan['approval_date'],
                 monthly_payment=loan['monthly_payment'],
                 total_repayment=loan['total_repayment'],
                 balance_remaining=loan['balance_remaining']
@@ -57,16 +63,55 @@ class LoanService:
         """Reject a pending loan"""
         return reject_loan_db(loan_id)
 
-    def make_repayment(self, loan_id: int, amount: float) -> bool:
-        """Make a repayment on an approved loan"""
-        return make_repayment_db(loan_id, amount)
+    def decide_many(self, decisions, rules: DecisionRules = None) -> list[dict]:
+        """Approve/reject many pending loans in one transaction.
+
+        ``decisions`` maps loan ids to "approve", "reject" or "auto" (or is a
+        list of such pairs); "auto" defers to ``rules``. Returns one
+        ``{"loan_id", "status", "reason"}`` dict per decision, in order.
+        """
+        if isinstance(decisions, dict):
+            decisions = list(decisions.items())
+        return decide_loans_db(list(decisions), rules)
+
+    def auto_decide_pending(self, rules: DecisionRules) -> list[dict]:
+        """Run ``rules`` over the whole pending queue"""
+        return self.decide_many([(loan_id, "auto") for loan_id in get_pending_loan_ids()], rules)
+
+    def make_repayment(self, loan_id: int, amount: float, user_id: str = None) -> Loan | None:
+        """Make a repayment on an approved loan and return the updated loan.
+
+        Returns None when the loan is missing, not approved, not owned by
+        ``user_id`` (if given) or the amount exceeds the remaining balance.
+        """
+        loan = make_repayment_db(loan_id, amount, user_id)
+        return Loan(**loan) if loan else None
+
+    def get_loan_summaries(self, loans: list[Loan]) -> dict:
+        """Monthly payment, total payment and total interest per loan id, in one vectorised pass"""
+        if not loans:
+            return {}
+        figures = self.amortization.summaries(
+            [loan.principal for loan in loans],
+            [loan.interest_rate for loan in loans],
+            [loan.term_months for loan in loans]
+        )
+        return {
+            loan.id: {key: round(float(values[i]), 2) for key, values in figures.items()}
+            for i, loan in enumerate(loans)
+        }
+
+    def get_schedules(self, loans: list[Loan]) -> dict:
+        """(loans x months) schedule arrays for the given loans, rows in the order given"""
+        return self.amortization.schedules(
+            [loan.principal for loan in loans],
+            [loan.interest_rate for loan in loans],
+            [loan.term_months for loan in loans]
+        )
 
     def _calculate_monthly_payment(self, principal: float, rate: float, term: int) -> float:
-        """Calculate monthly payment using amortization formula"""
-        monthly_rate = rate / 100 / 12
-        if monthly_rate == 0:
-            return principal / term
-        return principal * monthly_rate * (1 + monthly_rate) ** term / ((1 + monthly_rate) ** term - 1)
+        """Monthly payment from the shared quote cache, rounded to ngwee"""
+        return quote(principal, rate, term)["monthly_payment"]
 
     def find_loan(self, loan_id: int) -> Loan | None:
         """Find a loan by ID using the database"""
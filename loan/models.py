@@ -36,6 +36,27 @@ class Loan:
     total_repayment: float = 0.0
     balance_remaining: float = 0.0
 
+@dataclass
+class DecisionRules:
+    """Limits for auto-deciding pending loans; a None limit is not checked"""
+    max_principal: Optional[float] = None
+    max_term_months: Optional[int] = None
+    max_active_loans: Optional[int] = None  # approved loans the user would hold, including this one
+    max_exposure: Optional[float] = None    # user's outstanding balance plus this principal
+
+    def rejection_reason(self, principal: float, term_months: int,
+                         active_loans: int, outstanding: float) -> Optional[str]:
+        """Why a loan fails these rules, or None if it should be approved"""
+        if self.max_principal is not None and principal > self.max_principal:
+            return f"principal above {self.max_principal:.2f}"
+        if self.max_term_months is not None and term_months > self.max_term_months:
+            return f"term above {self.max_term_months} months"
+        if self.max_active_loans is not None and active_loans + 1 > self.max_active_loans:
+            return f"user already has {active_loans} active loans"
+        if self.max_exposure is not None and outstanding + principal > self.max_exposure:
+            return f"exposure would exceed {self.max_exposure:.2f}"
+        return None
+
 @dataclass
 class Repayment:
     id: Optional[int] = None
@@ -0,0 +1,127 @@
+# loan/portfolio.py
+# Portfolio-wide loan analytics for loan officers.
+# One pass over loans pulls every loan with its running repayment total; NumPy does the per-loan schedule maths.
+
+from datetime import date
+
+import numpy as np
+
+from database.db_helper import pooled_connection
+from .amortization import AmortizationEngine
+from .models import LoanStatus
+
+# (label, lowest days past due, highest days past due)
+DPD_BUCKETS = (
+    ("current", 0, 0),
+    ("1-30", 1, 30),
+    ("31-60", 31, 60),
+    ("61-90", 61, 90),
+    ("90+", 91, None),
+)
+
+PROJECTION_MONTHS = 12
+
+
+class LoanPortfolioReport:
+    """Exposure, arrears and projected inflow across every loan.
+
+    Active loans are those with status 'approved'. Each one follows a level
+    monthly schedule from its approval date, with the first instalment due a
+    month later on the same day of the month. Repayments count against the
+    oldest unpaid instalments first.
+    """
+
+    def __init__(self, as_of: date = None):
+        self.as_of = as_of or date.today()
+        self.amortization = AmortizationEngine()
+
+    def _load(self):
+        """Every loan with its repayment total, as column arrays"""
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None  # plain tuples; sqlite3.Row costs more than the query at this size
+            cursor.execute("""
+                SELECT l.status, l.principal, l.interest_rate, l.term_months, l.balance_remaining,
+                       substr(COALESCE(NULLIF(l.approval_date, ''), l.application_date), 1, 10),
+                       COALESCE(l.total_repayment, 0)
+                FROM loans l
+            """)
+            rows = cursor.fetchall()
+
+        columns = list(zip(*rows)) if rows else [()] * 7
+        return {
+            "status": np.array(columns[0], dtype=object),
+            "principal": np.array(columns[1], dtype=float) / 100,
+            "rate": np.array(columns[2], dtype=float),
+            "term": np.array(columns[3], dtype=int),
+            "outstanding": np.array(columns[4], dtype=float) / 100,
+            "start": np.array(columns[5], dtype="datetime64[D]"),
+            "paid": np.array(columns[6], dtype=float) / 100,
+        }
+
+    def generate(self):
+        """Build the report as a dict of kwacha figures"""
+        loans = self._load()
+
+        statuses, status_index = np.unique(loans["status"].astype(str), return_inverse=True)
+        counts = np.bincount(status_index, minlength=len(statuses))
+        principal_by_status = np.bincount(status_index, weights=loans["principal"], minlength=len(statuses))
+        by_status = {
+            str(status): {"count": int(count), "principal": round(float(total), 2)}
+            for status, count, total in zip(statuses, counts, principal_by_status)
+        }
+
+        active = loans["status"] == LoanStatus.APPROVED.value
+        principal, rate, term = loans["principal"][active], loans["rate"][active], loans["term"][active]
+        outstanding, start, paid = loans["outstanding"][active], loans["start"][active], loans["paid"][active]
+
+        payment = self.amortization.monthly_payments(principal, rate, term)
+        today = np.datetime64(self.as_of, "D")
+        start_month = start.astype("datetime64[M]")
+        day_offset = start - start_month.astype("datetime64[D]")
+
+        # Instalments due on or before today
+        elapsed = (today.astype("datetime64[M]") - start_month).astype(int)
+        this_months_due = start_month + elapsed
+        due_count = elapsed - (this_months_due.astype("datetime64[D]") + day_offset > today)
+        due_count = np.clip(due_count, 0, term)
+
+        expected = payment * due_count
+        arrears = np.clip(expected - paid, 0, None)
+
+        # Oldest unpaid instalment decides days past due
+        with np.errstate(divide="ignore", invalid="ignore"):
+            covered = np.where(payment > 0, np.floor(paid / payment + 1e-9), term).astype(int)
+        oldest_unpaid = (start_month + covered + 1).astype("datetime64[D]") + day_offset
+        days_past_due = np.where(covered < due_count, (today - oldest_unpaid).astype(int), 0)
+
+        buckets = {}
+        for label, low, high in DPD_BUCKETS:
+            mask = days_past_due >= low if high is None else (days_past_due >= low) & (days_past_due <= high)
+            buckets[label] = {"count": int(mask.sum()), "outstanding": round(float(outstanding[mask].sum()), 2)}
+
+        # Scheduled instalments per calendar month over the next PROJECTION_MONTHS, capped at what is still owed
+        first_month = today.astype("datetime64[M]") + 1
+        months = first_month + np.arange(PROJECTION_MONTHS)
+        instalment = (months[None, :] - start_month[:, None]).astype(int)
+        scheduled = np.where((instalment >= 1) & (instalment <= term[:, None]), payment[:, None], 0.0)
+        owed = np.clip(payment * term - paid, 0, None)
+        # Arrears are assumed collected first, so future instalments only get what remains after them
+        future_owed = np.clip(owed - arrears, 0, None)
+        cumulative = np.minimum(np.cumsum(scheduled, axis=1), future_owed[:, None])
+        inflow = np.diff(cumulative, axis=1, prepend=0).sum(axis=0)
+
+        return {
+            "as_of": self.as_of.isoformat(),
+            "by_status": by_status,
+            "active_loans": int(active.sum()),
+            "outstanding_principal": round(float(outstanding.sum()), 2),
+            "expected_to_date": round(float(expected.sum()), 2),
+            "actual_to_date": round(float(paid.sum()), 2),
+            "arrears": round(float(arrears.sum()), 2),
+            "days_past_due": buckets,
+            "projected_inflow": [
+                {"month": str(month), "amount": round(float(amount), 2)}
+                for month, amount in zip(months, inflow)
+            ],
+        }
@@ -0,0 +1,79 @@
+# loan/quotes.py
+# Memoised loan quotes shared by the web calculator, loan applications and LoanService.
+# The calculator asks for the same few (principal, rate, term) combinations as the user types, so
+# single quotes sit in a bounded per-process LRU cache; grids are priced in one vectorised pass.
+
+from functools import lru_cache
+
+import numpy as np
+
+from database.money import to_ngwee, from_ngwee
+from .amortization import AmortizationEngine, MAX_TERM_MONTHS
+
+QUOTE_CACHE_SIZE = 4096
+SCHEDULE_CACHE_SIZE = 256
+# Longer schedules are built per call, so a full cache holds at most 256 x 360 rows
+MAX_CACHED_SCHEDULE_MONTHS = 360
+
+# Largest rates x terms grid priced in one request
+MAX_GRID_CELLS = 240
+
+_engine = AmortizationEngine()
+
+
+def _key(principal, annual_rate, term_months):
+    # Inputs that price identically (10000 vs 10000.0, 12 vs 12.0) share a cache entry
+    term_months = int(term_months)
+    if not 0 < term_months <= MAX_TERM_MONTHS:
+        raise ValueError(f"Loan term must be between 1 and {MAX_TERM_MONTHS} months.")
+    return to_ngwee(principal), round(float(annual_rate), 6), term_months
+
+
+@lru_cache(maxsize=QUOTE_CACHE_SIZE)
+def _cached_quote(principal_ngwee, annual_rate, term_months):
+    return tuple(_engine.summary(from_ngwee(principal_ngwee), annual_rate, term_months).items())
+
+
+def _schedule(principal_ngwee, annual_rate, term_months):
+    return tuple(tuple(row.items()) for row in
+                 _engine.schedule(from_ngwee(principal_ngwee), annual_rate, term_months))
+
+
+_cached_schedule = lru_cache(maxsize=SCHEDULE_CACHE_SIZE)(_schedule)
+
+
+def quote(principal, annual_rate, term_months):
+    """Monthly payment, total payment and total interest for one loan, rounded to ngwee"""
+    return dict(_cached_quote(*_key(principal, annual_rate, term_months)))
+
+
+def quote_schedule(principal, annual_rate, term_months):
+    """Month-by-month schedule for one loan (see AmortizationEngine.schedule)"""
+    key = _key(principal, annual_rate, term_months)
+    rows = _cached_schedule(*key) if key[2] <= MAX_CACHED_SCHEDULE_MONTHS else _schedule(*key)
+    return [dict(row) for row in rows]
+
+
+def quote_grid(principal, annual_rates, terms):
+    """Quotes for every (rate, term) pair, rates outermost, in a single vectorised pass"""
+    annual_rates = [float(rate) for rate in annual_rates]
+    terms = [int(term) for term in terms]
+    if any(not 0 < term <= MAX_TERM_MONTHS for term in terms):
+        raise ValueError(f"Loan term must be between 1 and {MAX_TERM_MONTHS} months.")
+    if len(annual_rates) * len(terms) > MAX_GRID_CELLS:
+        raise ValueError(f"A quote grid is limited to {MAX_GRID_CELLS} rate/term combinations.")
+    if not annual_rates or not terms:
+        return []
+
+    rate_grid, term_grid = np.meshgrid(annual_rates, terms, indexing="ij")
+    figures = _engine.summaries(from_ngwee(to_ngwee(principal)), rate_grid.ravel(), term_grid.ravel())
+    return [{
+        "interest_rate": float(rate),
+        "term_months": int(term),
+        **{key: round(float(values[i]), 2) for key, values in figures.items()},
+    } for i, (rate, term) in enumerate(zip(rate_grid.ravel(), term_grid.ravel()))]
+
+
+def quote_cache_info():
+    """Hit/miss statistics for the single-quote cache"""
+    return _cached_quote.cache_info()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+AmortizationEngine: scalar payments match the annuity formula and vectorised schedules add up.
+Quotes: cached single quotes and grid pricing agree with the engine.
+"""
+
+import sys
+import os
+import numpy as np
+import pytest
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loan.amortization import AmortizationEngine, MAX_TERM_MONTHS
+from loan.quotes import (quote, quote_grid, quote_schedule, quote_cache_info, MAX_GRID_CELLS,
+                         MAX_CACHED_SCHEDULE_MONTHS, _cached_schedule)
+
+
+def test_monthly_payment_matches_annuity_formula():
+    engine = AmortizationEngine()
+    r = 12 / 100 / 12
+    expected = 10000 * r * (1 + r) ** 12 / ((1 + r) ** 12 - 1)
+    assert engine.monthly_payment(10000, 12, 12) == pytest.approx(expected)
+    assert engine.monthly_payment(1200, 0, 12) == pytest.approx(100)
+    assert engine.summary(10000, 12, 12) == {
+        "monthly_payment": 888.49, "total_payment": 10661.85, "total_interest": 661.85
+    }
+
+
+def test_schedules_for_many_loans_amortize_to_zero():
+    engine = AmortizationEngine()
+    principal = [1000, 2000, 500]
+    table = engine.schedules(principal, [12, 0, 6], [3, 2, 4])
+
+    assert table["payment"].shape == (3, 4)
+    np.testing.assert_allclose(table["principal"].sum(axis=1), principal)
+    np.testing.assert_allclose(table["balance"][:, -1], 0, atol=1e-9)
+    np.testing.assert_allclose(table["payment"], table["interest"] + table["principal"])
+    # Months past a loan's term are padding
+    assert table["payment"][1, 2:].tolist() == [0, 0]
+
+    with pytest.raises(ValueError):
+        engine.schedules(1000, 12, 0)
+
+
+def test_terms_are_bounded_and_overflowing_figures_are_rejected():
+    engine = AmortizationEngine()
+    assert engine.schedules(1000, 12, MAX_TERM_MONTHS)["payment"].shape == (1, MAX_TERM_MONTHS)
+    with pytest.raises(ValueError, match="at most"):
+        engine.schedules(1000, 12, MAX_TERM_MONTHS + 1)
+    with pytest.raises(ValueError, match="at most"):
+        engine.monthly_payments([1000, 1000], 12, [12, 10 ** 9])
+    with pytest.raises(ValueError, match="out of range"):
+        engine.summary(1000, 10 ** 6, MAX_TERM_MONTHS)
+    # Padding months of a short loan may overflow without affecting its own figures
+    table = engine.schedules([1000, 1000], [5000, 12], [1, MAX_TERM_MONTHS])
+    assert np.isfinite(table["balance"]).all() and table["payment"][0, 1:].sum() == 0
+
+
+def test_quotes_are_cached_and_grids_match_single_quotes():
+    first = quote(10000, 12, 12)
+    hits = quote_cache_info().hits
+    assert quote(10000.0, 12.0, 12) == first == AmortizationEngine().summary(10000, 12, 12)
+    assert quote_cache_info().hits == hits + 1
+    first["monthly_payment"] = 0  # callers get their own copy
+    assert quote(10000, 12, 12)["monthly_payment"] == 888.49
+
+    grid = quote_grid(10000, [10, 12], [6, 12, 24])
+    assert [(q["interest_rate"], q["term_months"]) for q in grid[:4]] == [(10, 6), (10, 12), (10, 24), (12, 6)]
+    assert {key: grid[4][key] for key in first} == quote(10000, 12, 12)
+
+    with pytest.raises(ValueError):
+        quote_grid(10000, range(1, MAX_GRID_CELLS + 1), [12, 24])
+
+
+def test_quote_terms_are_bounded_before_caching():
+    for term in (0, MAX_TERM_MONTHS + 1, 10 ** 9):
+        with pytest.raises(ValueError):
+            quote(10000, 12, term)
+        with pytest.raises(ValueError):
+            quote_schedule(10000, 12, term)
+        with pytest.raises(ValueError):
+            quote_grid(10000, [12], [12, term])
+
+    cached = _cached_schedule.cache_info().currsize
+    long_schedule = quote_schedule(10000, 12, MAX_CACHED_SCHEDULE_MONTHS + 1)
+    assert len(long_schedule) == MAX_CACHED_SCHEDULE_MONTHS + 1 and long_schedule[-1]["balance"] == 0
+    assert _cached_schedule.cache_info().currsize == cached
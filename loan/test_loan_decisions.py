@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Bulk loan decisions: explicit approve/reject batches and DecisionRules over the pending queue.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_helper import pooled_connection
+from loan.loan_service import LoanService
+from loan.models import DecisionRules
+
+
+def _statuses():
+    with pooled_connection() as conn:
+        rows = conn.execute("SELECT id, status, approval_date IS NOT NULL FROM loans ORDER BY id").fetchall()
+    return {row[0]: (row[1], bool(row[2])) for row in rows}
+
+
+def test_decide_many_applies_explicit_decisions_to_pending_loans_only(pool_db):
+    service = LoanService()
+    first, second, third = (service.apply_for_loan("1", 1000, 10, 12, "Full").id for _ in range(3))
+    service.approve_loan(first)
+
+    results = service.decide_many([
+        (first, "reject"), (second, "approve"), (third, "reject"), (999, "approve"), (second, "reject"),
+    ])
+
+    assert results == [
+        {"loan_id": first, "status": "skipped", "reason": "already approved"},
+        {"loan_id": second, "status": "approved", "reason": None},
+        {"loan_id": third, "status": "rejected", "reason": None},
+        {"loan_id": 999, "status": "skipped", "reason": "loan not found"},
+        # A repeated id sees the decision made earlier in the same batch
+        {"loan_id": second, "status": "skipped", "reason": "already approved"},
+    ]
+    assert _statuses() == {first: ("approved", True), second: ("approved", True), third: ("rejected", False)}
+
+
+def test_auto_decide_pending_counts_approvals_made_earlier_in_the_batch(pool_db):
+    service = LoanService()
+    held = service.apply_for_loan("1", 1000, 10, 12, "Full").id
+    service.approve_loan(held)
+    fits = service.apply_for_loan("1", 2000, 10, 12, "Full").id
+    one_too_many = service.apply_for_loan("1", 500, 10, 12, "Full").id
+    too_large = service.apply_for_loan("2", 20000, 10, 12, "Full").id
+    too_long = service.apply_for_loan("2", 100, 10, 120, "Full").id
+    exposure_ok = service.apply_for_loan("3", 4500, 10, 12, "Full").id
+    exposure_over = service.apply_for_loan("3", 1000, 10, 12, "Full").id
+    decided_already = service.apply_for_loan("3", 100, 10, 12, "Full").id
+    service.reject_loan(decided_already)
+
+    rules = DecisionRules(max_principal=10000, max_term_months=60, max_active_loans=2, max_exposure=5000)
+    results = service.auto_decide_pending(rules)
+
+    assert results == [
+        {"loan_id": fits, "status": "approved", "reason": None},
+        {"loan_id": one_too_many, "status": "rejected", "reason": "user already has 2 active loans"},
+        {"loan_id": too_large, "status": "rejected", "reason": "principal above 10000.00"},
+        {"loan_id": too_long, "status": "rejected", "reason": "term above 60 months"},
+        {"loan_id": exposure_ok, "status": "approved", "reason": None},
+        {"loan_id": exposure_over, "status": "rejected", "reason": "exposure would exceed 5000.00"},
+    ]
+    assert _statuses() == {
+        held: ("approved", True),
+        fits: ("approved", True),
+        one_too_many: ("rejected", False),
+        too_large: ("rejected", False),
+        too_long: ("rejected", False),
+        exposure_ok: ("approved", True),
+        exposure_over: ("rejected", False),
+        decided_already: ("rejected", False),
+    }
+    # Nothing is pending any more, and a stale id in an explicit batch is skipped
+    assert service.auto_decide_pending(rules) == []
+    assert service.decide_many([(one_too_many, "auto")], rules) == [
+        {"loan_id": one_too_many, "status": "skipped", "reason": "already rejected"},
+    ]
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Repayments: running totals, overpayment refusal and completion in one guarded update.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_helper import pooled_connection
+from loan.loan_service import LoanService
+
+
+def test_repayments_keep_totals_and_complete_the_loan(pool_db):
+    service = LoanService()
+    loan_id = service.apply_for_loan("1", 1000, 10, 12, "Full").id
+    assert service.make_repayment(loan_id, 100) is None  # still pending
+    service.approve_loan(loan_id)
+
+    loan = service.make_repayment(loan_id, 400.25)
+    assert (loan.total_repayment, loan.balance_remaining, loan.status) == (400.25, 599.75, "approved")
+    assert service.make_repayment(loan_id, 599.76) is None  # overpayment
+    assert service.make_repayment(loan_id, 100, user_id="2") is None  # someone else's loan
+
+    loan = service.make_repayment(loan_id, 599.75, user_id="1")
+    assert (loan.total_repayment, loan.balance_remaining, loan.status) == (1000, 0, "completed")
+    assert service.make_repayment(loan_id, 0.01) is None
+    assert service.find_loan(loan_id) == loan
+
+    with pooled_connection() as conn:
+        assert conn.execute("SELECT COUNT(*), SUM(amount) FROM repayments").fetchone()[:] == (2, 100000)
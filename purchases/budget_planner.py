@@ -3,109 +3,108 @@
 # It allows users to set budgets, update them, and view summaries
 
 from datetime import datetime
-from database.db_helper import get_db_connection
+from database.db_helper import pooled_connection, immediate_transaction
+from database.schema import ensure_schema
+from database.money import to_ngwee, from_ngwee
 
-class BudgetPlanner:
-    def __init__(self):
-        self._create_tables()
+# Category budgets are unique on (user_id, period, category), so setting one is a single upsert
+# whichever way the month was spelled ("October", "oct", "10")
+UPSERT_BUDGET = """
+    INSERT INTO budget (user_id, category, amount, month, year, period, created_at)
+    VALUES {rows}
+    ON CONFLICT (user_id, period, category) DO UPDATE SET amount = excluded.amount
+"""
+BUDGET_ROW = "(?, ?, ?, ?, ?, ?, ?)"
 
-    def _create_tables(self):
-        conn = None
-        try:
-            conn = get_db_connection()
-            cursor = conn.cursor()
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS budget (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id TEXT,
-                    category TEXT,
-                    amount REAL,
-                    month TEXT,
-                    year INTEGER,
-                    created_at TEXT
-                )
-            """)
+# Rows per multi-row upsert; seven parameters each keeps well inside SQLite's bound-parameter limit
+BULK_CHUNK = 500
 
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS overall_budget (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id TEXT,
-                    total_amount REAL,
-                    month TEXT,
-                    year INTEGER,
-                    created_at TEXT
-                )
-            """)
-            conn.commit()
-        finally:
-            if conn:
-                conn.close()
+# Month names are matched on their first three letters, as migration 14's SQL does
+MONTH_PREFIXES = ("JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP", "OCT", "NOV", "DEC")
+
+def _month_number(month):
+    """1-12 for a month given by number or name, any case ("October", "Oct", "10")"""
+    month = str(month).strip()
+    if month.isdigit() and 1 <= int(month) <= 12:
+        return int(month)
+    if len(month) >= 3 and month[:3].upper() in MONTH_PREFIXES:
+        return MONTH_PREFIXES.index(month[:3].upper()) + 1
+    raise ValueError(f"Not a month: {month!r}")
+
+def _period(month, year):
+    """Sortable yyyymm key stored alongside the month name, e.g. 202510"""
+    return int(year) * 100 + _month_number(month)
+
+def _parse_period(value):
+    """yyyymm for a date/datetime or a "YYYY-MM" (or longer ISO) string"""
+    if isinstance(value, str):
+        return int(value[:4]) * 100 + int(value[5:7])
+    return value.year * 100 + value.month
+
+def _period_label(period):
+    return f"{period // 100:04d}-{period % 100:02d}"
+
+class BudgetPlanner:
+    def __init__(self):
+        ensure_schema()
 
     def set_overall_budget(self, user_id, total_amount, month=None, year=None):
-        conn = None
-        try:
-            conn = get_db_connection()
+        with pooled_connection() as conn:
             cursor = conn.cursor()
             
             month = month or datetime.now().strftime("%B")
             year = year or datetime.now().year
             created_at = datetime.now().isoformat()
 
+            # One statement whether or not the month already has a budget (unique on user_id, period)
             cursor.execute("""
-                SELECT * FROM overall_budget WHERE user_id = ? AND month = ? AND year = ?
-            """, (user_id, month, year))
-            existing = cursor.fetchone()
-
-            if existing:
-                cursor.execute("""
-                    UPDATE overall_budget SET total_amount = ?, created_at = ? 
-                    WHERE user_id = ? AND month = ? AND year = ?
-                """, (total_amount, created_at, user_id, month, year))
-            else:
-                cursor.execute("""
-                    INSERT INTO overall_budget (user_id, total_amount, month, year, created_at)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (user_id, total_amount, month, year, created_at))
+                INSERT INTO overall_budget (user_id, total_amount, month, year, period, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (user_id, period)
+                DO UPDATE SET total_amount = excluded.total_amount, created_at = excluded.created_at
+            """, (user_id, to_ngwee(total_amount), month, year, _period(month, year), created_at))
             
             conn.commit()
             print(f"Overall budget of ZMW {total_amount} set for {month}, {year}")
-        finally:
-            if conn:
-                conn.close()
 
     def set_budget(self, user_id, category, amount, month=None, year=None):
-        conn = None
-        try:
-            conn = get_db_connection()
+        with pooled_connection() as conn:
             cursor = conn.cursor()
             
             month = month or datetime.now().strftime("%B")
             year = year or datetime.now().year
             created_at = datetime.now().isoformat()
 
-            cursor.execute("""
-                SELECT * FROM budget WHERE user_id = ? AND category = ? AND month = ? AND year = ?
-            """, (user_id, category, month, year))
-
-            if cursor.fetchone():
-                self.update_budget(user_id, category, amount, month, year)
-                return
-
-            cursor.execute("""
-                INSERT INTO budget (user_id, category, amount, month, year, created_at)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (user_id, category, amount, month, year, created_at))
+            cursor.execute(UPSERT_BUDGET.format(rows=BUDGET_ROW),
+                           (user_id, category, to_ngwee(amount), month, year, _period(month, year), created_at))
             conn.commit()
 
             print(f"Budget set: {category} - ZMW {amount} for {month}, {year}")
-        finally:
-            if conn:
-                conn.close()
+
+    def set_budgets_bulk(self, user_id, budgets, month=None, year=None):
+        """Set many category budgets for one month, e.g. ``{"food": 1500, "rent": 4000}``.
+
+        Every category is written by one multi-row upsert (chunked only past
+        SQLite's parameter limit) in a single transaction. Categories not in
+        ``budgets`` are left as they are. Returns the number of categories set.
+        """
+        month = month or datetime.now().strftime("%B")
+        year = year or datetime.now().year
+        created_at = datetime.now().isoformat()
+        period = _period(month, year)
+        rows = [(user_id, category, to_ngwee(amount), month, year, period, created_at)
+                for category, amount in budgets.items()]
+
+        with immediate_transaction() as conn:
+            cursor = conn.cursor()
+            for start in range(0, len(rows), BULK_CHUNK):
+                chunk = rows[start:start + BULK_CHUNK]
+                cursor.execute(UPSERT_BUDGET.format(rows=", ".join([BUDGET_ROW] * len(chunk))),
+                               [value for row in chunk for value in row])
+        return len(rows)
 
     def update_budget(self, user_id, category, new_amount, month=None, year=None):
-        conn = None
-        try:
-            conn = get_db_connection()
+        with pooled_connection() as conn:
             cursor = conn.cursor()
             
             month = month or datetime.now().strftime("%B")
@@ -114,19 +113,14 @@ class BudgetPlanner:
             cursor.execute("""
                 UPDATE budget
                 SET amount = ?
-                WHERE user_id = ? AND category = ? AND month = ? AND year = ?
-            """, (new_amount, user_id, category, month, year))
+                WHERE user_id = ? AND period = ? AND category = ?
+            """, (to_ngwee(new_amount), user_id, _period(month, year), category))
             conn.commit()
 
             print(f"Updated {category} budget to ZMW {new_amount} for {month}, {year}")
-        finally:
-            if conn:
-                conn.close()
 
     def get_budgets(self, user_id, month=None, year=None):
-        conn = None
-        try:
-            conn = get_db_connection()
+        with pooled_connection() as conn:
             cursor = conn.cursor()
             
             month = month or datetime.now().strftime("%B")
@@ -134,65 +128,167 @@ class BudgetPlanner:
 
             cursor.execute("""
                 SELECT category, amount, month, year FROM budget
-                WHERE user_id = ? AND month = ? AND year = ?
-            """, (user_id, month, year))
+                WHERE user_id = ? AND period = ?
+            """, (user_id, _period(month, year)))
 
             budgets = cursor.fetchall()
             result = []
             for row in budgets:
                 result.append({
                     'category': row[0],  # Use index instead of column name
-                    'amount': row[1],
+                    'amount': from_ngwee(row[1]),
                     'month': row[2],
                     'year': row[3]
                 })
             return result
-        finally:
-            if conn:
-                conn.close()
 
     def get_budget_summary(self, user_id, month=None, year=None):
-        conn = None
-        try:
-            conn = get_db_connection()
-            cursor = conn.cursor()
-            
-            month = month or datetime.now().strftime("%B")
-            year = year or datetime.now().year
+        """Overall budget, per-category limits and actual spend from purchases for one month.
+
+        One query returns the overall budget row, every budgeted category with
+        its spend, and any category spent in without a budget; spend is read
+        from the monthly_category_spend counters. ``total_budget``
+        is the overall budget, or the sum of category limits if none is set.
+        Returns None when the month has no budgets and no purchases.
+        """
+        month = month or datetime.now().strftime("%B")
+        year = year or datetime.now().year
+        params = {"user_id": user_id, "period": _period(month, year)}
 
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            # Spend comes from monthly_category_spend, kept current by purchase_manager.record_purchases
             cursor.execute("""
-                SELECT total_amount FROM overall_budget
-                WHERE user_id = ? AND month = ? AND year = ?
-            """, (user_id, month, year))
-            total_budget_row = cursor.fetchone()
+                SELECT NULL, total_amount, NULL FROM overall_budget
+                WHERE user_id = :user_id AND period = :period
+                UNION ALL
+                SELECT b.category, b.amount,
+                       COALESCE((SELECT s.amount FROM monthly_category_spend s
+                                 WHERE s.user_id = :user_id AND s.period = :period
+                                   AND s.category = b.category), 0)
+                FROM budget b
+                WHERE b.user_id = :user_id AND b.period = :period
+                UNION ALL
+                SELECT s.category, NULL, s.amount FROM monthly_category_spend s
+                WHERE s.user_id = :user_id AND s.period = :period
+                  AND NOT EXISTS (SELECT 1 FROM budget b
+                                  WHERE b.user_id = :user_id AND b.period = :period
+                                    AND b.category = s.category)
+            """, params)
+            rows = cursor.fetchall()
+
+        if not rows:
+            return None
+
+        overall = None
+        categories = []
+        for category, limit, spent in rows:
+            if category is None and spent is None:
+                overall = overall if overall is not None else limit
+                continue
+            categories.append({
+                'category': category,
+                'amount': from_ngwee(limit) if limit is not None else None,
+                'spent': from_ngwee(spent),
+                'remaining': from_ngwee(limit - spent) if limit is not None else None
+            })
 
-            if not total_budget_row:
-                return None
+        # Arithmetic below is exact in ngwee; convert once on the way out
+        total_allocated = sum(row[1] for row in rows if row[0] is not None and row[1] is not None)
+        total_spent = sum(row[2] for row in rows if row[2] is not None)
+        total_budget = overall if overall is not None else total_allocated
+        return {
+            'total_budget': from_ngwee(total_budget),
+            'total_allocated': from_ngwee(total_allocated),
+            'total_spent': from_ngwee(total_spent),
+            'remaining': from_ngwee(total_budget - total_spent),
+            'categories': categories
+        }
 
-            total_budget = total_budget_row[0]  # Use index instead of column name
+    def trend(self, user_id, start, end):
+        """Budgeted vs spent per category for every month from ``start`` to ``end`` inclusive.
 
+        ``start`` and ``end`` are dates or "YYYY-MM" strings. One grouped query
+        over the numeric ``period`` key reads category budgets, overall budgets
+        and the monthly spend counters together. Series are aligned with ``periods`` (empty
+        months are 0) and carry running totals for cumulative charts.
+        """
+        first, last = _parse_period(start), _parse_period(end)
+        if first > last:
+            raise ValueError("Trend start must not be after its end.")
+        periods = []
+        period = first
+        while period <= last:
+            periods.append(period)
+            period = period + 1 if period % 100 < 12 else (period // 100 + 1) * 100 + 1
+
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
             cursor.execute("""
-                SELECT SUM(amount) as total_spent FROM budget
-                WHERE user_id = ? AND month = ? AND year = ?
-            """, (user_id, month, year))
-
-            total_spent_row = cursor.fetchone()
-            total_spent = total_spent_row[0] or 0.0  # Use index instead of column name
-            remaining = total_budget - total_spent
-
-            return {
-                'total_budget': total_budget,
-                'total_spent': total_spent,
-                'remaining': remaining
-            }
-        finally:
-            if conn:
-                conn.close()
+                SELECT kind, period, category, SUM(budgeted), SUM(spent) FROM (
+                    SELECT 'overall' AS kind, period, NULL AS category, total_amount AS budgeted, 0 AS spent
+                    FROM overall_budget
+                    WHERE user_id = :user_id AND period BETWEEN :first AND :last
+                    UNION ALL
+                    SELECT 'category', period, category, amount, 0 FROM budget
+                    WHERE user_id = :user_id AND period BETWEEN :first AND :last
+                    UNION ALL
+                    SELECT 'category', period, category, 0, amount FROM monthly_category_spend
+                    WHERE user_id = :user_id AND period BETWEEN :first AND :last
+                )
+                GROUP BY kind, period, category
+            """, {"user_id": user_id, "first": first, "last": last})
+            rows = cursor.fetchall()
+
+        position = {period: i for i, period in enumerate(periods)}
+        overall = [None] * len(periods)
+        categories = {}
+        for kind, period, category, budgeted, spent in rows:
+            i = position[period]
+            if kind == 'overall':
+                overall[i] = budgeted
+                continue
+            series = categories.setdefault(category, {"budgeted": [0] * len(periods), "spent": [0] * len(periods)})
+            series["budgeted"][i] = budgeted
+            series["spent"][i] = spent
+
+        def kwacha(values):
+            return [from_ngwee(value) for value in values]
+
+        def running(values):
+            total, out = 0, []
+            for value in values:
+                total += value
+                out.append(from_ngwee(total))
+            return out
+
+        # As in get_budget_summary, a month without an overall budget totals its category limits
+        overall = [
+            budgeted if budgeted is not None else sum(series["budgeted"][i] for series in categories.values())
+            for i, budgeted in enumerate(overall)
+        ]
+        spent_total = [sum(series["spent"][i] for series in categories.values()) for i in range(len(periods))]
+        return {
+            "periods": [_period_label(period) for period in periods],
+            "overall": {
+                "budgeted": kwacha(overall),
+                "spent": kwacha(spent_total),
+                "cumulative_budgeted": running(overall),
+                "cumulative_spent": running(spent_total),
+            },
+            "categories": {
+                category: {
+                    "budgeted": kwacha(series["budgeted"]),
+                    "spent": kwacha(series["spent"]),
+                    "cumulative_budgeted": running(series["budgeted"]),
+                    "cumulative_spent": running(series["spent"]),
+                }
+                for category, series in sorted(categories.items(), key=lambda item: str(item[0]))
+            },
+        }
 
     def delete_budget_category(self, user_id, category, month=None, year=None):
-        conn = None
-        try:
-            conn = get_db_connection()
+        with pooled_connection() as conn:
             cursor = conn.cursor()
             
             month = month or datetime.now().strftime("%B")
@@ -200,11 +296,8 @@ class BudgetPlanner:
 
             cursor.execute("""
                 DELETE FROM budget
-                WHERE user_id = ? AND category = ? AND month = ? AND year = ?
-            """, (user_id, category, month, year))
+                WHERE user_id = ? AND period = ? AND category = ?
+            """, (user_id, _period(month, year), category))
             conn.commit()
 
-            print(f"Deleted category '{category}' for {month} {year}")
-        finally:
-            if conn:
-                conn.close()
\ No newline at end of file
+            print(f"Deleted category '{category}' for {month} {year}")
\ No newline at end of file
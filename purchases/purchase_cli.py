@@ -48,7 +48,15 @@ def launch_purchase_cli(user_id):
         elif choice == "5":
             month = input("📆 Month for summary [press Enter for current]: ") or None
             year = input("📆 Year for summary [press Enter for current]: ") or None
-            planner.get_budget_summary(user_id, month, int(year) if year else None)
+            summary = planner.get_budget_summary(user_id, month, int(year) if year else None)
+            if not summary:
+                print("No budgets or purchases for that month.")
+            else:
+                print(f"Budget: K{summary['total_budget']:.2f} | Spent: K{summary['total_spent']:.2f} | "
+                      f"Remaining: K{summary['remaining']:.2f}")
+                for category in summary['categories']:
+                    limit = f"K{category['amount']:.2f}" if category['amount'] is not None else "no budget"
+                    print(f"  🏷️ {category['category']}: K{category['spent']:.2f} spent of {limit}")
 
         elif choice == "6":
             category = input("🏷️ Enter category to delete: ")
@@ -70,23 +78,26 @@ def launch_purchase_cli(user_id):
                 if savings_choice == "1":
                     goal_name = input("🏁 Goal name (e.g., Vacation): ")
                     amount = float(input("💵 Goal amount: "))
-                    # CHANGE 1: Use add_goal instead of set_savings_goal (removed deadline since it's not in your database)
-                    savings.add_goal(goal_name, amount)
+                    target_date = input("🗓️ Target date YYYY-MM-DD [press Enter to skip]: ") or None
+                    savings.add_goal(goal_name, amount, target_date)
                     print(f"✅ Savings goal '{goal_name}' created with target of K{amount}")
 
                 elif savings_choice == "2":
-                    # CHANGE 2: Use get_goals and display the results properly
-                    goals = savings.get_goals()
+                    goals = savings.get_projections()
                     if goals:
                         print("\n💰 Your Savings Goals:")
                         print("-" * 50)
-                        for goal_name, target_amount, saved_amount in goals:
-                            progress_percent = (saved_amount / target_amount * 100) if target_amount > 0 else 0
-                            print(f"🎯 Goal: {goal_name}")
-                            print(f"💰 Target: K{target_amount:,.2f}")
-                            print(f"💵 Saved: K{saved_amount:,.2f}")
-                            print(f"📊 Progress: {progress_percent:.1f}%")
-                            print(f"💸 Remaining: K{(target_amount - saved_amount):,.2f}")
+                        for goal in goals:
+                            print(f"🎯 Goal: {goal['goal_name']}")
+                            print(f"💰 Target: K{goal['target_amount']:,.2f}")
+                            print(f"💵 Saved: K{goal['saved_amount']:,.2f}")
+                            print(f"📊 Progress: {goal['progress']:.1f}%")
+                            print(f"💸 Remaining: K{goal['remaining']:,.2f}")
+                            if goal['remaining'] and goal['expected_completion']:
+                                print(f"📅 On pace to finish: {goal['expected_completion']}")
+                            if goal['remaining'] and goal['target_date']:
+                                print(f"🗓️ Target date: {goal['target_date'][:10]} "
+                                      f"(K{goal['required_monthly']:,.2f}/month needed)")
                             print("-" * 30)
                     else:
                         print("📭 No savings goals found. Create one first!")
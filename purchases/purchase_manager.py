@@ -0,0 +1,85 @@
+# purchases/purchase_manager.py
+# Records card purchases and keeps per-category monthly spend counters in step with them.
+# Budget summaries and trends read monthly_category_spend, so they never aggregate purchases.
+
+import csv
+import json
+from datetime import date
+from itertools import islice
+
+from database.db_helper import immediate_transaction
+from database.money import to_ngwee
+
+IMPORT_FORMATS = ("csv", "ndjson")
+
+# Purchases per executemany; bounds memory however long the input stream is
+PURCHASE_CHUNK = 1000
+
+UPSERT_SPEND = """
+    INSERT INTO monthly_category_spend (user_id, period, category, amount, purchase_count)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (user_id, period, category) DO UPDATE
+    SET amount = amount + excluded.amount, purchase_count = purchase_count + excluded.purchase_count
+"""
+
+
+def _purchase_row(user_id, purchase):
+    """Validate one purchase dict (item, amount, date, category) into an insert row"""
+    day = purchase.get("date") or date.today().isoformat()
+    day = day.isoformat() if isinstance(day, date) else str(day).strip()
+    date.fromisoformat(day[:10])  # ValueError for anything that is not an ISO date
+    amount = to_ngwee(float(purchase["amount"]))  # float() rejects "1,000" and blanks with ValueError
+    if amount <= 0:
+        raise ValueError(f"Purchase amount must be positive: {purchase['amount']!r}")
+    category = (purchase.get("category") or "Other").strip()
+    return (user_id, (purchase.get("item") or "").strip(), amount, day, category)
+
+
+def record_purchases(user_id, purchases):
+    """Insert purchases for one user and bump their spend counters; return how many were recorded.
+
+    ``purchases`` may be any iterable of dicts (a generator over a file is
+    fine). It is consumed PURCHASE_CHUNK at a time, and each chunk is one
+    executemany into purchases plus one upsert per (month, category) it
+    touches. Everything runs in one transaction, so a bad row anywhere
+    leaves nothing behind.
+    """
+    purchases = iter(purchases)
+    recorded = 0
+    with immediate_transaction() as conn:
+        cursor = conn.cursor()
+        while True:
+            chunk = [_purchase_row(user_id, purchase) for purchase in islice(purchases, PURCHASE_CHUNK)]
+            if not chunk:
+                break
+            cursor.executemany(
+                "INSERT INTO purchases (user_id, item, amount, date, category) VALUES (?, ?, ?, ?, ?)", chunk
+            )
+
+            spend = {}
+            for _, _, amount, day, category in chunk:
+                key = (int(day[:4]) * 100 + int(day[5:7]), category)
+                total, count = spend.get(key, (0, 0))
+                spend[key] = (total + amount, count + 1)
+            cursor.executemany(UPSERT_SPEND, [
+                (user_id, period, category, total, count) for (period, category), (total, count) in spend.items()
+            ])
+            recorded += len(chunk)
+    return recorded
+
+
+def record_purchase(user_id, item, amount, purchase_date, category):
+    """Record a single purchase"""
+    return record_purchases(user_id, [{"item": item, "amount": amount, "date": purchase_date, "category": category}])
+
+
+def parse_purchases(lines, fmt="csv"):
+    """Yield purchase dicts from CSV (with a header row) or NDJSON text, one line at a time"""
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"Unsupported import format: {fmt}")
+    if fmt == "csv":
+        yield from csv.DictReader(lines)
+        return
+    for line in lines:
+        if line.strip():
+            yield json.loads(line)
@@ -2,6 +2,7 @@
 # this module deals with purchases and budgeting functionalities
 from purchases.budget_planner import BudgetPlanner
 from purchases.savings import SavingsGoals
+from purchases.purchase_manager import record_purchases, parse_purchases
 from datetime import datetime
 
 class PurchaseService:
@@ -17,6 +18,9 @@ class PurchaseService:
     def set_budget_category(self, category, amount, month=None, year=None):
         return self.budget_planner.set_budget(self.user_id, category, amount, month, year)
 
+    def set_budgets_bulk(self, budgets, month=None, year=None):
+        return self.budget_planner.set_budgets_bulk(self.user_id, budgets, month, year)
+
     def get_budgets(self, month=None, year=None):
         return self.budget_planner.get_budgets(self.user_id, month, year)
 
@@ -26,15 +30,44 @@ class PurchaseService:
     def delete_budget_category(self, category, month=None, year=None):
         return self.budget_planner.delete_budget_category(self.user_id, category, month, year)
 
+    # === Purchase methods ===
+    def record_purchase(self, item, amount, purchase_date=None, category=None):
+        return record_purchases(self.user_id, [
+            {"item": item, "amount": amount, "date": purchase_date, "category": category}
+        ])
+
+    def record_purchases(self, purchases):
+        """Bulk-record an iterable of purchase dicts (item, amount, date, category)"""
+        return record_purchases(self.user_id, purchases)
+
+    def import_purchases(self, lines, fmt="csv"):
+        """Import a CSV (header: item,amount,date,category) or NDJSON file, streamed line by line"""
+        return record_purchases(self.user_id, parse_purchases(lines, fmt))
+
     # === Savings methods ===
-    def add_savings_goal(self, goal_name, target_amount):
-        return self.savings.add_goal(goal_name, target_amount)
+    def add_savings_goal(self, goal_name, target_amount, target_date=None):
+        return self.savings.add_goal(goal_name, target_amount, target_date)
 
     def update_savings_progress(self, goal_name, amount):
         return self.savings.update_saved_amount(goal_name, amount)
 
+    def record_savings_contributions(self, contributions):
+        return self.savings.record_contributions(contributions)
+
+    def contribute_to_savings_goal(self, goal_id, amount):
+        return self.savings.contribute(goal_id, amount)
+
+    def get_savings_history(self, goal_id, limit=None):
+        return self.savings.get_contributions(goal_id, limit)
+
     def get_savings_goals(self):
         return self.savings.get_goals()
 
+    def get_savings_projections(self, as_of=None):
+        return self.savings.get_projections(as_of)
+
     def delete_savings_goal(self, goal_name):
         return self.savings.delete_goal(goal_name)
+
+    def delete_savings_goal_by_id(self, goal_id):
+        return self.savings.delete_goal_by_id(goal_id)
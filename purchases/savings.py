@@ -1,93 +1,211 @@
 # purchases/savings.py
-from database.db_helper import get_db_connection
+# Savings goals and their contribution history.
+# Every contribution is logged in savings_contributions; savings_goals.saved_amount is their running
+# total, updated in the same transaction so reads never have to sum the log.
+from datetime import date, datetime, timedelta
+import numpy as np
+from database.db_helper import pooled_connection, immediate_transaction, select_in_chunks
+from database.schema import ensure_schema
+from database.money import to_ngwee, from_ngwee
+from .savings_projection import SavingsProjector
+
+# Projections pace each goal on what was contributed over this many recent days
+PACE_WINDOW_DAYS = 90
 
 class SavingsGoals:
     def __init__(self, user_id):
         self.user_id = user_id
-        self.create_table()
+        ensure_schema()
 
-    def create_table(self):
-        conn = None
-        try:
-            conn = get_db_connection()
+    def add_goal(self, goal_name, target_amount, target_date=None):
+        """Create a goal and return its id; ``target_date`` (date or "YYYY-MM-DD") is optional"""
+        if isinstance(target_date, date):
+            target_date = target_date.isoformat()
+        with pooled_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                CREATE TABLE IF NOT EXISTS savings_goals (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id TEXT,
-                    goal_name TEXT,
-                    target_amount REAL,
-                    saved_amount REAL
-                )
-            """)
+                INSERT INTO savings_goals (user_id, goal_name, target_amount, saved_amount, created_at, target_date)
+                VALUES (?, ?, ?, 0, ?, ?)
+            """, (self.user_id, goal_name, to_ngwee(target_amount), datetime.now().isoformat(), target_date or None))
             conn.commit()
-        finally:
-            if conn:
-                conn.close()
-
-    def add_goal(self, goal_name, target_amount):
-        conn = None
-        try:
-            conn = get_db_connection()
+            return cursor.lastrowid
+
+    def record_contributions(self, contributions):
+        """Log many contributions in one transaction and return each goal's new saved amount.
+
+        ``contributions`` is an iterable of ``(goal_id, amount)`` or
+        ``(goal_id, amount, when)`` tuples, ``when`` being a datetime or ISO
+        string (default now). Every goal must belong to this user, otherwise
+        nothing is written and ValueError is raised.
+        """
+        now = datetime.now().isoformat()
+        rows, totals = [], {}
+        for contribution in contributions:
+            goal_id, amount = int(contribution[0]), to_ngwee(contribution[1])
+            when = contribution[2] if len(contribution) > 2 else None
+            when = when.isoformat() if isinstance(when, (date, datetime)) else (when or now)
+            rows.append((goal_id, amount, when))
+            totals[goal_id] = totals.get(goal_id, 0) + amount
+        if not rows:
+            return {}
+
+        goal_ids = list(totals)
+        with immediate_transaction() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO savings_goals (user_id, goal_name, target_amount, saved_amount)
-                VALUES (?, ?, ?, 0)
-            """, (self.user_id, goal_name, target_amount))
-            conn.commit()
-        finally:
-            if conn:
-                conn.close()
+            owned = {row[0] for row in select_in_chunks(
+                cursor, "SELECT id FROM savings_goals WHERE user_id = ? AND id IN ({ids})", goal_ids, [self.user_id]
+            )}
+            unknown = [goal_id for goal_id in goal_ids if goal_id not in owned]
+            if unknown:
+                raise ValueError(f"Unknown savings goal id(s): {unknown}")
+
+            cursor.executemany(
+                "INSERT INTO savings_contributions (goal_id, amount, created_at) VALUES (?, ?, ?)", rows
+            )
+            cursor.executemany(
+                "UPDATE savings_goals SET saved_amount = saved_amount + ? WHERE id = ?",
+                [(total, goal_id) for goal_id, total in totals.items()]
+            )
+            rows = select_in_chunks(cursor, "SELECT id, saved_amount FROM savings_goals WHERE id IN ({ids})", goal_ids)
+        return {row[0]: from_ngwee(row[1]) for row in rows}
+
+    def contribute(self, goal_id, amount, when=None):
+        """Log one contribution and return the goal's new saved amount"""
+        contribution = (goal_id, amount) if when is None else (goal_id, amount, when)
+        return self.record_contributions([contribution])[int(goal_id)]
 
     def update_saved_amount(self, goal_name, amount):
-        conn = None
-        try:
-            conn = get_db_connection()
+        """Contribute to a goal by name (see ``contribute``); unknown names are ignored"""
+        goal = self.find_goal(goal_name)
+        if goal:
+            self.contribute(goal['id'], amount)
+
+    def find_goal(self, goal_name):
+        """The goal with this name as a dict, or None"""
+        return self._get_one("goal_name = ?", goal_name)
+
+    def get_goal(self, goal_id):
+        """The goal with this id as a dict, or None"""
+        return self._get_one("id = ?", goal_id)
+
+    def _get_one(self, condition, value):
+        with pooled_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                UPDATE savings_goals
-                SET saved_amount = saved_amount + ?
-                WHERE user_id = ? AND goal_name = ?
-            """, (amount, self.user_id, goal_name))
-            conn.commit()
-        finally:
-            if conn:
-                conn.close()
+            cursor.execute(f"""
+                SELECT id, goal_name, target_amount, saved_amount FROM savings_goals
+                WHERE user_id = ? AND {condition}
+                ORDER BY id LIMIT 1
+            """, (self.user_id, value))
+            row = cursor.fetchone()
+        return _goal_row_to_dict(row) if row else None
 
     def get_goals(self):
-        conn = None
-        try:
-            conn = get_db_connection()
+        with pooled_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                SELECT goal_name, target_amount, saved_amount
+                SELECT id, goal_name, target_amount, saved_amount
                 FROM savings_goals
                 WHERE user_id = ?
             """, (self.user_id,))
-            
-            goals = cursor.fetchall()
-            result = []
-            for row in goals:
-                result.append({
-                    'goal_name': row[0],  # Use index instead of column name
-                    'target_amount': row[1],
-                    'saved_amount': row[2]
-                })
-            return result
-        finally:
-            if conn:
-                conn.close()
+            return [_goal_row_to_dict(row) for row in cursor.fetchall()]
+
+    def get_contributions(self, goal_id, limit=None):
+        """A goal's contributions, newest first (undated opening balances last)"""
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT c.id, c.amount, c.created_at FROM savings_contributions c
+                JOIN savings_goals g ON g.id = c.goal_id
+                WHERE c.goal_id = ? AND g.user_id = ?
+                ORDER BY c.created_at DESC, c.id DESC
+                LIMIT ?
+            """, (goal_id, self.user_id, -1 if limit is None else limit))
+            return [{
+                'id': row[0],
+                'amount': from_ngwee(row[1]),
+                'created_at': row[2]
+            } for row in cursor.fetchall()]
+
+    def get_projections(self, as_of=None):
+        """Every goal with its forecast, projected together in one vectorised pass.
+
+        Adds to each goal: ``progress`` (percent), ``remaining``, ``monthly_pace``
+        (contributions per month over the last PACE_WINDOW_DAYS, or since the
+        goal started if that is later), ``expected_completion``,
+        ``required_monthly`` (to hit ``target_date``) and ``on_track``. Dates are
+        ISO strings; values that cannot be known are None.
+        """
+        as_of = as_of or date.today()
+        window_start = (as_of - timedelta(days=PACE_WINDOW_DAYS)).isoformat()
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            # Both subqueries are range reads on idx_savings_contributions_goal_time
+            cursor.execute("""
+                SELECT g.id, g.goal_name, g.target_amount, g.saved_amount, g.target_date,
+                       COALESCE(g.created_at,
+                                (SELECT MIN(c.created_at) FROM savings_contributions c
+                                 WHERE c.goal_id = g.id AND c.created_at IS NOT NULL)),
+                       (SELECT COALESCE(SUM(c.amount), 0) FROM savings_contributions c
+                        WHERE c.goal_id = g.id AND c.created_at >= ? AND c.created_at < ?)
+                FROM savings_goals g
+                WHERE g.user_id = ?
+            """, (window_start, (as_of + timedelta(days=1)).isoformat(), self.user_id))
+            rows = cursor.fetchall()
+        if not rows:
+            return []
+
+        forecast = SavingsProjector().project(
+            target=[from_ngwee(row[2] or 0) for row in rows],
+            saved=[from_ngwee(row[3] or 0) for row in rows],
+            paced_amount=[from_ngwee(row[6]) for row in rows],
+            pace_since=[max(row[5][:10], window_start) if row[5] else None for row in rows],
+            target_date=[row[4][:10] if row[4] else None for row in rows],
+            as_of=as_of
+        )
+
+        def money(value):
+            return None if np.isnan(value) else round(float(value), 2)
+
+        return [{
+            **_goal_row_to_dict(row[:4]),
+            'target_date': row[4],
+            'progress': round(float(forecast['progress'][i]), 1),
+            'remaining': money(forecast['remaining'][i]),
+            'monthly_pace': money(forecast['monthly_pace'][i]),
+            'expected_completion': None if np.isnat(forecast['expected_completion'][i])
+                                   else str(forecast['expected_completion'][i]),
+            'required_monthly': money(forecast['required_monthly'][i]),
+            'on_track': None if forecast['on_track'][i] < 0 else bool(forecast['on_track'][i])
+        } for i, row in enumerate(rows)]
 
     def delete_goal(self, goal_name):
-        conn = None
-        try:
-            conn = get_db_connection()
+        """Delete every goal with this name and their contribution history"""
+        with immediate_transaction() as conn:
             cursor = conn.cursor()
+            cursor.execute("""
+                DELETE FROM savings_contributions
+                WHERE goal_id IN (SELECT id FROM savings_goals WHERE user_id = ? AND goal_name = ?)
+            """, (self.user_id, goal_name))
             cursor.execute("""
                 DELETE FROM savings_goals
                 WHERE user_id = ? AND goal_name = ?
             """, (self.user_id, goal_name))
-            conn.commit()
-        finally:
-            if conn:
-                conn.close()
\ No newline at end of file
+
+    def delete_goal_by_id(self, goal_id):
+        """Delete a goal and its contribution history"""
+        with immediate_transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                DELETE FROM savings_contributions
+                WHERE goal_id = (SELECT id FROM savings_goals WHERE id = ? AND user_id = ?)
+            """, (goal_id, self.user_id))
+            cursor.execute("DELETE FROM savings_goals WHERE id = ? AND user_id = ?", (goal_id, self.user_id))
+            return cursor.rowcount > 0
+
+def _goal_row_to_dict(row):
+    return {
+        'id': row[0],
+        'goal_name': row[1],
+        'target_amount': from_ngwee(row[2]),
+        'saved_amount': from_ngwee(row[3])
+    }
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+BudgetPlanner: monthly summaries compare category limits with real spend from purchases.
+Purchase imports: streamed CSV/NDJSON ingestion keeps the monthly spend counters exact.
+"""
+
+import sys
+import os
+import sqlite3
+import pytest
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_helper import pooled_connection
+from database.migrations import MIGRATIONS, _MONTH_NUMBER_SQL, migrate
+from purchases.budget_planner import BudgetPlanner, _month_number
+from purchases.purchase_manager import record_purchases
+from purchases.purchase_service import PurchaseService
+
+
+def test_budget_summary_reports_spend_per_category(pool_db):
+    planner = BudgetPlanner()
+    assert planner.get_budget_summary("1", "October", 2025) is None
+
+    planner.set_budget("1", "food", 1000, "October", 2025)
+    planner.set_budget("1", "fuel", 300, "October", 2025)
+    record_purchases("1", [
+        {"item": "Groceries", "amount": 250.50, "date": "2025-10-03", "category": "food"},
+        {"item": "Cinema", "amount": 10, "date": "2025-10-31", "category": "fun"},
+        {"item": "Groceries", "amount": 9.99, "date": "2025-11-01", "category": "food"},  # next month
+    ])
+
+    # Without an overall budget the category limits add up to the total
+    summary = planner.get_budget_summary("1", "October", 2025)
+    assert (summary["total_budget"], summary["total_spent"], summary["remaining"]) == (1300, 260.5, 1039.5)
+
+    planner.set_overall_budget("1", 5000, "October", 2025)
+    summary = planner.get_budget_summary("1", "October", 2025)
+    assert (summary["total_budget"], summary["total_allocated"], summary["remaining"]) == (5000, 1300, 4739.5)
+    assert summary["categories"] == [
+        {"category": "food", "amount": 1000, "spent": 250.5, "remaining": 749.5},
+        {"category": "fuel", "amount": 300, "spent": 0, "remaining": 300},
+        {"category": "fun", "amount": None, "spent": 10, "remaining": None},
+    ]
+
+
+def test_budget_writes_upsert_on_the_period_key(pool_db):
+    planner = BudgetPlanner()
+    planner.set_overall_budget("1", 5000, "October", 2025)
+    planner.set_overall_budget("1", 6000, "October", 2025)
+    planner.set_budget("1", "food", 1000, "October", 2025)
+    planner.set_budget("1", "food", 1200, "October", 2025)
+    assert planner.set_budgets_bulk("1", {"food": 1500, "rent": 4000}, "October", 2025) == 2
+
+    assert sorted((b["category"], b["amount"]) for b in planner.get_budgets("1", "October", 2025)) == [
+        ("food", 1500), ("rent", 4000)
+    ]
+    assert planner.get_budget_summary("1", "October", 2025)["total_budget"] == 6000
+    with pooled_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM overall_budget").fetchone()[0] == 1
+
+
+def test_month_spellings_share_one_budget_row(pool_db):
+    planner = BudgetPlanner()
+    planner.set_budget("1", "food", 300, "October", 2025)
+    planner.set_budget("1", "food", 200, "october", 2025)
+    planner.set_budget("1", "food", 100, "10", 2025)
+    planner.set_overall_budget("1", 5000, "Oct", 2025)
+    planner.set_overall_budget("1", 6000, "10", 2025)
+
+    assert [(b["category"], b["amount"]) for b in planner.get_budgets("1", "OCTOBER", 2025)] == [("food", 100)]
+    summary = planner.get_budget_summary("1", "October", 2025)
+    assert (summary["total_budget"], summary["total_allocated"]) == (6000, 100)
+    assert planner.trend("1", "2025-10", "2025-10")["categories"]["food"]["budgeted"] == [100]
+
+    planner.update_budget("1", "food", 150, "oct", 2025)
+    assert planner.get_budgets("1", "10", 2025)[0]["amount"] == 150
+    planner.delete_budget_category("1", "food", "Oct", 2025)
+    assert planner.get_budgets("1", "October", 2025) == []
+
+
+def test_period_migration_merges_rows_for_the_same_month(pool_db):
+    # The pool opens lazily, so the legacy schema can be built in its file first
+    conn = sqlite3.connect(pool_db)
+    for migration in MIGRATIONS:
+        if migration.version < 6:
+            for statement in migration.statements:
+                conn.execute(statement)
+    conn.executemany("INSERT INTO budget (user_id, category, amount, month, year) VALUES (?, ?, ?, ?, ?)", [
+        ("1", "food", 300, "October", 2025),
+        ("1", "food", 200, "october", 2025),
+        ("1", "food", 100, "10", 2025),
+        ("1", "food", 50, "November", 2025),
+    ])
+    conn.executemany("INSERT INTO overall_budget (user_id, total_amount, month, year) VALUES (?, ?, ?, ?)", [
+        ("1", 5000, "October", 2025), ("1", 6000, "Oct", 2025),
+    ])
+    conn.commit()
+    conn.close()
+
+    migrate()
+    planner = BudgetPlanner()
+    trend = planner.trend("1", "2025-10", "2025-11")
+    assert trend["categories"]["food"]["budgeted"] == [100, 50]
+    assert trend["overall"]["budgeted"] == [6000, 50]
+    planner.set_budget("1", "food", 400, "Oct", 2025)
+    assert planner.get_budgets("1", "October", 2025)[0]["amount"] == 400
+
+
+def test_trend_aligns_budgets_and_spend_by_period(pool_db):
+    planner = BudgetPlanner()
+    planner.set_overall_budget("1", 5000, "December", 2024)
+    planner.set_budgets_bulk("1", {"food": 1000, "rent": 300}, "January", 2025)
+    record_purchases("1", [
+        {"item": "Groceries", "amount": 250.50, "date": "2025-01-03", "category": "food"},
+        {"item": "Cinema", "amount": 10, "date": "2024-12-31", "category": "fun"},
+        {"item": "Groceries", "amount": 9.99, "date": "2025-02-01", "category": "food"},
+        {"item": "Groceries", "amount": 5, "date": "2025-03-01", "category": "food"},  # after the range
+    ])
+
+    trend = planner.trend("1", "2024-11", "2025-02")
+
+    assert trend["periods"] == ["2024-11", "2024-12", "2025-01", "2025-02"]
+    assert trend["overall"]["budgeted"] == [0, 5000, 1300, 0]  # January has category limits only
+    assert trend["overall"]["cumulative_spent"] == [0, 10, 260.5, 270.49]
+    assert trend["categories"]["food"]["spent"] == [0, 0, 250.5, 9.99]
+    assert trend["categories"]["rent"]["budgeted"] == [0, 0, 300, 0]
+    assert trend["categories"]["fun"]["cumulative_spent"] == [0, 10, 10, 10]
+
+
+def test_purchase_import_streams_and_keeps_spend_counters(pool_db):
+    service = PurchaseService("1")
+    csv_lines = iter([
+        "item,amount,date,category\n",
+        "Groceries,100.10,2025-10-03,food\n",
+        "Fuel,50,2025-10-04,transport\n",
+        "Groceries,20,2025-11-01,food\n",
+    ])
+    assert service.import_purchases(csv_lines, "csv") == 3
+    ndjson_lines = ['{"item": "Bread", "amount": 9.9, "date": "2025-10-05", "category": "food"}\n', "\n"]
+    assert service.import_purchases(ndjson_lines, "ndjson") == 1
+
+    with pytest.raises(ValueError):
+        service.record_purchases([{"item": "Ok", "amount": 1, "date": "2025-10-06"},
+                                  {"item": "Bad", "amount": 1, "date": "06/10/2025"}])
+
+    with pooled_connection() as conn:
+        counters = conn.execute(
+            "SELECT period, category, amount, purchase_count FROM monthly_category_spend ORDER BY period, category"
+        ).fetchall()
+        assert [tuple(row) for row in counters] == [
+            (202510, "food", 11000, 2), (202510, "transport", 5000, 1), (202511, "food", 2000, 1)
+        ]
+        assert conn.execute("SELECT COUNT(*) FROM purchases").fetchone()[0] == 4  # bad batch rolled back
+
+    summary = service.get_budget_summary("October", 2025)
+    assert summary["total_spent"] == 160
+
+
+@pytest.mark.parametrize("month, number", [
+    ("October", 10), ("Oct", 10), ("oct", 10), ("SEPT", 9), ("Sep", 9), ("may", 5),
+    ("1", 1), ("12", 12), (3, 3), ("13", None), ("0", None), ("Ma", None), ("Foo", None), ("ANF", None),
+])
+def test_month_names_parse_like_the_period_migration(month, number):
+    conn = sqlite3.connect(":memory:")
+    assert conn.execute(f"SELECT {_MONTH_NUMBER_SQL} FROM (SELECT ? AS month)", (month,)).fetchone()[0] == number
+    conn.close()
+    if number is None:
+        with pytest.raises(ValueError):
+            _month_number(month)
+    else:
+        assert _month_number(month) == number
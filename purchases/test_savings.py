@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Savings goals: the contribution log, and projections of completion dates, required contributions
+and on-track flags.
+"""
+
+import sys
+import os
+from datetime import date
+import pytest
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_helper import pooled_connection
+from purchases.savings import SavingsGoals
+
+
+def test_projections_forecast_every_goal(pool_db):
+    savings = SavingsGoals("1")
+    savings.add_goal("Laptop", 1200, "2026-12-31")
+    savings.add_goal("Phone", 400)
+    savings.add_goal("Car", 10000, date(2027, 1, 31))
+    savings.update_saved_amount("Phone", 400)
+    with pooled_connection() as conn:
+        conn.execute("UPDATE savings_goals SET created_at = '2026-04-18T09:00:00'")
+        conn.commit()
+    laptop_id = savings.find_goal("Laptop")["id"]
+    # 150 a month over the last quarter; the older 150 falls outside the pace window
+    savings.record_contributions([(laptop_id, 150, "2026-05-01T10:00:00")] +
+                                 [(laptop_id, 150, f"2026-{month:02d}-01T10:00:00") for month in (8, 9, 10)])
+
+    goals = {goal["goal_name"]: goal for goal in savings.get_projections(date(2026, 10, 18))}
+
+    laptop = goals["Laptop"]
+    assert (laptop["progress"], laptop["remaining"]) == (50, 600)
+    # 450 over the 90-day window is about 152 a month: four more months, past the target date
+    assert laptop["monthly_pace"] == 152.18
+    assert laptop["expected_completion"] == "2027-02-16"
+    assert laptop["on_track"] is False
+    assert laptop["required_monthly"] == 246.79  # 600 over the 74 days (2.43 months) left
+
+    assert goals["Phone"]["remaining"] == 0 and goals["Phone"]["on_track"] is None
+    assert goals["Car"]["expected_completion"] is None  # nothing saved yet, so no pace
+    assert goals["Car"]["on_track"] is False
+
+
+def test_contributions_keep_a_history_and_a_running_total(pool_db):
+    savings = SavingsGoals("1")
+    car = savings.add_goal("Car", 10000)
+    trip = savings.add_goal("Trip", 2000)
+    other = SavingsGoals("2").add_goal("Bike", 500)
+
+    saved = savings.record_contributions([(car, 100), (trip, 50.5), (car, 25, "2026-01-01T08:00:00")])
+    assert saved == {car: 125, trip: 50.5}
+    assert savings.contribute(car, 75) == 200
+
+    with pytest.raises(ValueError):
+        savings.record_contributions([(car, 10), (other, 10)])
+    assert savings.get_goal(car)["saved_amount"] == 200  # the failed batch wrote nothing
+
+    history = savings.get_contributions(car)
+    assert [c["amount"] for c in history] == [75, 100, 25]
+    assert savings.get_contributions(other) == []  # another user's goal
+
+    savings.delete_goal("Car")
+    with pooled_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM savings_contributions WHERE goal_id = ?", (car,)).fetchone()[0] == 0